@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from app_run.models import Run, AthleteInfo, Challenge, Position, CollectibleItem
+from app_run.models import Run, AthleteInfo, Challenge, Position, CollectibleItem, Job
 
 
 # Register your models here.
@@ -49,3 +49,9 @@ class PositionAdmin(admin.ModelAdmin):
 @admin.register(CollectibleItem)
 class CollectibleItemAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "uid", "latitude", "longitude", "picture", "value")
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "attempts", "run_after", "updated_at")
+    list_filter = ("kind", "status")
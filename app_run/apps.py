@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class AppRunConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_run"
+
+    def ready(self):
+        # Подключаем обработчики сигналов моделей
+        from app_run import signals  # noqa: F401
@@ -0,0 +1,217 @@
+import json
+import operator
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from rest_framework.utils.encoders import JSONEncoder
+
+from app_run.models import CacheVersion, Challenge
+
+# Ключи кэша сводки челленджей: готовый JSON текущей версии (CacheVersion
+# с ключом CHALLENGE_SUMMARY_VERSION_KEY) и счетчики попаданий/промахов
+CHALLENGE_SUMMARY_VERSION_KEY = "challenge_summary"
+CHALLENGE_SUMMARY_CACHE_KEY = "challenge_summary:{version}"
+CHALLENGE_SUMMARY_HITS_KEY = "challenge_summary:hits"
+CHALLENGE_SUMMARY_MISSES_KEY = "challenge_summary:misses"
+
+# Счетчики, доступные правилам челленджей:
+# runs_finished, distance_total — накопленные счетчики атлета (UserStats),
+# run_distance, run_time_seconds — показатели только что завершенного забега
+COUNTERS = ("runs_finished", "distance_total", "run_distance", "run_time_seconds")
+
+OPERATORS: dict[str, Callable[[float, float], bool]] = {
+    ">=": operator.ge,
+    "<=": operator.le,
+}
+
+
+@dataclass(frozen=True)
+class Threshold:
+    """
+    Условие правила: значение счетчика сравнивается с порогом
+    """
+
+    counter: str
+    op: str
+    value: float
+
+    def matches(self, counters: dict[str, float]) -> bool:
+        return OPERATORS[self.op](counters[self.counter], self.value)
+
+
+@dataclass(frozen=True)
+class ChallengeRule:
+    """
+    Челлендж и условия, при одновременном выполнении которых он начисляется
+    """
+
+    full_name: str
+    thresholds: tuple[Threshold, ...]
+
+    def matches(self, counters: dict[str, float]) -> bool:
+        return all(threshold.matches(counters) for threshold in self.thresholds)
+
+
+# Реестр правил челленджей
+RULES: list[ChallengeRule] = []
+
+
+def register_rule(full_name: str, *thresholds: tuple[str, str, float]) -> ChallengeRule:
+    """
+    Регистрирует правило челленджа.
+
+    Пример:
+        register_rule("Пробеги 50 километров!", ("distance_total", ">=", 50))
+
+    Raises:
+        ValueError: Если правило ссылается на неизвестный счетчик или оператор.
+    """
+    rule = ChallengeRule(full_name, tuple(Threshold(*t) for t in thresholds))
+
+    for threshold in rule.thresholds:
+        if threshold.counter not in COUNTERS:
+            raise ValueError(f"Неизвестный счетчик: {threshold.counter}")
+        if threshold.op not in OPERATORS:
+            raise ValueError(f"Неизвестный оператор: {threshold.op}")
+
+    RULES.append(rule)
+    return rule
+
+
+register_rule("Сделай 10 Забегов!", ("runs_finished", ">=", 10))
+register_rule("Пробеги 50 километров!", ("distance_total", ">=", 50))
+register_rule(
+    "2 километра за 10 минут!",
+    ("run_distance", ">=", 2),
+    ("run_time_seconds", "<=", 600),
+)
+
+
+def award_challenges(athlete_id: int, counters: dict[str, float]) -> list[str]:
+    """
+    Вычисляет все правила по счетчикам и записывает выполненные челленджи
+    одним INSERT, пропуская уже полученные атлетом. Если атлет получил новый
+    челлендж, в той же транзакции сбрасывается кэш сводки челленджей.
+
+    Вызывается под блокировкой UserStats атлета (см. process_finished_run),
+    поэтому уже полученные челленджи не меняются между чтением и вставкой.
+
+    Returns:
+        list[str]: Названия челленджей, условия которых выполнены.
+    """
+    reached = [rule.full_name for rule in RULES if rule.matches(counters)]
+    if not reached:
+        return reached
+
+    owned = set(
+        Challenge.objects.filter(
+            athlete_id=athlete_id, full_name__in=reached
+        ).values_list("full_name", flat=True)
+    )
+    new = [name for name in reached if name not in owned]
+
+    if new:
+        Challenge.objects.bulk_create(
+            [Challenge(athlete_id=athlete_id, full_name=name) for name in new]
+        )
+        invalidate_challenge_summary()
+
+    return reached
+
+
+def get_summary_cache():
+    """
+    Кэш сводки челленджей. Бэкенд (память процесса, файлы, БД) задается
+    алиасом CHALLENGE_SUMMARY_CACHE в CACHES. Общий для процессов бэкенд
+    не обязателен: сводка кэшируется по версии из БД.
+    """
+    return caches[settings.CHALLENGE_SUMMARY_CACHE]
+
+
+def _count(key: str) -> None:
+    cache = get_summary_cache()
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def render_challenge_summary() -> bytes:
+    """
+    Собирает сводку челленджей: для каждого челленджа — список получивших его
+    атлетов, и возвращает ее в виде готового JSON.
+    """
+    # Импорт здесь, а не в начале модуля: сериализаторы импортируют сервисы
+    from app_run.serializers.user import AthleteSummarySerializer
+
+    grouped = defaultdict(dict)
+    for challenge in Challenge.objects.select_related("athlete").order_by("id"):
+        grouped[challenge.full_name][challenge.athlete_id] = challenge.athlete
+
+    result = [
+        {
+            "name_to_display": full_name,
+            "athletes": AthleteSummarySerializer(athletes.values(), many=True).data,
+        }
+        for full_name, athletes in grouped.items()
+    ]
+    return json.dumps(result, cls=JSONEncoder, ensure_ascii=False).encode()
+
+
+def get_challenge_summary() -> bytes:
+    """
+    Возвращает сводку челленджей из кэша, при промахе собирает и кэширует ее.
+
+    Ключ кэша включает версию сводки из БД (один запрос по первичному ключу),
+    поэтому сброс в любом процессе виден всем процессам сразу после коммита.
+    """
+    version = (
+        CacheVersion.objects.filter(key=CHALLENGE_SUMMARY_VERSION_KEY)
+        .values_list("version", flat=True)
+        .first()
+    )
+    key = CHALLENGE_SUMMARY_CACHE_KEY.format(version=version or 0)
+
+    cache = get_summary_cache()
+    payload = cache.get(key)
+    if payload is not None:
+        _count(CHALLENGE_SUMMARY_HITS_KEY)
+        return payload
+
+    _count(CHALLENGE_SUMMARY_MISSES_KEY)
+    payload = render_challenge_summary()
+    cache.set(key, payload, settings.CHALLENGE_SUMMARY_TIMEOUT)
+    return payload
+
+
+def invalidate_challenge_summary() -> None:
+    """
+    Сбрасывает кэш сводки челленджей во всех процессах, увеличивая ее версию.
+    Вызывается в транзакции изменения данных: при откате версия не меняется.
+    """
+    bumped = CacheVersion.objects.filter(key=CHALLENGE_SUMMARY_VERSION_KEY).update(
+        version=F("version") + 1
+    )
+    if not bumped:
+        CacheVersion.objects.get_or_create(
+            key=CHALLENGE_SUMMARY_VERSION_KEY, defaults={"version": 1}
+        )
+
+
+def get_challenge_summary_stats() -> dict[str, int]:
+    """
+    Счетчики попаданий и промахов кэша сводки челленджей
+    """
+    cache = get_summary_cache()
+    hits = cache.get(CHALLENGE_SUMMARY_HITS_KEY, 0)
+    misses = cache.get(CHALLENGE_SUMMARY_MISSES_KEY, 0)
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+    }
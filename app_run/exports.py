@@ -0,0 +1,139 @@
+import csv
+import io
+import json
+from collections.abc import Iterator
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from app_run.models import Position, Run, RunTrack
+from app_run.tracks import from_microseconds, unpack_track
+
+# Точка трека при выгрузке: широта, долгота, время, скорость (м/с), дистанция (км)
+TrackPoint = tuple[float, float, datetime | None, float, float]
+
+
+def iter_track_points(run_id: int) -> Iterator[TrackPoint]:
+    """
+    Точки трека забега в порядке времени.
+
+    Строки Position читаются итератором порциями по EXPORT_CHUNK_SIZE
+    (на PostgreSQL — серверным курсором), поэтому в памяти одновременно
+    находится только одна порция. Упакованный трек (RunTrack) распаковывается
+    целиком: он занимает единицы байт на точку.
+    """
+    data = RunTrack.objects.filter(run_id=run_id).values_list("data", flat=True).first()
+    if data is not None:
+        track = unpack_track(data)
+        for latitude, longitude, timestamp, speed, distance in zip(
+            track["latitude"],
+            track["longitude"],
+            track["timestamp"],
+            track["speed"],
+            track["distance"],
+        ):
+            yield (
+                float(latitude),
+                float(longitude),
+                from_microseconds(timestamp),
+                float(speed),
+                float(distance),
+            )
+        return
+
+    yield from (
+        Position.objects.filter(run_id=run_id)
+        .order_by("date_time", "id")
+        .values_list("latitude", "longitude", "date_time", "speed", "distance")
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+
+
+def _batched(lines: Iterator[str]) -> Iterator[str]:
+    # Строки отдаются клиенту порциями, а не по одной, чтобы не плодить мелкие записи в сокет
+    batch = []
+    for line in lines:
+        batch.append(line)
+        if len(batch) >= settings.EXPORT_CHUNK_SIZE:
+            yield "".join(batch)
+            batch = []
+    if batch:
+        yield "".join(batch)
+
+
+def _isoformat(date_time: datetime | None) -> str:
+    return date_time.isoformat().replace("+00:00", "Z") if date_time else ""
+
+
+def _gpx(run: Run, points: Iterator[TrackPoint]) -> Iterator[str]:
+    yield (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx version="1.1" creator="project_run" '
+        'xmlns="http://www.topografix.com/GPX/1/1">\n'
+        f"<trk><name>{escape(f'Run {run.id}')}</name>"
+        f"<desc>{escape(run.comment)}</desc><trkseg>\n"
+    )
+    for latitude, longitude, date_time, speed, distance in points:
+        time = f"<time>{_isoformat(date_time)}</time>" if date_time else ""
+        yield f'<trkpt lat="{latitude}" lon="{longitude}">{time}</trkpt>\n'
+    yield "</trkseg></trk>\n</gpx>\n"
+
+
+def _csv(run: Run, points: Iterator[TrackPoint]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def line(row) -> str:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerow(row)
+        return buffer.getvalue()
+
+    yield line(["latitude", "longitude", "date_time", "speed", "distance"])
+    for latitude, longitude, date_time, speed, distance in points:
+        yield line([latitude, longitude, _isoformat(date_time), speed, distance])
+
+
+def _geojson(run: Run, points: Iterator[TrackPoint]) -> Iterator[str]:
+    properties = json.dumps(
+        {
+            "run": run.id,
+            "athlete": run.athlete_id,
+            "distance": run.distance,
+            "run_time_seconds": run.run_time_seconds,
+        }
+    )
+    yield (
+        '{"type": "Feature", '
+        f'"properties": {properties}, '
+        '"geometry": {"type": "LineString", "coordinates": ['
+    )
+    separator = ""
+    for latitude, longitude, *_ in points:
+        # В GeoJSON порядок координат — долгота, широта
+        yield f"{separator}[{longitude}, {latitude}]"
+        separator = ", "
+    yield "]}}\n"
+
+
+# Формат выгрузки -> (генератор строк, Content-Type, расширение файла)
+EXPORT_FORMATS = {
+    "gpx": (_gpx, "application/gpx+xml", "gpx"),
+    "csv": (_csv, "text/csv", "csv"),
+    "geojson": (_geojson, "application/geo+json", "geojson"),
+}
+
+
+def export_run(run: Run, export_format: str) -> Iterator[str]:
+    """
+    Выгрузка трека забега в формате export_format порциями строк.
+
+    Трек читается по мере того, как клиент забирает ответ, поэтому первая
+    порция уходит до чтения всего трека.
+
+    Raises:
+        KeyError: Если формат не поддерживается (см. EXPORT_FORMATS).
+    """
+    write, _, _ = EXPORT_FORMATS[export_format]
+    return _batched(write(run, iter_track_points(run.id)))
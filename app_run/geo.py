@@ -0,0 +1,511 @@
+import heapq
+import math
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+import numpy as np
+from geographiclib.geodesic import Geodesic
+
+# Средний радиус Земли в метрах (IUGG)
+EARTH_RADIUS_METERS = 6371008.8
+
+# Запас радиуса описанного прямоугольника: прямоугольник считается по сфере,
+# а точное расстояние — по эллипсоиду WGS84, они расходятся до ~0.6%
+BOUNDING_BOX_MARGIN = 1.01
+
+
+class BoundingBox(NamedTuple):
+    """
+    Прямоугольник в градусах, описанный вокруг окружности заданного радиуса.
+
+    Если min_longitude > max_longitude, прямоугольник пересекает антимеридиан (±180°)
+    и по долготе состоит из двух диапазонов: [min_longitude, 180] и [-180, max_longitude].
+    """
+
+    min_latitude: float
+    min_longitude: float
+    max_latitude: float
+    max_longitude: float
+
+    @property
+    def crosses_antimeridian(self) -> bool:
+        return self.min_longitude > self.max_longitude
+
+    @property
+    def covers_all_longitudes(self) -> bool:
+        return self.min_longitude == -180.0 and self.max_longitude == 180.0
+
+    def longitude_ranges(self) -> list[tuple[float, float]]:
+        """
+        Диапазоны долгот прямоугольника: один или два, если он пересекает антимеридиан
+        """
+        if self.crosses_antimeridian:
+            return [(self.min_longitude, 180.0), (-180.0, self.max_longitude)]
+        return [(self.min_longitude, self.max_longitude)]
+
+
+def normalize_longitude(longitude: float) -> float:
+    """
+    Приводит долготу к диапазону [-180, 180)
+    """
+    return (longitude + 180.0) % 360.0 - 180.0
+
+
+def bounding_box(
+    latitude: float, longitude: float, radius_meters: float
+) -> BoundingBox:
+    """
+    Рассчитывает прямоугольник, гарантированно содержащий все точки на расстоянии
+    не больше radius_meters от заданной точки.
+
+    Если окружность захватывает полюс, прямоугольник покрывает все долготы.
+    """
+    angular_radius = radius_meters / EARTH_RADIUS_METERS
+    delta_latitude = math.degrees(angular_radius)
+
+    min_latitude = latitude - delta_latitude
+    max_latitude = latitude + delta_latitude
+
+    if min_latitude <= -90.0 or max_latitude >= 90.0 or angular_radius >= math.pi:
+        return BoundingBox(
+            max(min_latitude, -90.0), -180.0, min(max_latitude, 90.0), 180.0
+        )
+
+    delta_longitude = math.degrees(
+        math.asin(min(1.0, math.sin(angular_radius) / math.cos(math.radians(latitude))))
+    )
+    if delta_longitude >= 180.0:
+        return BoundingBox(min_latitude, -180.0, max_latitude, 180.0)
+
+    return BoundingBox(
+        min_latitude,
+        normalize_longitude(longitude - delta_longitude),
+        max_latitude,
+        normalize_longitude(longitude + delta_longitude),
+    )
+
+
+class GridIndex:
+    """
+    Пространственный индекс точек по сетке из ячеек фиксированного размера в градусах.
+
+    Поиск соседей проверяет только ячейки, попадающие в описанный прямоугольник,
+    поэтому стоимость запроса зависит от плотности точек рядом, а не от их общего числа.
+
+    Attributes:
+        cell_size (float): Размер ячейки в градусах.
+    """
+
+    def __init__(
+        self, points: Iterable[tuple[int, float, float]], cell_size: float = 0.01
+    ):
+        self.cell_size = cell_size
+        # Строка сетки (по широте) -> колонка (по долготе) -> точки ячейки
+        self._rows: dict[int, dict[int, list[tuple[int, float, float]]]] = defaultdict(
+            lambda: defaultdict(list)
+        )
+        self._size = 0
+
+        for point_id, latitude, longitude in points:
+            row, column = self._cell(latitude, normalize_longitude(longitude))
+            self._rows[row][column].append((point_id, latitude, longitude))
+            self._size += 1
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (
+            math.floor(latitude / self.cell_size),
+            math.floor(longitude / self.cell_size),
+        )
+
+    def _column_ranges(self, box: BoundingBox) -> list[tuple[int, int]]:
+        first = math.floor(box.min_longitude / self.cell_size)
+        last = math.floor(box.max_longitude / self.cell_size)
+        if not box.crosses_antimeridian:
+            return [(first, last)]
+        # Прямоугольник через антимеридиан — два диапазона колонок
+        return [
+            (first, math.floor(180.0 / self.cell_size)),
+            (math.floor(-180.0 / self.cell_size), last),
+        ]
+
+    def candidates(
+        self, latitude: float, longitude: float, radius_meters: float
+    ) -> Iterable[tuple[int, float, float]]:
+        """
+        Возвращает точки из ячеек вокруг заданной точки.
+
+        Результат — надмножество точек в радиусе (в том числе по эллипсоиду),
+        точное расстояние проверяет вызывающий код.
+        """
+        box = bounding_box(latitude, longitude, radius_meters * BOUNDING_BOX_MARGIN)
+        first_row = math.floor(box.min_latitude / self.cell_size)
+        last_row = math.floor(box.max_latitude / self.cell_size)
+
+        for row in range(first_row, last_row + 1):
+            columns = self._rows.get(row)
+            if not columns:
+                continue
+
+            if box.covers_all_longitudes:
+                for cell in columns.values():
+                    yield from cell
+                continue
+
+            for first, last in self._column_ranges(box):
+                # Перебираем меньшее из двух: колонки диапазона или занятые ячейки строки
+                if last - first + 1 <= len(columns):
+                    for column in range(first, last + 1):
+                        yield from columns.get(column, ())
+                else:
+                    for column, cell in columns.items():
+                        if first <= column <= last:
+                            yield from cell
+
+
+# Параметры эллипсоида WGS84
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+# Режимы расчета расстояния: от самого быстрого к эталонному
+DISTANCE_MODES = ("haversine", "vincenty", "geodesic")
+
+
+def _haversine(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Расстояние по большому кругу на сфере среднего радиуса, в метрах
+    """
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = np.radians(lon2 - lon1)
+
+    a = np.sin(d_phi / 2) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _geodesic(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """
+    Эталонное расстояние по эллипсоиду WGS84 (алгоритм Karney), в метрах.
+
+    Совпадает с geopy.distance.geodesic, но не векторизуется и считается по одной паре.
+    """
+    inverse = Geodesic.WGS84.Inverse
+    return np.array(
+        [
+            inverse(a, b, c, d, Geodesic.DISTANCE)["s12"]
+            for a, b, c, d in zip(lat1, lon1, lat2, lon2)
+        ],
+        dtype=float,
+    )
+
+
+def _vincenty(lat1, lon1, lat2, lon2, max_iterations: int = 200) -> np.ndarray:
+    """
+    Обратная задача Винсенти на эллипсоиде WGS84, в метрах.
+
+    Итерации идут для всех пар сразу. Пары, для которых метод не сошелся
+    (почти антиподальные точки), досчитываются эталонным методом.
+    """
+    u1 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat1)))
+    u2 = np.arctan((1 - WGS84_F) * np.tan(np.radians(lat2)))
+    big_l = np.radians(lon2 - lon1)
+    sin_u1, cos_u1 = np.sin(u1), np.cos(u1)
+    sin_u2, cos_u2 = np.sin(u2), np.cos(u2)
+
+    lam = big_l.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+
+    for _ in range(max_iterations):
+        sin_lam, cos_lam = np.sin(lam), np.cos(lam)
+        sin_sigma = np.hypot(
+            cos_u2 * sin_lam, cos_u1 * sin_u2 - sin_u1 * cos_u2 * cos_lam
+        )
+        cos_sigma = sin_u1 * sin_u2 + cos_u1 * cos_u2 * cos_lam
+        sigma = np.arctan2(sin_sigma, cos_sigma)
+
+        # Совпадающие точки дают sin_sigma == 0, для них расстояние равно нулю
+        safe_sin_sigma = np.where(sin_sigma == 0, 1.0, sin_sigma)
+        sin_alpha = cos_u1 * cos_u2 * sin_lam / safe_sin_sigma
+        cos_sq_alpha = 1 - sin_alpha**2
+
+        # На экваторе cos_sq_alpha == 0 и cos_2sigma_m принимается равным нулю
+        safe_cos_sq_alpha = np.where(cos_sq_alpha == 0, 1.0, cos_sq_alpha)
+        cos_2sigma_m = np.where(
+            cos_sq_alpha == 0, 0.0, cos_sigma - 2 * sin_u1 * sin_u2 / safe_cos_sq_alpha
+        )
+
+        c = WGS84_F / 16 * cos_sq_alpha * (4 + WGS84_F * (4 - 3 * cos_sq_alpha))
+        lam_prev = lam
+        lam = big_l + (1 - c) * WGS84_F * sin_alpha * (
+            sigma
+            + c
+            * sin_sigma
+            * (cos_2sigma_m + c * cos_sigma * (-1 + 2 * cos_2sigma_m**2))
+        )
+
+        converged = np.abs(lam - lam_prev) < 1e-12
+        if converged.all():
+            break
+
+    u_sq = cos_sq_alpha * (WGS84_A**2 - WGS84_B**2) / WGS84_B**2
+    big_a = 1 + u_sq / 16384 * (4096 + u_sq * (-768 + u_sq * (320 - 175 * u_sq)))
+    big_b = u_sq / 1024 * (256 + u_sq * (-128 + u_sq * (74 - 47 * u_sq)))
+    delta_sigma = (
+        big_b
+        * sin_sigma
+        * (
+            cos_2sigma_m
+            + big_b
+            / 4
+            * (
+                cos_sigma * (-1 + 2 * cos_2sigma_m**2)
+                - big_b
+                / 6
+                * cos_2sigma_m
+                * (-3 + 4 * sin_sigma**2)
+                * (-3 + 4 * cos_2sigma_m**2)
+            )
+        )
+    )
+    distances = WGS84_B * big_a * (sigma - delta_sigma)
+    distances = np.where(sin_sigma == 0, 0.0, distances)
+
+    if not converged.all():
+        idx = ~converged
+        distances[idx] = _geodesic(lat1[idx], lon1[idx], lat2[idx], lon2[idx])
+
+    return distances
+
+
+_DISTANCE_FUNCTIONS = {
+    "haversine": _haversine,
+    "vincenty": _vincenty,
+    "geodesic": _geodesic,
+}
+
+
+def segment_distances(latitudes, longitudes, mode: str = "vincenty") -> np.ndarray:
+    """
+    Рассчитывает длины всех отрезков трека одним вызовом.
+
+    Args:
+        latitudes (array-like): Широты точек трека в градусах.
+        longitudes (array-like): Долготы точек трека в градусах.
+        mode (str): Режим расчета из DISTANCE_MODES:
+                    "haversine" — сфера, самый быстрый, погрешность до ~0.5%;
+                    "vincenty" — эллипсоид WGS84, погрешность меньше миллиметра;
+                    "geodesic" — эталонный расчет по эллипсоиду (как geopy).
+
+    Returns:
+        np.ndarray: Массив длиной n - 1 с длинами отрезков в метрах.
+
+    Raises:
+        ValueError: Если режим неизвестен или длины массивов не совпадают.
+    """
+    if mode not in _DISTANCE_FUNCTIONS:
+        raise ValueError(
+            f"Неизвестный режим расчета расстояния: {mode}. Доступны: {DISTANCE_MODES}"
+        )
+
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    if latitudes.shape != longitudes.shape:
+        raise ValueError("Массивы широт и долгот должны быть одной длины.")
+
+    if latitudes.size < 2:
+        return np.zeros(0)
+
+    return _DISTANCE_FUNCTIONS[mode](
+        latitudes[:-1], longitudes[:-1], latitudes[1:], longitudes[1:]
+    )
+
+
+def pair_distances(
+    latitudes1, longitudes1, latitudes2, longitudes2, mode: str = "vincenty"
+) -> np.ndarray:
+    """
+    Расстояния в метрах между парами точек (i-я точка первого набора
+    и i-я точка второго) одним векторизованным вызовом.
+    Режимы — как в segment_distances.
+    """
+    if mode not in _DISTANCE_FUNCTIONS:
+        raise ValueError(
+            f"Неизвестный режим расчета расстояния: {mode}. Доступны: {DISTANCE_MODES}"
+        )
+
+    arrays = np.broadcast_arrays(
+        *(
+            np.asarray(values, dtype=float)
+            for values in (latitudes1, longitudes1, latitudes2, longitudes2)
+        )
+    )
+    if arrays[0].size == 0:
+        return np.zeros(0)
+
+    return _DISTANCE_FUNCTIONS[mode](*(np.array(array) for array in arrays))
+
+
+def point_distances(
+    latitude: float, longitude: float, latitudes, longitudes, mode: str = "vincenty"
+) -> np.ndarray:
+    """
+    Расстояния в метрах от точки до каждой из точек latitudes/longitudes
+    одним векторизованным вызовом (режимы — как в segment_distances).
+    """
+    return pair_distances(latitude, longitude, latitudes, longitudes, mode=mode)
+
+
+def distance_mode_deviation(latitudes, longitudes) -> dict[str, dict[str, float]]:
+    """
+    Сравнивает быстрые режимы расчета с эталонным geodesic на одном треке.
+
+    Returns:
+        dict: Для каждого быстрого режима: длина трека в метрах, отклонение длины
+              трека от эталона в метрах и процентах и максимальное отклонение
+              отдельного отрезка в метрах.
+    """
+    reference = segment_distances(latitudes, longitudes, mode="geodesic")
+    reference_total = float(reference.sum())
+
+    report = {}
+    for mode in DISTANCE_MODES:
+        if mode == "geodesic":
+            continue
+        segments = segment_distances(latitudes, longitudes, mode=mode)
+        total = float(segments.sum())
+        report[mode] = {
+            "total_meters": total,
+            "total_error_meters": abs(total - reference_total),
+            "total_error_percent": (
+                abs(total - reference_total) / reference_total * 100
+                if reference_total
+                else 0.0
+            ),
+            "max_segment_error_meters": (
+                float(np.abs(segments - reference).max()) if segments.size else 0.0
+            ),
+        }
+
+    return report
+
+
+# Предельная широта проекции Web Mercator: на ней карта становится квадратной
+MERCATOR_MAX_LATITUDE = 85.05112878
+
+
+def mercator_grid(latitudes, longitudes, zoom: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Номера колонки и строки точек в сетке Web Mercator из 2**zoom x 2**zoom ячеек
+    (нумерация тайлов карт: x — на восток от -180°, y — на юг от северного края).
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: Целочисленные x и y точек.
+    """
+    size = 2**zoom
+    latitudes = np.radians(
+        np.clip(
+            np.asarray(latitudes, dtype=float),
+            -MERCATOR_MAX_LATITUDE,
+            MERCATOR_MAX_LATITUDE,
+        )
+    )
+    longitudes = np.asarray(longitudes, dtype=float)
+
+    x = (longitudes + 180.0) / 360.0 * size
+    y = (1.0 - np.arcsinh(np.tan(latitudes)) / math.pi) / 2.0 * size
+    return (
+        np.clip(np.floor(x), 0, size - 1).astype(np.int64),
+        np.clip(np.floor(y), 0, size - 1).astype(np.int64),
+    )
+
+
+def _project(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Проецирует трек на плоскость (равнопромежуточная проекция вокруг первой точки)
+    в метрах. Для треков длиной в десятки километров искажение пренебрежимо мало.
+    """
+    origin_latitude = math.radians(latitudes[0])
+    delta_longitudes = normalize_longitude(longitudes - longitudes[0])
+    x = EARTH_RADIUS_METERS * np.radians(delta_longitudes) * math.cos(origin_latitude)
+    y = EARTH_RADIUS_METERS * np.radians(latitudes - latitudes[0])
+    return np.column_stack((x, y))
+
+
+def _deviations(points: np.ndarray, start: int, end: int) -> np.ndarray:
+    """
+    Расстояния в метрах от точек между start и end до отрезка [start, end]
+    """
+    a, b = points[start], points[end]
+    inner = points[start + 1 : end]
+    segment = b - a
+    length_squared = float(segment @ segment)
+    if length_squared == 0.0:
+        return np.hypot(*(inner - a).T)
+
+    t = np.clip((inner - a) @ segment / length_squared, 0.0, 1.0)
+    return np.hypot(*(inner - (a + t[:, None] * segment)).T)
+
+
+def simplify_track(
+    latitudes,
+    longitudes,
+    tolerance_meters: float | None = None,
+    max_points: int | None = None,
+) -> np.ndarray:
+    """
+    Упрощает трек алгоритмом Дугласа — Пекера.
+
+    Отрезки уточняются в порядке убывания отклонения: на каждом шаге в трек
+    добавляется точка, дальше всех отстоящая от упрощенной линии. Уточнение
+    останавливается, когда максимальное отклонение не больше tolerance_meters
+    или в треке уже max_points точек, поэтому любой префикс результата —
+    наилучшее упрощение своего размера.
+
+    Args:
+        latitudes (array-like): Широты точек трека в градусах.
+        longitudes (array-like): Долготы точек трека в градусах.
+        tolerance_meters (float | None): Допустимое отклонение упрощенного трека.
+        max_points (int | None): Максимальное количество точек результата (не меньше 2).
+
+    Returns:
+        np.ndarray: Отсортированные индексы сохраненных точек. Первая и последняя
+                    точки трека сохраняются всегда.
+    """
+    latitudes = np.asarray(latitudes, dtype=float)
+    longitudes = np.asarray(longitudes, dtype=float)
+    size = latitudes.size
+    if max_points is not None:
+        max_points = max(2, max_points)
+    if size <= 2 or (max_points is None and tolerance_meters is None):
+        return np.arange(size)
+
+    points = _project(latitudes, longitudes)
+    tolerance = tolerance_meters or 0.0
+    limit = max_points or size
+    keep = [0, size - 1]
+
+    # Куча отрезков: (-максимальное отклонение, индекс самой дальней точки, начало, конец)
+    heap = []
+
+    def push(start: int, end: int) -> None:
+        if end - start < 2:
+            return
+        deviations = _deviations(points, start, end)
+        farthest = int(deviations.argmax())
+        heapq.heappush(
+            heap, (-float(deviations[farthest]), start + 1 + farthest, start, end)
+        )
+
+    push(0, size - 1)
+    while heap and len(keep) < limit:
+        deviation, index, start, end = heapq.heappop(heap)
+        if -deviation <= tolerance:
+            break
+        keep.append(index)
+        push(start, index)
+        push(index, end)
+
+    return np.array(sorted(keep))
@@ -0,0 +1,169 @@
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import Q
+
+from app_run.geo import mercator_grid
+from app_run.models import HeatmapTile, Run
+
+# Уровни масштаба, для которых хранятся тайлы
+MIN_ZOOM = 0
+MAX_ZOOM = 16
+
+# Сетка тайла: 2**CELL_BITS x 2**CELL_BITS ячеек
+CELL_BITS = 4
+CELLS = 2**CELL_BITS
+
+# Тип счетчиков ячеек в HeatmapTile.counts
+COUNTS_DTYPE = "<u4"
+
+# Сколько тайлов читается одним запросом: условие по всем тайлам длинного трека
+# превышает предел глубины выражения SQLite и число параметров запроса
+LOOKUP_CHUNK_SIZE = 250
+
+# Ключ тайла: (масштаб, x, y)
+TileKey = tuple[int, int, int]
+
+
+def tile_counts(latitudes, longitudes) -> dict[TileKey, np.ndarray]:
+    """
+    Счетчики ячеек по всем тайлам всех уровней масштаба, которые задевают точки.
+
+    Ячейки считаются один раз на самом подробном уровне (MAX_ZOOM + CELL_BITS),
+    для более крупных уровней номера ячеек получаются сдвигом, поэтому точка
+    попадает ровно в одну ячейку каждого уровня.
+
+    Returns:
+        dict: Ключ тайла -> массив счетчиков CELLS * CELLS (построчно).
+    """
+    if len(latitudes) == 0:
+        return {}
+    grid_x, grid_y = mercator_grid(latitudes, longitudes, MAX_ZOOM + CELL_BITS)
+
+    tiles = {}
+    for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+        shift = MAX_ZOOM - zoom
+        x, y = grid_x >> shift, grid_y >> shift
+        cells = (y & (CELLS - 1)) * CELLS + (x & (CELLS - 1))
+
+        keys, counts = np.unique(
+            np.column_stack((x >> CELL_BITS, y >> CELL_BITS, cells)),
+            axis=0,
+            return_counts=True,
+        )
+        for (tile_x, tile_y, cell), count in zip(keys, counts):
+            key = (zoom, int(tile_x), int(tile_y))
+            if key not in tiles:
+                tiles[key] = np.zeros(CELLS * CELLS, dtype=np.int64)
+            tiles[key][cell] += count
+    return tiles
+
+
+def _lookup(keys: list[TileKey]) -> Q:
+    # Тайлы одной колонки (масштаб, x) выбираются одним условием y IN (...)
+    columns = defaultdict(list)
+    for zoom, x, y in keys:
+        columns[zoom, x].append(y)
+
+    condition = Q()
+    for (zoom, x), ys in columns.items():
+        condition |= Q(zoom=zoom, x=x, y__in=ys)
+    return condition
+
+
+def _add(athlete_id: int | None, tiles: dict[TileKey, np.ndarray]) -> None:
+    """
+    Прибавляет счетчики к тайлам атлета (или к общим тайлам, если athlete_id = None)
+    """
+    scope = Q(athlete__isnull=True) if athlete_id is None else Q(athlete_id=athlete_id)
+    keys = sorted(tiles)
+
+    existing = {}
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        lookup = _lookup(keys[start : start + LOOKUP_CHUNK_SIZE])
+        for tile in HeatmapTile.objects.select_for_update().filter(scope & lookup):
+            existing[tile.zoom, tile.x, tile.y] = tile
+
+    updated, created = [], []
+    for key, counts in tiles.items():
+        tile = existing.get(key)
+        if tile is None:
+            zoom, x, y = key
+            tile = HeatmapTile(athlete_id=athlete_id, zoom=zoom, x=x, y=y)
+            created.append(tile)
+        else:
+            counts = counts + np.frombuffer(tile.counts, dtype=COUNTS_DTYPE)
+            updated.append(tile)
+        tile.counts = counts.astype(COUNTS_DTYPE).tobytes()
+        tile.total = int(counts.sum())
+
+    HeatmapTile.objects.bulk_update(updated, ["counts", "total"], batch_size=500)
+    HeatmapTile.objects.bulk_create(created, batch_size=500)
+
+
+def record(athlete_id: int, latitudes, longitudes) -> int:
+    """
+    Учитывает точки трека атлета в его тайлах и в общих тайлах всех уровней.
+
+    Returns:
+        int: Количество затронутых тайлов одного набора (атлета).
+    """
+    tiles = tile_counts(latitudes, longitudes)
+    if not tiles:
+        return 0
+
+    with transaction.atomic():
+        _add(athlete_id, tiles)
+        _add(None, tiles)
+    return len(tiles)
+
+
+def get_tile(zoom: int, x: int, y: int, athlete_ids=None) -> np.ndarray:
+    """
+    Счетчики ячеек тайла: общие или суммарные по атлетам athlete_ids
+    (список id или QuerySet, который подставляется подзапросом).
+
+    Returns:
+        np.ndarray: Матрица CELLS x CELLS (строки — с севера на юг).
+    """
+    tiles = HeatmapTile.objects.filter(zoom=zoom, x=x, y=y)
+    if athlete_ids is None:
+        tiles = tiles.filter(athlete__isnull=True)
+    else:
+        tiles = tiles.filter(athlete_id__in=athlete_ids)
+
+    counts = np.zeros(CELLS * CELLS, dtype=np.int64)
+    for data in tiles.values_list("counts", flat=True):
+        counts += np.frombuffer(data, dtype=COUNTS_DTYPE)
+    return counts.reshape(CELLS, CELLS)
+
+
+def rebuild() -> int:
+    """
+    Пересобирает тепловую карту по всем завершенным забегам.
+
+    Returns:
+        int: Количество учтенных забегов.
+    """
+    # Импорт внутри функции, чтобы избежать circular import с services
+    from app_run.services import get_run_positions
+
+    with transaction.atomic():
+        HeatmapTile.objects.all().delete()
+
+        runs = 0
+        for run in Run.objects.filter(status="finished").order_by("id").iterator():
+            positions = get_run_positions(run)
+            if not positions:
+                continue
+            record(
+                run.athlete_id,
+                [position.latitude for position in positions],
+                [position.longitude for position in positions],
+            )
+            runs += 1
+
+        # Забеги учтены пересборкой: задачи "run_heatmap" из очереди их пропустят
+        Run.objects.filter(status="finished").update(heatmap_applied=True)
+    return runs
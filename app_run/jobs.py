@@ -0,0 +1,136 @@
+import logging
+import traceback
+from datetime import timedelta
+from typing import Any, Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from app_run.models import Job
+
+logger = logging.getLogger(__name__)
+
+# Обработчики задач по их типу
+HANDLERS: dict[str, Callable[..., None]] = {}
+
+
+def job_handler(kind: str):
+    """
+    Декоратор, регистрирующий функцию как обработчик задач заданного типа.
+    Аргументы функции передаются из payload задачи.
+    """
+
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+
+    return decorator
+
+
+def enqueue(kind: str, **payload: Any) -> Job:
+    """
+    Ставит задачу в очередь.
+
+    Если вызвана внутри транзакции, задача станет видна воркерам только после
+    ее фиксации. При JOBS_EAGER = True задача выполняется сразу после фиксации
+    транзакции в текущем процессе.
+    """
+    job = Job.objects.create(
+        kind=kind, payload=payload, max_attempts=settings.JOBS_MAX_ATTEMPTS
+    )
+
+    if settings.JOBS_EAGER:
+        transaction.on_commit(lambda: claim_job(job.pk) and run_job(job.pk))
+
+    return job
+
+
+def claim_job(job_id: int) -> bool:
+    """
+    Переводит задачу в статус running, если ее еще никто не взял.
+
+    Условный UPDATE гарантирует, что одну задачу возьмет только один воркер.
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(
+        pk=job_id, status="pending", run_after__lte=now
+    ).update(status="running", updated_at=now)
+    return bool(claimed)
+
+
+def claim_jobs(limit: int) -> list[int]:
+    """
+    Берет в работу до limit готовых к выполнению задач в порядке постановки в очередь
+    """
+    candidates = Job.objects.filter(
+        status="pending", run_after__lte=timezone.now()
+    ).order_by("id")[:limit]
+
+    return [
+        job_id
+        for job_id in candidates.values_list("id", flat=True)
+        if claim_job(job_id)
+    ]
+
+
+def run_job(job_id: int) -> bool:
+    """
+    Выполняет взятую в работу задачу.
+
+    Обработчик и отметка о выполнении идут в одной транзакции, поэтому
+    при ошибке изменения обработчика откатываются и задачу можно повторить.
+    Повтор откладывается с экспоненциальной задержкой, после max_attempts
+    попыток задача переводится в статус failed.
+
+    Returns:
+        bool: True, если задача выполнена успешно.
+    """
+    job = Job.objects.get(pk=job_id)
+    attempts = job.attempts + 1
+
+    try:
+        handler = HANDLERS[job.kind]
+        with transaction.atomic():
+            handler(**job.payload)
+            Job.objects.filter(pk=job.pk).update(
+                status="done",
+                attempts=attempts,
+                last_error="",
+                updated_at=timezone.now(),
+            )
+        return True
+
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning(f"Задача {job.pk} ({job.kind}) завершилась ошибкой: {error}")
+
+        now = timezone.now()
+        if attempts >= job.max_attempts:
+            Job.objects.filter(pk=job.pk).update(
+                status="failed", attempts=attempts, last_error=error, updated_at=now
+            )
+        else:
+            delay = settings.JOBS_RETRY_DELAY_SECONDS * 2 ** (attempts - 1)
+            Job.objects.filter(pk=job.pk).update(
+                status="pending",
+                attempts=attempts,
+                last_error=error,
+                run_after=now + timedelta(seconds=delay),
+                updated_at=now,
+            )
+        return False
+
+
+def requeue_stale_jobs(timeout_seconds: int) -> int:
+    """
+    Возвращает в очередь задачи, зависшие в статусе running дольше timeout_seconds
+    (например, если воркер был остановлен во время выполнения).
+
+    Задача могла успеть закоммитить результат до остановки воркера, поэтому
+    обработчики возвращаемых задач должны быть идемпотентными.
+    """
+    now = timezone.now()
+    return Job.objects.filter(
+        status="running", updated_at__lt=now - timedelta(seconds=timeout_seconds)
+    ).update(status="pending", updated_at=now)
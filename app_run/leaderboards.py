@@ -0,0 +1,283 @@
+import math
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from app_run.models import CollectibleItem, LeaderboardBucket, LeaderboardEntry, Run
+
+# Типы периодов таблиц лидеров
+PERIODS = ("all", "month", "week")
+
+# Первый день периода "за все время"
+ALL_TIME_START = date(1970, 1, 1)
+
+
+@dataclass(frozen=True)
+class Board:
+    """
+    Таблица лидеров: как новое значение меняет результат и ширина корзины
+
+    Attributes:
+        name (str): Ключ таблицы.
+        op (str): "add" — сумма значений, "max" — максимум, "avg" — среднее.
+        bucket_width (float): Ширина корзины в единицах показателя. Ширины —
+                              двоичные дроби, чтобы номер корзины считался точно.
+        periods (tuple[str]): Периоды, за которые ведется таблица.
+    """
+
+    name: str
+    op: str
+    bucket_width: float
+    periods: tuple[str, ...] = PERIODS
+
+    def bucket(self, score: float) -> int:
+        return math.floor(score / self.bucket_width)
+
+
+BOARDS = {
+    board.name: board
+    for board in (
+        Board("distance_total", "add", 1.0),
+        Board("distance_max", "max", 0.5),
+        Board("speed_avg", "avg", 0.25),
+        # Время получения предмета не хранится, поэтому rebuild не может разложить
+        # предметы по месяцам и неделям — таблица ведется только за все время
+        Board("items_value", "add", 8.0, periods=("all",)),
+    )
+}
+
+
+def period_start(period: str, day: date) -> date:
+    """
+    Первый день периода, в который попадает day: начало месяца,
+    понедельник недели или ALL_TIME_START
+    """
+    if period == "month":
+        return day.replace(day=1)
+    if period == "week":
+        return day - timedelta(days=day.weekday())
+    return ALL_TIME_START
+
+
+def _move(board: str, period: str, start: date, old: int | None, new: int) -> None:
+    """
+    Переносит результат из корзины old в корзину new
+    """
+    if old == new:
+        return
+
+    buckets = LeaderboardBucket.objects.filter(
+        board=board, period=period, period_start=start
+    )
+    if old is not None:
+        buckets.filter(bucket=old).update(count=F("count") - 1)
+
+    LeaderboardBucket.objects.bulk_create(
+        [LeaderboardBucket(board=board, period=period, period_start=start, bucket=new)],
+        ignore_conflicts=True,
+    )
+    buckets.filter(bucket=new).update(count=F("count") + 1)
+
+
+def record(user_id: int, day: date, values: dict[str, float]) -> None:
+    """
+    Учитывает новые значения пользователя во всех периодах, в которые попадает day
+    (для каждой таблицы — только в ее периодах, см. Board.periods).
+
+    Args:
+        user_id (int): Пользователь.
+        day (date): Дата события (завершения забега, получения предмета).
+        values (dict): Таблица лидеров -> новое значение показателя.
+    """
+    with transaction.atomic():
+        for period in PERIODS:
+            period_values = {
+                name: value
+                for name, value in values.items()
+                if period in BOARDS[name].periods
+            }
+            if not period_values:
+                continue
+
+            start = period_start(period, day)
+            entries = {
+                entry.board: entry
+                for entry in LeaderboardEntry.objects.select_for_update().filter(
+                    user_id=user_id,
+                    period=period,
+                    period_start=start,
+                    board__in=period_values,
+                )
+            }
+
+            for name, value in period_values.items():
+                board = BOARDS[name]
+                entry = entries.get(name)
+                old_bucket = None
+                if entry is None:
+                    entry = LeaderboardEntry(
+                        board=name, period=period, period_start=start, user_id=user_id
+                    )
+                else:
+                    old_bucket = board.bucket(entry.score)
+
+                entry.value_sum += value
+                entry.value_count += 1
+                if board.op == "add":
+                    entry.score = entry.value_sum
+                elif board.op == "max":
+                    entry.score = max(entry.score, value)
+                else:
+                    entry.score = entry.value_sum / entry.value_count
+                entry.save()
+
+                _move(name, period, start, old_bucket, board.bucket(entry.score))
+
+
+def get_rank(entry: LeaderboardEntry) -> int:
+    """
+    Место результата в таблице (1 + количество результатов строго выше).
+
+    Результаты из корзин выше считаются суммой их счетчиков, а поштучно
+    по индексу — только результаты из той же корзины.
+    """
+    board = BOARDS[entry.board]
+    bucket = board.bucket(entry.score)
+    scope = {
+        "board": entry.board,
+        "period": entry.period,
+        "period_start": entry.period_start,
+    }
+
+    above_buckets = (
+        LeaderboardBucket.objects.filter(bucket__gt=bucket, **scope).aggregate(
+            total=Sum("count")
+        )["total"]
+        or 0
+    )
+    above_in_bucket = LeaderboardEntry.objects.filter(
+        score__gt=entry.score,
+        score__lt=(bucket + 1) * board.bucket_width,
+        **scope,
+    ).count()
+    return 1 + above_buckets + above_in_bucket
+
+
+def get_leaderboard(
+    name: str, period: str, day: date, top: int, user_id: int | None = None
+) -> dict:
+    """
+    Первые top результатов таблицы за период, в который попадает day,
+    и место пользователя user_id.
+
+    Returns:
+        dict: {"period_start": ..., "results": [{"rank", "user", "score"}, ...],
+               "me": {"rank", "user", "score"} или None}
+    """
+    start = period_start(period, day)
+    entries = LeaderboardEntry.objects.filter(
+        board=name, period=period, period_start=start
+    )
+
+    results = []
+    for position, (entry_user_id, score) in enumerate(
+        entries.order_by("-score", "user_id").values_list("user_id", "score")[:top],
+        start=1,
+    ):
+        # Равные результаты делят место
+        rank = (
+            results[-1]["rank"]
+            if results and results[-1]["score"] == score
+            else position
+        )
+        results.append({"rank": rank, "user": entry_user_id, "score": score})
+
+    me = None
+    if user_id is not None:
+        entry = entries.filter(user_id=user_id).first()
+        if entry is not None:
+            me = {"rank": get_rank(entry), "user": user_id, "score": entry.score}
+
+    return {"period_start": start, "results": results, "me": me}
+
+
+def rebuild() -> int:
+    """
+    Пересобирает все таблицы лидеров по завершенным забегам и предметам.
+
+    Значения попадают в те же периоды, что и при record (см. Board.periods).
+
+    Returns:
+        int: Количество записанных результатов.
+    """
+    # (таблица, период, начало периода, пользователь) -> [сумма, количество, максимум]
+    totals = defaultdict(lambda: [0.0, 0, 0.0])
+
+    def add(name: str, day: date, user_id: int, value: float):
+        for period in BOARDS[name].periods:
+            total = totals[(name, period, period_start(period, day), user_id)]
+            total[0] += value
+            total[1] += 1
+            total[2] = max(total[2], value)
+
+    runs = Run.objects.filter(status="finished").values_list(
+        "athlete_id", "created_at", "distance", "speed"
+    )
+    for user_id, created_at, distance, speed in runs.iterator():
+        day = timezone.localtime(created_at).date()
+        add("distance_total", day, user_id, distance)
+        add("distance_max", day, user_id, distance)
+        add("speed_avg", day, user_id, speed)
+
+    owned = CollectibleItem.athlete.through.objects.values_list(
+        "user_id", "collectibleitem__value"
+    )
+    for user_id, value in owned.iterator():
+        add("items_value", ALL_TIME_START, user_id, value)
+
+    entries = []
+    buckets = Counter()
+    for (name, period, start, user_id), (value_sum, count, maximum) in totals.items():
+        board = BOARDS[name]
+        if board.op == "add":
+            score = value_sum
+        elif board.op == "max":
+            score = maximum
+        else:
+            score = value_sum / count
+        entries.append(
+            LeaderboardEntry(
+                board=name,
+                period=period,
+                period_start=start,
+                user_id=user_id,
+                score=score,
+                value_sum=value_sum,
+                value_count=count,
+            )
+        )
+        buckets[(name, period, start, board.bucket(score))] += 1
+
+    with transaction.atomic():
+        LeaderboardEntry.objects.all().delete()
+        LeaderboardBucket.objects.all().delete()
+        LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+        LeaderboardBucket.objects.bulk_create(
+            [
+                LeaderboardBucket(
+                    board=name,
+                    period=period,
+                    period_start=start,
+                    bucket=bucket,
+                    count=count,
+                )
+                for (name, period, start, bucket), count in buckets.items()
+            ],
+            batch_size=1000,
+        )
+
+    return len(entries)
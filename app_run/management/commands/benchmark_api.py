@@ -0,0 +1,362 @@
+import json
+import logging
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import django
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from app_run.jobs import claim_jobs, run_job
+from app_run.models import CollectibleItem, Run, Subscribe
+from app_run.services import (
+    append_positions,
+    bump_catalog_version,
+    finish_run,
+    rate_coach,
+)
+
+# Центр синтетического мира и разброс стартов забегов и предметов в градусах
+CENTER_LATITUDE = 55.7558
+CENTER_LONGITUDE = 37.6176
+WORLD_SPREAD = 0.1
+
+# Формат даты и времени позиции, который принимает API
+DATE_TIME_FORMAT = "%Y-%m-%dT%H:%M:%S.%f"
+
+
+def generate_track(rng: random.Random, points: int, start_time: datetime) -> list:
+    """
+    Генерирует правдоподобный GPS-трек пробежки: случайный старт, плавно
+    меняющееся направление, скорость 2.3–4.2 м/с и интервал фиксации 1–5 секунд.
+    """
+    latitude = CENTER_LATITUDE + rng.uniform(-WORLD_SPREAD, WORLD_SPREAD)
+    longitude = CENTER_LONGITUDE + rng.uniform(-WORLD_SPREAD, WORLD_SPREAD)
+    heading = rng.uniform(0, 2 * math.pi)
+    date_time = start_time
+
+    track = []
+    for _ in range(points):
+        track.append(
+            {"latitude": latitude, "longitude": longitude, "date_time": date_time}
+        )
+
+        interval = rng.uniform(1, 5)
+        step = rng.uniform(2.3, 4.2) * interval
+        heading += rng.gauss(0, 0.25)
+
+        latitude += step * math.cos(heading) / 111_320
+        longitude += (
+            step * math.sin(heading) / (111_320 * math.cos(math.radians(latitude)))
+        )
+        date_time += timedelta(seconds=interval)
+
+    return track
+
+
+def percentile(sorted_values: list[float], percent: float) -> float:
+    """
+    Перцентиль методом ближайшего ранга по отсортированному списку
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def drain_jobs() -> None:
+    """
+    Выполняет все готовые задачи очереди в текущем процессе
+    """
+    while job_ids := claim_jobs(limit=100):
+        for job_id in job_ids:
+            run_job(job_id)
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный бенчмарк основных сценариев API.
+
+    Создает временную тестовую базу данных, заполняет ее синтетическим миром
+    (атлеты, тренеры, подписки, оценки, предметы, забеги с GPS-треками) и через
+    тестовый клиент Django измеряет пропускную способность и задержки p50/p95/p99.
+    Результат выводится в JSON, чтобы прогоны можно было сравнивать между собой.
+
+    Примеры:
+        python manage.py benchmark_api --output bench.json
+        python manage.py benchmark_api --athletes 200 --points-per-run 1000 --iterations 500
+    """
+
+    help = "Заполняет временную БД синтетическими данными и измеряет задержки API"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--athletes", type=int, default=50)
+        parser.add_argument("--coaches", type=int, default=5)
+        parser.add_argument("--runs-per-athlete", type=int, default=5)
+        parser.add_argument("--points-per-run", type=int, default=300)
+        parser.add_argument("--items", type=int, default=1000)
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=200,
+            help="Количество измеряемых запросов в каждом сценарии",
+        )
+        parser.add_argument(
+            "--warmup",
+            type=int,
+            default=10,
+            help="Количество неизмеряемых запросов перед каждым сценарием",
+        )
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--output", help="Файл для результата в формате JSON")
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Не удалять тестовую базу данных после прогона",
+        )
+
+    def handle(self, *args, **options):
+        # Логи SQL-запросов искажают замеры и засоряют вывод
+        logging.getLogger("django.db.backends").setLevel(logging.WARNING)
+
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options["keepdb"]
+        )
+
+        try:
+            rng = random.Random(options["seed"])
+
+            started = time.perf_counter()
+            world = self.seed_world(rng, options)
+            seed_seconds = time.perf_counter() - started
+
+            results = self.run_scenarios(rng, world, options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options["keepdb"]
+            )
+            teardown_test_environment()
+
+        report = {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "config": {
+                key: options[key]
+                for key in (
+                    "athletes",
+                    "coaches",
+                    "runs_per_athlete",
+                    "points_per_run",
+                    "items",
+                    "iterations",
+                    "warmup",
+                    "seed",
+                )
+            },
+            "seed_seconds": round(seed_seconds, 3),
+            "results": results,
+        }
+
+        output = json.dumps(report, ensure_ascii=False, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(output)
+            self.stdout.write(
+                self.style.SUCCESS(f"Результат записан в {options['output']}")
+            )
+        else:
+            self.stdout.write(output)
+
+    def seed_world(self, rng: random.Random, options) -> dict:
+        """
+        Создает синтетический мир через те же сервисы, что использует API
+        """
+        coaches = [
+            User.objects.create(
+                username=f"coach_{i}",
+                first_name="Тренер",
+                last_name=str(i),
+                is_staff=True,
+            )
+            for i in range(options["coaches"])
+        ]
+        athletes = [
+            User.objects.create(
+                username=f"athlete_{i}", first_name="Атлет", last_name=str(i)
+            )
+            for i in range(options["athletes"])
+        ]
+
+        for athlete in athletes:
+            coach = rng.choice(coaches)
+            Subscribe.objects.create(athlete=athlete, coach=coach)
+            if rng.random() < 0.5:
+                rate_coach(coach, athlete, rng.randint(1, 5))
+
+        CollectibleItem.objects.bulk_create(
+            CollectibleItem(
+                name=f"Предмет {i}",
+                uid=f"item-{i}",
+                latitude=CENTER_LATITUDE + rng.uniform(-WORLD_SPREAD, WORLD_SPREAD),
+                longitude=CENTER_LONGITUDE + rng.uniform(-WORLD_SPREAD, WORLD_SPREAD),
+                picture=f"https://example.com/items/{i}.png",
+                value=rng.randint(1, 100),
+            )
+            for i in range(options["items"])
+        )
+        # bulk_create не вызывает сигналы, инвалидируем индекс каталога явно
+        bump_catalog_version()
+
+        start_time = datetime(2025, 1, 1, 7, 0, tzinfo=timezone.utc)
+        for athlete in athletes:
+            for day in range(options["runs_per_athlete"]):
+                run = Run.objects.create(
+                    athlete=athlete, comment="Синтетический забег", status="in_progress"
+                )
+                track = generate_track(
+                    rng, options["points_per_run"], start_time + timedelta(days=day)
+                )
+                if track:
+                    append_positions(run, track)
+                finish_run(run)
+
+        # Обработка завершенных забегов (челленджи, статистика) до начала замеров
+        drain_jobs()
+
+        return {"athletes": athletes, "coaches": coaches, "start_time": start_time}
+
+    def measure(self, name: str, requests, warmup: int) -> dict:
+        """
+        Выполняет запросы сценария и считает пропускную способность и перцентили.
+        Каждый элемент requests — функция без аргументов, возвращающая ответ.
+        """
+        requests = list(requests)
+        for request in requests[:warmup]:
+            request()
+
+        latencies = []
+        errors = 0
+        started = time.perf_counter()
+        for request in requests[warmup:]:
+            request_started = time.perf_counter()
+            response = request()
+            latencies.append((time.perf_counter() - request_started) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+        total = time.perf_counter() - started
+
+        latencies.sort()
+        result = {
+            "requests": len(latencies),
+            "errors": errors,
+            "total_seconds": round(total, 4),
+            "throughput_rps": round(len(latencies) / total, 2) if total else 0.0,
+            "mean_ms": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
+        self.stderr.write(
+            f"{name}: {result['throughput_rps']} rps, p50 {result['p50_ms']} мс, "
+            f"p95 {result['p95_ms']} мс, p99 {result['p99_ms']} мс"
+        )
+        return result
+
+    def run_scenarios(self, rng: random.Random, world: dict, options) -> dict:
+        client = Client()
+        iterations = options["iterations"]
+        warmup = options["warmup"]
+        count = iterations + warmup
+        athletes = world["athletes"]
+        start_time = world["start_time"] + timedelta(days=options["runs_per_athlete"])
+
+        results = {}
+
+        # Прием одиночных позиций в незавершенные забеги
+        live_runs = [
+            Run.objects.create(
+                athlete=athlete, comment="Живой забег", status="in_progress"
+            )
+            for athlete in athletes[: max(1, min(len(athletes), 10))]
+        ]
+        tracks = [generate_track(rng, count, start_time) for _ in live_runs]
+
+        def post_position(run, point):
+            data = {
+                "run": run.id,
+                "latitude": point["latitude"],
+                "longitude": point["longitude"],
+                "date_time": point["date_time"].strftime(DATE_TIME_FORMAT),
+            }
+            return lambda: client.post(
+                "/api/positions/", data, content_type="application/json"
+            )
+
+        results["positions_create"] = self.measure(
+            "positions_create",
+            (
+                post_position(
+                    live_runs[i % len(live_runs)], tracks[i % len(live_runs)][i]
+                )
+                for i in range(count)
+            ),
+            warmup,
+        )
+
+        # Завершение забегов с полноценным треком
+        stop_runs = []
+        for i in range(count):
+            run = Run.objects.create(
+                athlete=athletes[i % len(athletes)],
+                comment="Забег для остановки",
+                status="in_progress",
+            )
+            append_positions(
+                run, generate_track(rng, max(2, options["points_per_run"]), start_time)
+            )
+            stop_runs.append(run)
+
+        results["run_stop"] = self.measure(
+            "run_stop",
+            (
+                (lambda run=run: client.post(f"/api/runs/{run.id}/stop/"))
+                for run in stop_runs
+            ),
+            warmup,
+        )
+        drain_jobs()
+
+        results["users_list"] = self.measure(
+            "users_list",
+            (lambda: client.get("/api/users/") for _ in range(count)),
+            warmup,
+        )
+
+        coaches = world["coaches"]
+        results["coach_analytics"] = self.measure(
+            "coach_analytics",
+            (
+                (
+                    lambda coach=coaches[i % len(coaches)]: client.get(
+                        f"/api/analytics_for_coach/{coach.id}/"
+                    )
+                )
+                for i in range(count)
+            ),
+            warmup,
+        )
+
+        results["challenges_summary"] = self.measure(
+            "challenges_summary",
+            (lambda: client.get("/api/challenges_summary/") for _ in range(count)),
+            warmup,
+        )
+
+        return results
@@ -0,0 +1,55 @@
+from django.core.management.base import BaseCommand
+
+from app_run.models import Position, Run
+from app_run.services import compact_run_track
+
+
+class Command(BaseCommand):
+    """
+    Упаковывает позиции завершенных забегов в RunTrack (см. app_run.tracks).
+
+    Новые забеги упаковываются очередью задач после завершения, команда нужна
+    для забегов, завершенных до включения TRACK_COMPACTION_ENABLED.
+
+    Примеры:
+        python manage.py compact_run_tracks
+        python manage.py compact_run_tracks --run 12 --run 15
+    """
+
+    help = "Упаковывает треки завершенных забегов и удаляет их строки Position"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--run",
+            type=int,
+            action="append",
+            dest="runs",
+            help="Id забега, можно передать несколько раз. По умолчанию — все завершенные",
+        )
+
+    def handle(self, *args, **options):
+        run_ids = (
+            Position.objects.filter(run__status="finished")
+            .values_list("run_id", flat=True)
+            .distinct()
+            .order_by("run_id")
+        )
+        if options["runs"]:
+            run_ids = run_ids.filter(run_id__in=options["runs"])
+
+        compacted = points = size = 0
+        for run_id in list(run_ids):
+            track = compact_run_track(run_id)
+            if track is None:
+                self.stdout.write(f"Забег {run_id} пропущен")
+                continue
+            compacted += 1
+            points += track.points_count
+            size += len(track.data)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Упаковано забегов: {compacted}, позиций: {points}, "
+                f"размер треков: {size} байт"
+            )
+        )
@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Exists, OuterRef, Q
+
+from app_run.geo import DISTANCE_MODES, distance_mode_deviation
+from app_run.models import Position, Run
+from app_run.services import get_run_positions
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает быстрые режимы расчета расстояния с эталонным geodesic на треках забегов.
+
+    Пример:
+        python manage.py compare_distance_modes --runs 50
+    """
+
+    help = "Отклонение режимов haversine и vincenty от geodesic на треках забегов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--runs",
+            type=int,
+            default=20,
+            help="Количество последних забегов для сравнения",
+        )
+
+    def handle(self, *args, **options):
+        # Забеги с треком в любом виде: строками Position или упакованным RunTrack
+        # (у забегов, созданных до появления RunTail, хвоста может не быть)
+        runs = Run.objects.filter(
+            Exists(Position.objects.filter(run=OuterRef("pk"))) | Q(track__isnull=False)
+        ).order_by("-id")[: options["runs"]]
+
+        modes = [mode for mode in DISTANCE_MODES if mode != "geodesic"]
+        worst = {
+            mode: {"total_error_percent": 0.0, "max_segment_error_meters": 0.0}
+            for mode in modes
+        }
+        checked = 0
+
+        for run in runs:
+            coordinates = [
+                (position.latitude, position.longitude)
+                for position in get_run_positions(run)
+            ]
+            if len(coordinates) < 2:
+                continue
+            latitudes, longitudes = zip(*coordinates)
+            report = distance_mode_deviation(latitudes, longitudes)
+            checked += 1
+
+            line = ", ".join(
+                f"{mode}: {report[mode]['total_error_meters']:.3f} м "
+                f"({report[mode]['total_error_percent']:.4f}%)"
+                for mode in modes
+            )
+            self.stdout.write(f"Забег {run.id} ({len(coordinates)} точек) — {line}")
+
+            for mode in modes:
+                for key in worst[mode]:
+                    worst[mode][key] = max(worst[mode][key], report[mode][key])
+
+        if not checked:
+            self.stdout.write("Нет забегов с двумя и более позициями")
+            return
+
+        self.stdout.write(self.style.SUCCESS(f"Проверено забегов: {checked}"))
+        for mode in modes:
+            self.stdout.write(
+                f"{mode}: максимальное отклонение длины трека "
+                f"{worst[mode]['total_error_percent']:.4f}%, отрезка "
+                f"{worst[mode]['max_segment_error_meters']:.3f} м"
+            )
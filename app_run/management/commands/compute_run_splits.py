@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+
+from app_run.models import Run
+from app_run.services import store_run_splits
+
+
+class Command(BaseCommand):
+    """
+    Рассчитывает сплиты завершенных забегов (см. services.store_run_splits).
+
+    Новые забеги получают сплиты при завершении, команда нужна для забегов,
+    завершенных раньше.
+
+    Примеры:
+        python manage.py compute_run_splits
+        python manage.py compute_run_splits --run 12 --run 15
+        python manage.py compute_run_splits --all
+    """
+
+    help = "Рассчитывает сплиты по километрам и милям для завершенных забегов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--run",
+            type=int,
+            action="append",
+            dest="runs",
+            help="Id забега, можно передать несколько раз. По умолчанию — завершенные без сплитов",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Пересчитать сплиты всех завершенных забегов",
+        )
+
+    def handle(self, *args, **options):
+        runs = Run.objects.filter(status="finished").order_by("id")
+        if options["runs"]:
+            runs = runs.filter(id__in=options["runs"])
+        elif not options["all"]:
+            runs = runs.filter(splits__isnull=True)
+
+        computed = skipped = 0
+        for run in runs.iterator():
+            if store_run_splits(run) is None:
+                skipped += 1
+            else:
+                computed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Рассчитаны сплиты забегов: {computed}, пропущено: {skipped}"
+            )
+        )
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from app_run.heatmap import rebuild
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает тепловую карту активности (HeatmapTile) по завершенным забегам.
+
+    Новые забеги учитываются при обработке завершения, команда нужна для
+    первоначального заполнения и после изменения уровней масштаба или сетки тайла.
+
+    Пример:
+        python manage.py rebuild_heatmap
+    """
+
+    help = "Пересобирает тайлы тепловой карты по завершенным забегам"
+
+    def handle(self, *args, **options):
+        runs = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Учтено забегов: {runs}"))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from app_run.leaderboards import rebuild
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает таблицы лидеров (LeaderboardEntry, LeaderboardBucket) по завершенным
+    забегам и предметам. Обычно таблицы обновляются инкрементально, команда нужна
+    для первоначального заполнения и восстановления после ручных правок данных.
+
+    Пример:
+        python manage.py rebuild_leaderboards
+    """
+
+    help = "Пересобирает таблицы лидеров по забегам и предметам"
+
+    def handle(self, *args, **options):
+        count = rebuild()
+        self.stdout.write(self.style.SUCCESS(f"Записано результатов: {count}"))
@@ -0,0 +1,104 @@
+import math
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from app_run.models import Run, RunTail
+from app_run.services import rebuild_run_tail
+
+# Поля хвостового состояния, которые сверяются с пересчетом по позициям
+TAIL_FIELDS = (
+    "latitude",
+    "longitude",
+    "date_time",
+    "distance",
+    "first_date_time",
+    "speed_sum",
+    "points_count",
+)
+
+
+def _differs(current, expected) -> bool:
+    # Упакованные треки (RunTrack) хранят координаты с точностью 1e-7 градуса,
+    # поэтому пересчет по ним может отличаться от исходного на миллиметры
+    if isinstance(current, float) and isinstance(expected, float):
+        return not math.isclose(current, expected, rel_tol=1e-6, abs_tol=1e-6)
+    return current != expected
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает накопленные агрегаты забегов (RunTail) по сохраненным позициям
+    и сверяет их с текущими значениями. Для завершенных забегов также сверяются
+    поля distance, run_time_seconds и speed модели Run.
+
+    Примеры:
+        python manage.py rebuild_run_aggregates --check
+        python manage.py rebuild_run_aggregates --run 12 --run 15
+    """
+
+    help = "Пересобирает агрегаты забегов по позициям и сверяет их с сохраненными"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--run",
+            type=int,
+            action="append",
+            dest="runs",
+            help="Id забега, можно передать несколько раз. По умолчанию — все забеги",
+        )
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Только сверить агрегаты и вывести расхождения, ничего не записывая",
+        )
+
+    def handle(self, *args, **options):
+        runs = Run.objects.exclude(status="init").order_by("id")
+        if options["runs"]:
+            runs = runs.filter(id__in=options["runs"])
+
+        tails = RunTail.objects.in_bulk(runs.values_list("id", flat=True))
+        checked = mismatched = 0
+
+        for run in runs.iterator():
+            checked += 1
+            expected = rebuild_run_tail(run)
+            current = tails.get(run.id) or RunTail(run=run)
+
+            differences = [
+                f"{field}: {getattr(current, field)} -> {getattr(expected, field)}"
+                for field in TAIL_FIELDS
+                if _differs(getattr(current, field), getattr(expected, field))
+            ]
+
+            run_values = {}
+            if run.status == "finished":
+                run_values = {
+                    "distance": expected.distance,
+                    "run_time_seconds": expected.run_time_seconds,
+                    "speed": expected.average_speed,
+                }
+                differences += [
+                    f"run.{field}: {getattr(run, field)} -> {value}"
+                    for field, value in run_values.items()
+                    if _differs(getattr(run, field), value)
+                ]
+
+            if not differences:
+                continue
+
+            mismatched += 1
+            self.stdout.write(f"Забег {run.id}: " + "; ".join(differences))
+
+            if not options["check"]:
+                with transaction.atomic():
+                    expected.save()
+                    if run_values:
+                        Run.objects.filter(pk=run.pk).update(**run_values)
+
+        summary = f"Проверено забегов: {checked}, с расхождениями: {mismatched}"
+        if mismatched and options["check"]:
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
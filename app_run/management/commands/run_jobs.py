@@ -0,0 +1,77 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from app_run.jobs import claim_jobs, requeue_stale_jobs, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def _run_job_in_thread(job_id: int) -> bool:
+    try:
+        return run_job(job_id)
+    finally:
+        # У каждого потока свое соединение с БД, закрываем его после задачи
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """
+    Воркер локальной очереди задач: забирает готовые задачи из таблицы Job
+    и выполняет их в пуле потоков.
+
+    Примеры:
+        python manage.py run_jobs
+        python manage.py run_jobs --concurrency 8
+        python manage.py run_jobs --once
+    """
+
+    help = "Выполняет задачи из очереди фоновой обработки"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.JOBS_CONCURRENCY,
+            help="Количество задач, выполняемых параллельно",
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Пауза в секундах между опросами пустой очереди",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Выполнить все готовые задачи и завершиться",
+        )
+
+    def handle(self, *args, **options):
+        concurrency = max(1, options["concurrency"])
+        done = failed = 0
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            while True:
+                requeue_stale_jobs(settings.JOBS_STALE_TIMEOUT_SECONDS)
+                job_ids = claim_jobs(limit=concurrency)
+
+                if not job_ids:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for success in executor.map(_run_job_in_thread, job_ids):
+                    if success:
+                        done += 1
+                    else:
+                        failed += 1
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Выполнено задач: {done}, с ошибкой: {failed}")
+        )
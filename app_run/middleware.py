@@ -0,0 +1,164 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+# Регулярные выражения для приведения SQL-запроса к "отпечатку" без конкретных значений
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:%s|\?)\s*,?)+\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+# Скользящая статистика по маршрутам: маршрут -> последние замеры запросов
+_route_samples: dict[str, deque] = {}
+_route_duplicates: dict[str, Counter] = defaultdict(Counter)
+_lock = threading.Lock()
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Приводит SQL-запрос к отпечатку: литералы заменяются на ?, списки IN
+    сворачиваются, поэтому запросы, отличающиеся только значениями, совпадают.
+    """
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _IN_LIST.sub("IN (...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def route_key(method: str, route: str) -> str:
+    """
+    Ключ маршрута для статистики и бюджетов: "GET api/users/"
+    """
+    return f"{method} {route.lstrip('^').rstrip('$')}"
+
+
+def request_route_key(request) -> str:
+    # Нераспознанные адреса собираются в один ключ, чтобы статистика не росла без границ
+    match = getattr(request, "resolver_match", None)
+    return route_key(request.method, match.route if match else "<unresolved>")
+
+
+class QueryRecorder:
+    """
+    Обертка выполнения запросов (connection.execute_wrapper), считающая
+    количество запросов, их суммарное время и повторы отпечатков.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.time_ms = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time_ms += (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self) -> dict[str, int]:
+        """
+        Отпечатки, повторенные не меньше QUERY_DUPLICATE_THRESHOLD раз —
+        кандидаты в N+1
+        """
+        threshold = settings.QUERY_DUPLICATE_THRESHOLD
+        return {sql: n for sql, n in self.fingerprints.items() if n >= threshold}
+
+
+def record_route(route: str, recorder: QueryRecorder) -> None:
+    with _lock:
+        samples = _route_samples.get(route)
+        if samples is None:
+            samples = _route_samples[route] = deque(maxlen=settings.QUERY_STATS_WINDOW)
+        samples.append((recorder.count, recorder.time_ms))
+        _route_duplicates[route].update(recorder.duplicates)
+
+
+def get_query_stats() -> dict[str, dict]:
+    """
+    Сводка по маршрутам за последние QUERY_STATS_WINDOW запросов: среднее
+    и максимальное количество запросов, среднее время в БД, бюджет и самые
+    частые повторяющиеся запросы.
+    """
+    with _lock:
+        routes = {
+            route: (list(samples), _route_duplicates[route].most_common(5))
+            for route, samples in _route_samples.items()
+        }
+
+    summary = {}
+    for route, (samples, duplicates) in sorted(routes.items()):
+        counts = [count for count, _ in samples]
+        times = [time_ms for _, time_ms in samples]
+        summary[route] = {
+            "requests": len(samples),
+            "queries_avg": round(sum(counts) / len(counts), 2),
+            "queries_max": max(counts),
+            "db_time_avg_ms": round(sum(times) / len(times), 3),
+            "budget": settings.QUERY_BUDGETS.get(route),
+            "duplicates": [{"sql": sql, "count": n} for sql, n in duplicates],
+        }
+    return summary
+
+
+def reset_query_stats() -> None:
+    with _lock:
+        _route_samples.clear()
+        _route_duplicates.clear()
+
+
+class QueryBudgetMiddleware:
+    """
+    Считает SQL-запросы каждого запроса к API и ведет скользящую статистику
+    по маршрутам (см. get_query_stats).
+
+    В режиме DEBUG добавляет в ответ заголовки:
+        X-DB-Query-Count — количество запросов к БД;
+        X-DB-Time-Ms — суммарное время запросов к БД;
+        X-DB-Duplicate-Queries — количество повторяющихся отпечатков запросов (N+1);
+        X-DB-Query-Budget — бюджет маршрута из QUERY_BUDGETS, если он задан.
+    Превышение бюджета маршрута пишется в лог.
+
+    Учет стоит разбора каждого SQL-запроса, поэтому middleware работает только
+    в режиме DEBUG или при QUERY_STATS_ENABLED = True, иначе отключается при запуске.
+    """
+
+    def __init__(self, get_response):
+        if not (settings.DEBUG or settings.QUERY_STATS_ENABLED):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        route = request_route_key(request)
+        record_route(route, recorder)
+
+        budget = settings.QUERY_BUDGETS.get(route)
+        if budget is not None and recorder.count > budget:
+            logger.warning(
+                f"Превышен бюджет запросов {route}: {recorder.count} > {budget}"
+            )
+
+        if settings.DEBUG:
+            response["X-DB-Query-Count"] = str(recorder.count)
+            response["X-DB-Time-Ms"] = f"{recorder.time_ms:.3f}"
+            response["X-DB-Duplicate-Queries"] = str(len(recorder.duplicates))
+            if budget is not None:
+                response["X-DB-Query-Budget"] = str(budget)
+
+        return response
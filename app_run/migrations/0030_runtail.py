@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-18 02:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_run_tails(apps, schema_editor):
+    """
+    Заполняет хвостовое состояние для незавершенных забегов по последней позиции
+    """
+    Run = apps.get_model("app_run", "Run")
+    Position = apps.get_model("app_run", "Position")
+    RunTail = apps.get_model("app_run", "RunTail")
+
+    tails = []
+    for run in Run.objects.filter(status="in_progress"):
+        last = Position.objects.filter(run=run).order_by("date_time").last()
+        if last is None:
+            continue
+        tails.append(
+            RunTail(
+                run=run,
+                latitude=last.latitude,
+                longitude=last.longitude,
+                date_time=last.date_time,
+                distance=last.distance,
+            )
+        )
+    RunTail.objects.bulk_create(tails)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0029_coachrating"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunTail",
+            fields=[
+                (
+                    "run",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="tail",
+                        serialize=False,
+                        to="app_run.run",
+                    ),
+                ),
+                ("latitude", models.FloatField(blank=True, null=True)),
+                ("longitude", models.FloatField(blank=True, null=True)),
+                ("date_time", models.DateTimeField(blank=True, null=True)),
+                ("distance", models.FloatField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_run_tails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 02:40
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Sum
+
+
+def fill_run_tail_aggregates(apps, schema_editor):
+    """
+    Заполняет агрегаты для уже существующих хвостовых состояний забегов
+    """
+    Position = apps.get_model("app_run", "Position")
+    RunTail = apps.get_model("app_run", "RunTail")
+
+    for tail in RunTail.objects.all():
+        aggregates = Position.objects.filter(run_id=tail.run_id).aggregate(
+            first_date_time=Min("date_time"),
+            speed_sum=Sum("speed"),
+            points_count=Count("id"),
+        )
+        tail.first_date_time = aggregates["first_date_time"]
+        tail.speed_sum = aggregates["speed_sum"] or 0
+        tail.points_count = aggregates["points_count"]
+        tail.save()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0030_runtail"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="runtail",
+            name="first_date_time",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="runtail",
+            name="points_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="runtail",
+            name="speed_sum",
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(fill_run_tail_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 02:42
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def fill_user_stats(apps, schema_editor):
+    """
+    Заполняет счетчики пользователей по уже завершенным забегам
+    """
+    Run = apps.get_model("app_run", "Run")
+    UserStats = apps.get_model("app_run", "UserStats")
+
+    totals = (
+        Run.objects.filter(status="finished")
+        .values("athlete_id")
+        .annotate(runs_finished=Count("id"), distance_total=Sum("distance"))
+    )
+    UserStats.objects.bulk_create(
+        UserStats(
+            user_id=total["athlete_id"],
+            runs_finished=total["runs_finished"],
+            distance_total=total["distance_total"] or 0,
+        )
+        for total in totals
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0033_userstats"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_user_stats, migrations.RunPython.noop),
+    ]
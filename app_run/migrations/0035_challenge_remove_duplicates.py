@@ -0,0 +1,36 @@
+# Generated by Django 5.2 on 2026-10-18 02:42
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def remove_duplicate_challenges(apps, schema_editor):
+    """
+    Удаляет повторные челленджи атлета перед добавлением ограничения уникальности
+    """
+    Challenge = apps.get_model("app_run", "Challenge")
+
+    duplicates = (
+        Challenge.objects.values("athlete_id", "full_name")
+        .annotate(first_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        Challenge.objects.filter(
+            athlete_id=duplicate["athlete_id"], full_name=duplicate["full_name"]
+        ).exclude(id=duplicate["first_id"]).delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Данные отдельно от схемы: удаление повторных челленджей перед ограничением
+    уникальности в 0036_challenge_unique
+    """
+
+    dependencies = [
+        ("app_run", "0034_userstats_fill"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_challenges, migrations.RunPython.noop),
+    ]
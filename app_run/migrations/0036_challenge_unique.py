@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 02:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0035_challenge_remove_duplicates"),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="challenge",
+            constraint=models.UniqueConstraint(
+                fields=("athlete", "full_name"), name="unique_athlete_challenge"
+            ),
+        ),
+    ]
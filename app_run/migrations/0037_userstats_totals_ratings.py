@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-18 02:43
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Sum
+
+
+def fill_user_stats_totals(apps, schema_editor):
+    """
+    Заполняет максимальную дистанцию, сумму скоростей и рейтинги по существующим данным
+    """
+    Run = apps.get_model("app_run", "Run")
+    CoachRating = apps.get_model("app_run", "CoachRating")
+    UserStats = apps.get_model("app_run", "UserStats")
+
+    run_totals = (
+        Run.objects.filter(status="finished")
+        .values("athlete_id")
+        .annotate(distance_max=Max("distance"), speed_sum=Sum("speed"))
+    )
+    for total in run_totals:
+        UserStats.objects.filter(user_id=total["athlete_id"]).update(
+            distance_max=total["distance_max"] or 0,
+            speed_sum=total["speed_sum"] or 0,
+        )
+
+    rating_totals = CoachRating.objects.values("coach_id").annotate(
+        rating_sum=Sum("rating"), rating_count=Count("id")
+    )
+    for total in rating_totals:
+        UserStats.objects.update_or_create(
+            user_id=total["coach_id"],
+            defaults={
+                "rating_sum": total["rating_sum"],
+                "rating_count": total["rating_count"],
+            },
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0036_challenge_unique"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userstats",
+            name="distance_max",
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_sum",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="speed_sum",
+            field=models.FloatField(default=0),
+        ),
+        migrations.RunPython(fill_user_stats_totals, migrations.RunPython.noop),
+    ]
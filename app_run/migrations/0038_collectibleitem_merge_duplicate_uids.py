@@ -0,0 +1,49 @@
+# Generated by Django 5.2 on 2026-10-18 02:46
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_uids(apps, schema_editor):
+    """
+    Объединяет предметы с одинаковым uid в самый ранний перед добавлением
+    уникальности: владельцы дубликатов переносятся на оставшийся предмет
+    """
+    CollectibleItem = apps.get_model("app_run", "CollectibleItem")
+    Through = CollectibleItem.athlete.through
+
+    duplicates = (
+        CollectibleItem.objects.values("uid")
+        .annotate(first_id=Min("id"), total=Count("id"))
+        .filter(total__gt=1)
+    )
+    for duplicate in duplicates:
+        others = CollectibleItem.objects.filter(uid=duplicate["uid"]).exclude(
+            id=duplicate["first_id"]
+        )
+        owners = Through.objects.filter(collectibleitem__in=others).values_list(
+            "user_id", flat=True
+        )
+        Through.objects.bulk_create(
+            [
+                Through(collectibleitem_id=duplicate["first_id"], user_id=user_id)
+                for user_id in set(owners)
+            ],
+            ignore_conflicts=True,
+        )
+        others.delete()
+
+
+class Migration(migrations.Migration):
+    """
+    Данные отдельно от схемы: объединение дубликатов uid перед ограничением
+    уникальности в 0039_collectibleitem_unique_uid
+    """
+
+    dependencies = [
+        ("app_run", "0037_userstats_totals_ratings"),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_uids, migrations.RunPython.noop),
+    ]
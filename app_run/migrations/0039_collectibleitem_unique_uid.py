@@ -0,0 +1,18 @@
+# Generated by Django 5.2 on 2026-10-18 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0038_collectibleitem_merge_duplicate_uids"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="collectibleitem",
+            name="uid",
+            field=models.CharField(max_length=100, unique=True),
+        ),
+    ]
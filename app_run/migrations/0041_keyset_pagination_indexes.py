@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 02:54
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0040_runtrack"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="position",
+            index=models.Index(
+                fields=["run", "date_time", "id"], name="app_run_pos_run_id_a1bde1_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="run",
+            index=models.Index(
+                fields=["created_at", "id"], name="app_run_run_created_dedccc_idx"
+            ),
+        ),
+    ]
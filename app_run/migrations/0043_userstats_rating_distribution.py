@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 03:00
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_rating_distribution(apps, schema_editor):
+    """
+    Заполняет распределение и среднюю оценку тренеров по существующим оценкам
+    """
+    CoachRating = apps.get_model("app_run", "CoachRating")
+    UserStats = apps.get_model("app_run", "UserStats")
+
+    counts = CoachRating.objects.values("coach_id", "rating").annotate(
+        count=Count("id")
+    )
+    for row in counts:
+        UserStats.objects.filter(user_id=row["coach_id"]).update(
+            **{f"rating_{row['rating']}": row["count"]}
+        )
+
+    for stats in UserStats.objects.filter(rating_count__gt=0):
+        stats.rating_avg = stats.rating_sum / stats.rating_count
+        stats.save(update_fields=["rating_avg"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0042_leaderboards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_1",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_2",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_3",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_4",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_5",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="userstats",
+            name="rating_avg",
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.RunPython(fill_rating_distribution, migrations.RunPython.noop),
+    ]
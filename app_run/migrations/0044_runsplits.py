@@ -0,0 +1,32 @@
+# Generated by Django 5.2 on 2026-10-18 03:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0043_userstats_rating_distribution"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RunSplits",
+            fields=[
+                (
+                    "run",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="splits",
+                        serialize=False,
+                        to="app_run.run",
+                    ),
+                ),
+                ("km", models.JSONField(default=list)),
+                ("mile", models.JSONField(default=list)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2 on 2026-10-18 03:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0044_runsplits"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HeatmapTile",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("zoom", models.PositiveSmallIntegerField()),
+                ("x", models.IntegerField()),
+                ("y", models.IntegerField()),
+                ("counts", models.BinaryField()),
+                ("total", models.IntegerField(default=0)),
+                (
+                    "athlete",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="heatmap_tiles",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(("athlete__isnull", False)),
+                        fields=("zoom", "x", "y", "athlete"),
+                        name="unique_heatmap_tile_athlete",
+                    ),
+                    models.UniqueConstraint(
+                        condition=models.Q(("athlete__isnull", True)),
+                        fields=("zoom", "x", "y"),
+                        name="unique_heatmap_tile_all",
+                    ),
+                ],
+            },
+        ),
+    ]
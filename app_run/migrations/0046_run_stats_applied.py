@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 04:10
+
+from django.db import migrations, models
+
+
+def mark_applied_runs(apps, schema_editor):
+    """
+    Отмечает завершенные забеги, уже учтенные в статистике: все, кроме тех,
+    по которым задача "run_finished" еще ждет выполнения
+    """
+    Run = apps.get_model("app_run", "Run")
+    Job = apps.get_model("app_run", "Job")
+
+    pending = {
+        payload.get("run_id")
+        for payload in Job.objects.filter(
+            kind="run_finished", status__in=("pending", "running")
+        ).values_list("payload", flat=True)
+    }
+    Run.objects.filter(status="finished").exclude(id__in=pending).update(
+        stats_applied=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0045_heatmaptile"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="run",
+            name="stats_applied",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_applied_runs, migrations.RunPython.noop),
+    ]
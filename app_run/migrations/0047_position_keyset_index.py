@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0046_run_stats_applied"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="position",
+            index=models.Index(
+                fields=["date_time", "id"], name="app_run_pos_date_ti_c55f6e_idx"
+            ),
+        ),
+    ]
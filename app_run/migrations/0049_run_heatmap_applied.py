@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 04:20
+
+from django.db import migrations, models
+
+
+def mark_applied_runs(apps, schema_editor):
+    """
+    Забеги, обработанные задачей "run_finished", уже учтены в тепловой карте:
+    до выделения задачи "run_heatmap" трек учитывался в той же транзакции
+    """
+    Run = apps.get_model("app_run", "Run")
+    Run.objects.filter(stats_applied=True).update(heatmap_applied=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app_run", "0048_cacheversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="run",
+            name="heatmap_applied",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(mark_applied_runs, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
+from django.utils import timezone
 
 
 # Create your models here.
@@ -19,11 +20,68 @@ class Run(models.Model):
     distance = models.FloatField(default=0, blank=True)
     speed = models.FloatField(default=0, blank=True)
     run_time_seconds = models.IntegerField(default=0, blank=True)
+    # Забег уже учтен в статистике атлета задачей "run_finished": защищает от
+    # повторного учета, если задача после коммита была возвращена в очередь
+    stats_applied = models.BooleanField(default=False)
+    # Трек забега уже учтен в тепловой карте задачей "run_heatmap"
+    heatmap_applied = models.BooleanField(default=False)
+
+    class Meta:
+        # Индекс курсорной пагинации списка забегов
+        indexes = [models.Index(fields=["created_at", "id"])]
 
     def __str__(self):
         return self.athlete.username + " - " + self.comment
 
 
+class RunTail(models.Model):
+    """
+    Денормализованное "хвостовое" состояние забега: последняя принятая позиция
+    и накопленные агрегаты по всем позициям.
+
+    Обновляется атомарно при каждой вставке позиций, поэтому добавление новой точки
+    не требует чтения истории забега, а завершение забега — пересчета по позициям.
+    Пересобрать состояние по сохраненным позициям можно командой
+    python manage.py rebuild_run_aggregates
+
+    Attributes:
+        run (OneToOneField): Забег, которому принадлежит состояние.
+        latitude (float): Широта последней позиции, None если позиций еще нет.
+        longitude (float): Долгота последней позиции, None если позиций еще нет.
+        date_time (datetime): Время последней позиции.
+        distance (float): Накопленная дистанция забега в километрах (без округления).
+        first_date_time (datetime): Время первой позиции забега.
+        speed_sum (float): Сумма скоростей всех позиций в метрах в секунду.
+        points_count (int): Количество позиций забега.
+    """
+
+    run = models.OneToOneField(
+        Run, on_delete=models.CASCADE, primary_key=True, related_name="tail"
+    )
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    date_time = models.DateTimeField(null=True, blank=True)
+    distance = models.FloatField(default=0)
+    first_date_time = models.DateTimeField(null=True, blank=True)
+    speed_sum = models.FloatField(default=0)
+    points_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.run_id} - {self.date_time}"
+
+    @property
+    def run_time_seconds(self) -> int:
+        if self.first_date_time is None or self.date_time is None:
+            return 0
+        return int((self.date_time - self.first_date_time).total_seconds())
+
+    @property
+    def average_speed(self) -> float:
+        if not self.points_count:
+            return 0.0
+        return self.speed_sum / self.points_count
+
+
 class AthleteInfo(models.Model):
     goals = models.CharField(max_length=200, blank=True, null=True)
     weight = models.IntegerField(blank=True, null=True)
@@ -37,6 +95,69 @@ class Challenge(models.Model):
     full_name = models.CharField(max_length=50, default="Сделай 10 Забегов!")
     athlete = models.ForeignKey(User, on_delete=models.CASCADE)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["athlete", "full_name"], name="unique_athlete_challenge"
+            )
+        ]
+
+
+class UserStats(models.Model):
+    """
+    Материализованная статистика пользователя, которая обновляется транзакционно
+    при завершении забегов и изменении рейтингов. По ней строятся список
+    пользователей, аналитика тренера и правила челленджей (app_run.challenges)
+    без агрегации по всей истории забегов и оценок.
+
+    Attributes:
+        user (OneToOneField): Пользователь, которому принадлежит статистика.
+        runs_finished (int): Количество завершенных забегов.
+        distance_total (float): Суммарная дистанция завершенных забегов в километрах.
+        distance_max (float): Дистанция самого длинного забега в километрах.
+        speed_sum (float): Сумма средних скоростей завершенных забегов в м/с.
+        rating_sum (int): Сумма оценок, полученных тренером.
+        rating_count (int): Количество оценок, полученных тренером.
+        rating_1 ... rating_5 (int): Количество оценок 1–5 (распределение оценок).
+        rating_avg (float): Средняя оценка тренера, None если оценок нет.
+                            Хранится для сортировки и фильтрации по индексу.
+    """
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, primary_key=True, related_name="stats"
+    )
+    runs_finished = models.IntegerField(default=0)
+    distance_total = models.FloatField(default=0)
+    distance_max = models.FloatField(default=0)
+    speed_sum = models.FloatField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_count = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    rating_avg = models.FloatField(null=True, blank=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id} - {self.runs_finished}"
+
+    @property
+    def speed_avg(self) -> float | None:
+        if not self.runs_finished:
+            return None
+        return self.speed_sum / self.runs_finished
+
+    @property
+    def rating(self) -> float | None:
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+    @property
+    def rating_distribution(self) -> dict[int, int]:
+        return {stars: getattr(self, f"rating_{stars}") for stars in range(1, 6)}
+
 
 class Position(models.Model):
     """
@@ -58,17 +179,77 @@ class Position(models.Model):
     speed = models.FloatField(default=0, blank=True)
     distance = models.FloatField(default=0, blank=True)
 
+    class Meta:
+        # Индексы чтения трека забега и курсорной пагинации позиций:
+        # по забегу (?run=) и по всему списку
+        indexes = [
+            models.Index(fields=["run", "date_time", "id"]),
+            models.Index(fields=["date_time", "id"]),
+        ]
+
     def __str__(self):
         return f"{self.pk} - {str(self.run)} - {self.date_time}"
 
 
+class RunTrack(models.Model):
+    """
+    Упакованный трек завершенного забега (см. app_run.tracks).
+
+    После завершения забега его позиции сжимаются в один бинарный блок
+    с дельта-кодированием, а строки Position удаляются. Чтение трека через API
+    распаковывает блок в позиции прежнего вида.
+
+    Attributes:
+        run (OneToOneField): Забег, которому принадлежит трек.
+        data (BinaryField): Упакованный трек.
+        points_count (int): Количество позиций в треке.
+        created_at (datetime): Дата и время упаковки.
+    """
+
+    run = models.OneToOneField(
+        Run, on_delete=models.CASCADE, primary_key=True, related_name="track"
+    )
+    data = models.BinaryField()
+    points_count = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.run_id} - {self.points_count}"
+
+
+class RunSplits(models.Model):
+    """
+    Сплиты завершенного забега: время с начала забега на каждой границе
+    километра и мили. Рассчитываются один раз при завершении забега
+    (см. services.store_run_splits), длительность и темп отдельных отрезков
+    выводятся из соседних значений при чтении.
+
+    Attributes:
+        run (OneToOneField): Забег, которому принадлежат сплиты.
+        km (list[float]): Время в секундах на отметках 1, 2, 3... км.
+        mile (list[float]): Время в секундах на отметках 1, 2, 3... мили.
+        created_at (datetime): Дата и время расчета.
+    """
+
+    run = models.OneToOneField(
+        Run, on_delete=models.CASCADE, primary_key=True, related_name="splits"
+    )
+    km = models.JSONField(default=list)
+    mile = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.run_id} - {len(self.km)} км"
+
+
 class CollectibleItem(models.Model):
     """
     Модель хранит коллекции предметов для награждения спортсменов, связанный с пользователем (спортсменом).
 
     Attributes:
         name (str): Название предмета. Обязательное поле.
-        uid (str): Уникальный идентификатор предмета. Обязательное поле.
+        uid (str): Уникальный идентификатор предмета. Обязательное поле, по нему
+                   импорт каталога обновляет существующие предметы.
         latitude (float): Географическая широта местоположения предмета. Индексировано для ускорения поиска.
         longitude (float): Географическая долгота местоположения предмета. Индексировано для ускорения поиска.
         picture (str): URL изображения предмета. Максимальная длина — 500 символов.
@@ -79,7 +260,7 @@ class CollectibleItem(models.Model):
     """
 
     name = models.CharField(max_length=100, blank=False)
-    uid = models.CharField(max_length=100, blank=False)
+    uid = models.CharField(max_length=100, blank=False, unique=True)
     latitude = models.FloatField(db_index=True)
     longitude = models.FloatField(db_index=True)
     picture = models.URLField(max_length=500)
@@ -164,3 +345,185 @@ class CoachRating(models.Model):
 
     class Meta:
         unique_together = ("athlete", "coach")
+
+
+class LeaderboardEntry(models.Model):
+    """
+    Результат пользователя в таблице лидеров за период (см. app_run.leaderboards).
+
+    Обновляется инкрементально при завершении забега и получении предметов.
+
+    Attributes:
+        board (str): Таблица лидеров (показатель), ключ из leaderboards.BOARDS.
+        period (str): Тип периода: all, month или week.
+        period_start (date): Первый день периода (для all — фиксированная дата).
+        user (ForeignKey): Пользователь.
+        score (float): Значение показателя, по которому считается место.
+        value_sum (float): Сумма значений (для показателя-среднего).
+        value_count (int): Количество значений (для показателя-среднего).
+    """
+
+    board = models.CharField(max_length=20)
+    period = models.CharField(max_length=10)
+    period_start = models.DateField()
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="leaderboard_entries"
+    )
+    score = models.FloatField(default=0)
+    value_sum = models.FloatField(default=0)
+    value_count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["board", "period", "period_start", "user"],
+                name="unique_leaderboard_entry",
+            )
+        ]
+        # Первые места и подсчет результатов выше заданного — по индексу
+        indexes = [models.Index(fields=["board", "period", "period_start", "score"])]
+
+    def __str__(self):
+        return f"{self.board} - {self.period} {self.period_start} - {self.user_id}"
+
+
+class LeaderboardBucket(models.Model):
+    """
+    Количество результатов таблицы лидеров в диапазоне значений (корзине).
+    По корзинам место пользователя считается без подсчета всех результатов выше.
+
+    Attributes:
+        board (str): Таблица лидеров.
+        period (str): Тип периода.
+        period_start (date): Первый день периода.
+        bucket (int): Номер корзины: floor(score / ширина корзины таблицы).
+        count (int): Количество результатов в корзине.
+    """
+
+    board = models.CharField(max_length=20)
+    period = models.CharField(max_length=10)
+    period_start = models.DateField()
+    bucket = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["board", "period", "period_start", "bucket"],
+                name="unique_leaderboard_bucket",
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.board} - {self.period} {self.period_start} - {self.bucket}"
+
+
+class Job(models.Model):
+    """
+    Задача локальной очереди фоновой обработки, хранящаяся в базе данных.
+
+    Задачи ставятся в очередь в той же транзакции, что и изменение данных,
+    и выполняются командой python manage.py run_jobs.
+
+    Attributes:
+        kind (str): Тип задачи, по которому выбирается обработчик.
+        payload (dict): Аргументы обработчика.
+        status (str): Состояние задачи.
+        attempts (int): Количество сделанных попыток выполнения.
+        max_attempts (int): Максимальное количество попыток, после которого задача
+                            переводится в статус failed.
+        run_after (datetime): Время, раньше которого задачу нельзя брать в работу.
+        last_error (str): Трассировка последней ошибки.
+    """
+
+    STATUS_CHOICES = [
+        ("pending", "pending"),
+        ("running", "running"),
+        ("done", "done"),
+        ("failed", "failed"),
+    ]
+
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "run_after"])]
+
+    def __str__(self):
+        return f"{self.pk} - {self.kind} - {self.status}"
+
+
+class HeatmapTile(models.Model):
+    """
+    Тайл тепловой карты активности (см. app_run.heatmap): количество позиций
+    в каждой ячейке сетки тайла Web Mercator.
+
+    Тайлы хранятся для всех уровней масштаба от 0 до heatmap.MAX_ZOOM: отдельно
+    по каждому атлету и общий по всем атлетам (athlete = None), поэтому чтение
+    тайла — выборка по ключу.
+
+    Attributes:
+        athlete (ForeignKey): Атлет или None для тайла по всем атлетам.
+        zoom (int): Уровень масштаба.
+        x (int): Колонка тайла.
+        y (int): Строка тайла.
+        counts (bytes): Счетчики ячеек тайла — массив uint32 построчно.
+        total (int): Количество позиций в тайле.
+    """
+
+    athlete = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="heatmap_tiles",
+    )
+    zoom = models.PositiveSmallIntegerField()
+    x = models.IntegerField()
+    y = models.IntegerField()
+    counts = models.BinaryField()
+    total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["zoom", "x", "y", "athlete"],
+                condition=models.Q(athlete__isnull=False),
+                name="unique_heatmap_tile_athlete",
+            ),
+            models.UniqueConstraint(
+                fields=["zoom", "x", "y"],
+                condition=models.Q(athlete__isnull=True),
+                name="unique_heatmap_tile_all",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.zoom}/{self.x}/{self.y} - {self.athlete_id} - {self.total}"
+
+
+class CacheVersion(models.Model):
+    """
+    Версия данных, закэшированных в памяти процессов приложения.
+
+    Ключ кэша включает версию, поэтому изменение данных в любом процессе
+    (в том числе в воркере очереди задач) инвалидирует кэш во всех процессах
+    одним UPDATE, без общего бэкенда кэша.
+
+    Attributes:
+        key (str): Имя закэшированных данных.
+        version (int): Текущая версия, увеличивается при каждом изменении данных.
+    """
+
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.key} - {self.version}"
@@ -0,0 +1,162 @@
+import base64
+import json
+from datetime import datetime
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q, QuerySet
+from rest_framework.exceptions import NotFound, ParseError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Курсорная (keyset) пагинация по паре полей (поле сортировки, id).
+
+    Курсор хранит значения последнего элемента страницы, следующая страница
+    выбирается условием "(поле, id) > (значение, id)" по индексу, без COUNT(*)
+    и OFFSET, поэтому любая страница стоит столько же, сколько первая.
+    Пагинация только прямая: в ответе есть ссылка next, но нет previous.
+    Порядок задается только ordering пагинатора: параметр ordering (OrderingFilter)
+    с другим порядком отклоняется с ошибкой 400, а не игнорируется молча.
+
+    Формат ответа:
+    {
+    'next': ...,     # Ссылка на следующую страницу или None
+    'results': [...]
+    }
+    """
+
+    cursor_query_param = "cursor"
+    page_size_query_param = "size"
+    invalid_cursor_message = "Invalid cursor"
+    invalid_ordering_message = "Cursor pagination supports only ordering={ordering}"
+
+    def __init__(self, ordering: tuple[str, str]):
+        self.ordering = ordering
+        self.next_position = None
+
+    def get_page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.KEYSET_PAGE_SIZE
+        return min(max(size, 1), settings.KEYSET_MAX_PAGE_SIZE)
+
+    def decode_cursor(self, request, model) -> tuple | None:
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+
+        field, tiebreaker = self.ordering
+        try:
+            value, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return (
+                model._meta.get_field(field).to_python(value),
+                model._meta.get_field(tiebreaker).to_python(pk),
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def check_ordering(self, request) -> None:
+        # Курсор однозначен только для порядка (поле, id), поэтому сортировка
+        # OrderingFilter допустима лишь совпадающая с ним
+        requested = request.query_params.get(api_settings.ORDERING_PARAM)
+        if requested and requested not in (self.ordering[0], ",".join(self.ordering)):
+            raise ParseError(
+                self.invalid_ordering_message.format(ordering=self.ordering[0])
+            )
+
+    def encode_cursor(self, position: tuple) -> str:
+        # Время кодируется полностью, с микросекундами, иначе курсор
+        # не отличит соседние записи
+        value, pk = position
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        return base64.urlsafe_b64encode(json.dumps([value, pk]).encode()).decode()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Возвращает страницу из QuerySet или уже загруженного списка объектов
+        (например, распакованного трека забега).
+        """
+        self.request = request
+        self.check_ordering(request)
+        field, tiebreaker = self.ordering
+        page_size = self.get_page_size(request)
+        model = view.queryset.model if view is not None else queryset.model
+        position = self.decode_cursor(request, model)
+
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.order_by(field, tiebreaker)
+            if position is not None:
+                value, pk = position
+                # Условие с >= по первому полю позволяет использовать составной индекс
+                queryset = queryset.filter(
+                    Q(**{f"{field}__gte": value})
+                    & (Q(**{f"{field}__gt": value}) | Q(**{f"{tiebreaker}__gt": pk}))
+                )
+            page = list(queryset[: page_size + 1])
+        else:
+
+            def key(item):
+                return getattr(item, field), getattr(item, tiebreaker)
+
+            page = sorted(queryset, key=key)
+            if position is not None:
+                page = [item for item in page if key(item) > position]
+            page = page[: page_size + 1]
+
+        self.next_position = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            self.next_position = (getattr(last, field), getattr(last, tiebreaker))
+        return page
+
+    def get_next_link(self) -> str | None:
+        if self.next_position is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.encode_cursor(self.next_position),
+        )
+
+    def get_paginated_response(self, data) -> Response:
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class KeysetPaginationMixin:
+    """
+    Включает KeysetPagination для списка, если в запросе передан параметр cursor
+    (для первой страницы — пустой: ?cursor=&size=100). Без него используется
+    pagination_class представления.
+
+    Attributes:
+        keyset_ordering (tuple[str, str]): Поле сортировки и поле-разделитель
+                                           одинаковых значений.
+    """
+
+    keyset_ordering = ("created_at", "id")
+
+    @property
+    def paginator(self):
+        if KeysetPagination.cursor_query_param not in self.request.query_params:
+            return super().paginator
+        if not isinstance(getattr(self, "_paginator", None), KeysetPagination):
+            self._paginator = KeysetPagination(self.keyset_ordering)
+        return self._paginator
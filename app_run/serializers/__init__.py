@@ -1,8 +1,16 @@
 # Импортируем функции из пакетов
 from .challenge import ChallengeSerializer, ChallengeSummarySerializer
-from .collectible import CollectibleItemSerializer
-from .position import PositionSerializer
-from .run import RunSerializer
+from .collectible import (
+    CollectibleItemSerializer,
+    CollectibleItemNearSerializer,
+    CollectibleItemSearchSerializer,
+)
+from .position import (
+    PositionSerializer,
+    PositionBatchSerializer,
+    TrackSimplificationSerializer,
+)
+from .run import RunSerializer, RunImportSerializer, RunSplitsSerializer
 from .user import (
     UserSerializer,
     CoachAthleteSerializer,
@@ -10,6 +18,7 @@ from .user import (
     AthleteInfoSerializer,
     AthleteWithCoachSerializer,
     CoachWithAthletesSerializer,
+    UserIncludeSerializer,
 )
 
 # Указываем какие имена импортируем
@@ -19,10 +28,17 @@ __all__ = [
     "CoachAthleteItemsSerializer",
     "AthleteInfoSerializer",
     "RunSerializer",
+    "RunImportSerializer",
+    "RunSplitsSerializer",
     "CollectibleItemSerializer",
+    "CollectibleItemNearSerializer",
+    "CollectibleItemSearchSerializer",
     "ChallengeSerializer",
     "PositionSerializer",
+    "PositionBatchSerializer",
+    "TrackSimplificationSerializer",
     "AthleteWithCoachSerializer",
     "CoachWithAthletesSerializer",
+    "UserIncludeSerializer",
     "ChallengeSummarySerializer",
 ]
@@ -1,5 +1,8 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
+from app_run.geo import BoundingBox
 from app_run.models import CollectibleItem
 
 
@@ -25,8 +28,10 @@ class CollectibleItemSerializer(serializers.ModelSerializer):
     # Проверяем что name не пустое и не длиннее 255 символов
     name = serializers.CharField()
 
-    # Проверяем что uid является тестовым полем, не может быть пустым
-    uid = serializers.CharField()
+    # Проверяем что uid является тестовым полем, не может быть пустым и уже занятым
+    uid = serializers.CharField(
+        validators=[UniqueValidator(queryset=CollectibleItem.objects.all())]
+    )
 
     # Проверяем что value является числом, значение не может быть отрицательным
     value = serializers.IntegerField()
@@ -41,3 +46,72 @@ class CollectibleItemSerializer(serializers.ModelSerializer):
     class Meta:
         model = CollectibleItem
         fields = ("id", "name", "uid", "latitude", "longitude", "picture", "value")
+
+
+class CollectibleItemNearSerializer(CollectibleItemSerializer):
+    """
+    Предмет в результатах поиска рядом с точкой: с расстоянием до нее в метрах
+    """
+
+    distance = serializers.FloatField(read_only=True)
+
+    class Meta(CollectibleItemSerializer.Meta):
+        fields = CollectibleItemSerializer.Meta.fields + ("distance",)
+
+
+class CollectibleItemSearchSerializer(serializers.Serializer):
+    """
+    Параметры поиска предметов в api/collectible_item/:
+    ?near=55.75,37.61   # Точка "широта,долгота": предметы в радиусе, от ближних к дальним
+    &radius=500         # Радиус в метрах, по умолчанию COLLECTIBLE_NEAR_RADIUS
+    ?bbox=37.5,55.7,37.7,55.8
+                        # Прямоугольник "мин. долгота,мин. широта,макс. долгота,макс. широта";
+                        # мин. долгота больше макс. — прямоугольник через антимеридиан
+    """
+
+    near = serializers.CharField(required=False)
+    radius = serializers.FloatField(
+        min_value=0.0,
+        max_value=settings.COLLECTIBLE_NEAR_MAX_RADIUS,
+        default=settings.COLLECTIBLE_NEAR_RADIUS,
+    )
+    bbox = serializers.CharField(required=False)
+
+    @staticmethod
+    def _numbers(value: str, count: int) -> list[float]:
+        try:
+            numbers = [float(part) for part in value.split(",")]
+        except ValueError:
+            numbers = []
+        if len(numbers) != count:
+            raise serializers.ValidationError(f"Ожидается {count} числа через запятую.")
+        return numbers
+
+    @staticmethod
+    def _check_point(latitude: float, longitude: float) -> None:
+        if not (-90.0 <= latitude <= 90.0 and -180.0 <= longitude <= 180.0):
+            raise serializers.ValidationError("Координаты вне допустимого диапазона.")
+
+    def validate_near(self, value) -> tuple[float, float]:
+        latitude, longitude = self._numbers(value, 2)
+        self._check_point(latitude, longitude)
+        return latitude, longitude
+
+    def validate_bbox(self, value) -> BoundingBox:
+        min_longitude, min_latitude, max_longitude, max_latitude = self._numbers(
+            value, 4
+        )
+        self._check_point(min_latitude, min_longitude)
+        self._check_point(max_latitude, max_longitude)
+        if min_latitude > max_latitude:
+            raise serializers.ValidationError("Минимальная широта больше максимальной.")
+        return BoundingBox(min_latitude, min_longitude, max_latitude, max_longitude)
+
+
+class CollectibleItemImportSerializer(CollectibleItemSerializer):
+    """
+    Сериализатор строки импорта каталога. Занятый uid не является ошибкой:
+    импорт обновляет предмет с таким uid, поэтому проверка уникальности не нужна.
+    """
+
+    uid = serializers.CharField()
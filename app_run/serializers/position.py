@@ -1,7 +1,7 @@
-from geopy.distance import geodesic
 from rest_framework import serializers
 
-from app_run.models import Position
+from app_run.models import Position, Run
+from app_run.services import append_positions
 
 
 class PositionSerializer(serializers.ModelSerializer):
@@ -33,63 +33,63 @@ class PositionSerializer(serializers.ModelSerializer):
         return data
 
     def create(self, validated_data):
-        run = validated_data["run"]
-
-        # Получаем все позиции для этой пробежки, отсортированные по времени
-        prev_positions = Position.objects.filter(run=run).order_by("date_time")
-
-        total_distance = 0.0  # начальное расстояние
-
-        # Если есть предыдущие позиции, считаем суммарное расстояние
-        if prev_positions.exists():
-            prev_pos = prev_positions.last()  # последняя из предыдущих
-            current_point = (validated_data["latitude"], validated_data["longitude"])
-            prev_point = (prev_pos.latitude, prev_pos.longitude)
-
-            # Расстояние от предыдущей позиции до текущей
-            segment_distance = geodesic(prev_point, current_point).kilometers
-
-            # Суммируем с предыдущим расстоянием
-            total_distance = prev_pos.distance + segment_distance
+        # Одиночная позиция — это пакет из одной точки
+        (position,) = append_positions(validated_data["run"], [validated_data])
+        return position
 
-        # Записываем итоговое расстояние в validated_data
-        validated_data["distance"] = round(total_distance, 2)
 
-        # Вычисляем скорость (если есть предыдущая позиция)
-        if prev_positions.exists():
-            prev_pos = prev_positions.last()
-            current_point = (validated_data["latitude"], validated_data["longitude"])
-            prev_point = (prev_pos.latitude, prev_pos.longitude)
+class PositionPointSerializer(serializers.Serializer):
+    """
+    Одна точка пакета позиций: координаты и время фиксации
+    """
 
-            distance_meters = geodesic(prev_point, current_point).meters
-            time_diff = (
-                validated_data["date_time"] - prev_pos.date_time
-            ).total_seconds()
+    latitude = serializers.FloatField(min_value=-90.0, max_value=90.0)
+    longitude = serializers.FloatField(min_value=-180.0, max_value=180.0)
+    date_time = serializers.DateTimeField(
+        input_formats=["%Y-%m-%dT%H:%M:%S.%f"],
+        required=True,
+        allow_null=False,
+    )
 
-            if time_diff > 0:
-                speed = distance_meters / time_diff
-            else:
-                speed = 0
 
-            validated_data["speed"] = round(speed, 2)
+class PositionBatchSerializer(serializers.Serializer):
+    """
+    Пакет GPS-точек одного забега, накопленных часами.
+    {
+    'run': ...,        # Id забега в статусе in_progress
+    'positions': [...] # Точки в формате PositionPointSerializer
+    }
+    Статус забега проверяется один раз на весь пакет, точки сортируются по времени.
+    """
 
-        # Создаём позицию
-        position = super().create(validated_data)
+    # Максимальное количество точек в одном пакете
+    MAX_POINTS = 5000
 
-        # Проверяем предметы рядом
-        self.check_collectible_items(position)
+    run = serializers.PrimaryKeyRelatedField(queryset=Run.objects.all())
+    positions = PositionPointSerializer(
+        many=True, allow_empty=False, max_length=MAX_POINTS
+    )
 
-        return position
+    def validate(self, data):
+        if data["run"].status != "in_progress":
+            raise serializers.ValidationError("Run is not in progress.")
+        data["positions"] = sorted(data["positions"], key=lambda p: p["date_time"])
+        return data
 
-    def check_collectible_items(self, position):
-        from app_run.models import CollectibleItem  # чтобы избежать circular import
+    def create(self, validated_data):
+        return append_positions(validated_data["run"], validated_data["positions"])
 
-        athlete = position.run.athlete
-        current_point = (position.latitude, position.longitude)
 
-        for item in CollectibleItem.objects.all():
-            item_point = (item.latitude, item.longitude)
-            distance = geodesic(current_point, item_point).meters
+class TrackSimplificationSerializer(serializers.Serializer):
+    """
+    Параметры упрощения трека в api/positions/:
+    ?run=...           # Id забега (обязателен)
+    &tolerance=...     # Допустимое отклонение упрощенного трека в метрах
+    &max_points=...    # Максимальное количество точек
+    """
 
-            if distance < 100:
-                item.athlete.add(athlete)
+    run = serializers.PrimaryKeyRelatedField(queryset=Run.objects.all())
+    tolerance = serializers.FloatField(min_value=0.0, required=False)
+    max_points = serializers.IntegerField(
+        min_value=2, max_value=PositionBatchSerializer.MAX_POINTS, required=False
+    )
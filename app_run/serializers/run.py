@@ -1,6 +1,9 @@
+from django.contrib.auth.models import User
 from rest_framework import serializers
 
-from app_run.models import Run
+from app_run.models import Run, RunSplits
+from app_run.services import SPLIT_DISTANCES_KM, import_run
+from app_run.track_import import parse_track_file
 from app_run.serializers.user import UserSerializer
 
 
@@ -24,3 +27,82 @@ class RunSerializer(serializers.ModelSerializer):
             "speed",
             "athlete_data",
         )
+
+
+class RunImportSerializer(serializers.Serializer):
+    """
+    Загрузка записанного забега файлом (multipart/form-data):
+    {
+    'file': ...,     # Файл .gpx или .tcx
+    'athlete': ...,  # Id атлета
+    'comment': ...   # Комментарий к забегу (необязателен, по умолчанию имя файла)
+    }
+    """
+
+    EXTENSIONS = (".gpx", ".tcx")
+
+    file = serializers.FileField()
+    athlete = serializers.PrimaryKeyRelatedField(
+        queryset=User.objects.filter(is_staff=False, is_superuser=False)
+    )
+    comment = serializers.CharField(required=False, allow_blank=True)
+
+    def validate_file(self, file):
+        if not file.name.lower().endswith(self.EXTENSIONS):
+            raise serializers.ValidationError(
+                f"Поддерживаются файлы {', '.join(self.EXTENSIONS)}"
+            )
+        return file
+
+    def create(self, validated_data):
+        file = validated_data["file"]
+        try:
+            return import_run(
+                validated_data["athlete"],
+                parse_track_file(file),
+                comment=validated_data.get("comment") or file.name,
+            )
+        except ValueError as error:
+            raise serializers.ValidationError({"file": [str(error)]})
+
+
+class RunSplitsSerializer(serializers.ModelSerializer):
+    """
+    Сплиты забега по километрам и милям. Каждый отрезок:
+    {
+    'split': ...,     # Номер отрезка
+    'time': ...,      # Время с начала забега на конце отрезка, секунды
+    'duration': ...,  # Время прохождения отрезка, секунды
+    'pace': ...       # Темп, секунды на километр
+    }
+    """
+
+    km = serializers.SerializerMethodField()
+    mile = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RunSplits
+        fields = ("run", "km", "mile")
+
+    @staticmethod
+    def _splits(times: list[float], split_km: float) -> list[dict]:
+        splits = []
+        previous = 0.0
+        for number, time in enumerate(times, start=1):
+            duration = round(time - previous, 1)
+            splits.append(
+                {
+                    "split": number,
+                    "time": time,
+                    "duration": duration,
+                    "pace": round(duration / split_km, 1),
+                }
+            )
+            previous = time
+        return splits
+
+    def get_km(self, obj) -> list[dict]:
+        return self._splits(obj.km, SPLIT_DISTANCES_KM["km"])
+
+    def get_mile(self, obj) -> list[dict]:
+        return self._splits(obj.mile, SPLIT_DISTANCES_KM["mile"])
@@ -5,6 +5,31 @@ from app_run.models import AthleteInfo, Subscribe
 from app_run.serializers.collectible import CollectibleItemSerializer
 
 
+def get_athlete_ids(coach) -> list[int]:
+    """
+    Id атлетов, подписанных на тренера. Использует подписки, предзагруженные
+    в prefetched_athlete_subscriptions, если они есть.
+    """
+    subscriptions = getattr(coach, "prefetched_athlete_subscriptions", None)
+    if subscriptions is not None:
+        return [subscription.athlete_id for subscription in subscriptions]
+    return list(
+        Subscribe.objects.filter(coach=coach).values_list("athlete_id", flat=True)
+    )
+
+
+def get_coach_id(athlete) -> int | None:
+    """
+    Id тренера по первой подписке атлета. Использует подписки, предзагруженные
+    в prefetched_coach_subscriptions, если они есть.
+    """
+    subscriptions = getattr(athlete, "prefetched_coach_subscriptions", None)
+    if subscriptions is not None:
+        return subscriptions[0].coach_id if subscriptions else None
+    subscription = Subscribe.objects.filter(athlete=athlete).first()
+    return subscription.coach_id if subscription else None
+
+
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
@@ -65,9 +90,7 @@ class CoachWithAthletesSerializer(CoachAthleteSerializer):
 
     def get_athletes(self, obj):
         # Получаем список ID атлетов, подписанных на этого тренера
-        return list(
-            Subscribe.objects.filter(coach=obj).values_list("athlete_id", flat=True)
-        )
+        return get_athlete_ids(obj)
 
 
 class AthleteWithCoachSerializer(CoachAthleteSerializer):
@@ -82,11 +105,40 @@ class AthleteWithCoachSerializer(CoachAthleteSerializer):
         fields = CoachAthleteSerializer.Meta.fields + ("coach",)
 
     def get_coach(self, obj):
-        # Ищем первую подписку атлета на тренера
-        subscription = Subscribe.objects.filter(athlete=obj).first()
-        if subscription:
-            return subscription.coach_id  # возвращаем только ID
-        return None
+        # Id тренера по первой подписке атлета
+        return get_coach_id(obj)
+
+
+class UserIncludeSerializer(CoachAthleteSerializer):
+    """
+    Пользователь со связями, перечисленными в context["include"]:
+    athletes — id атлетов тренера, coach — id тренера атлета,
+    items — предметы пользователя. Связи, не указанные в include, в ответ не попадают.
+    Связи должны быть предзагружены (см. CouchAthleteViewSet), иначе на каждого
+    пользователя будет отдельный запрос.
+    """
+
+    INCLUDES = ("athletes", "coach", "items")
+
+    athletes = serializers.SerializerMethodField()
+    coach = serializers.SerializerMethodField()
+    items = CollectibleItemSerializer(many=True, read_only=True)
+
+    class Meta(CoachAthleteSerializer.Meta):
+        fields = CoachAthleteSerializer.Meta.fields + ("athletes", "coach", "items")
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        include = self.context.get("include", ())
+        for name in self.INCLUDES:
+            if name not in include:
+                self.fields.pop(name)
+
+    def get_athletes(self, obj):
+        return get_athlete_ids(obj)
+
+    def get_coach(self, obj):
+        return get_coach_id(obj)
 
 
 class AthleteInfoSerializer(serializers.ModelSerializer):
@@ -1,40 +1,93 @@
-import io
 import logging
-from typing import Any
+import time
+from datetime import date
+from typing import Any, Iterable
 
-from django.db.models import QuerySet
-from django.db.models.aggregates import Min, Max
-from geopy.distance import geodesic
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import (
+    Avg,
+    F,
+    FloatField,
+    Max,
+    OuterRef,
+    Q,
+    QuerySet,
+    Subquery,
+    Sum,
+    Window,
+)
+from django.db.models.functions import Cast, Least, RowNumber
+import numpy as np
 from openpyxl import load_workbook
+from rest_framework.exceptions import ValidationError
 
-from app_run.models import Position
-from app_run.serializers.collectible import CollectibleItemSerializer
+from app_run.challenges import award_challenges
+from app_run.geo import (
+    BOUNDING_BOX_MARGIN,
+    BoundingBox,
+    GridIndex,
+    bounding_box,
+    pair_distances,
+    point_distances,
+    segment_distances,
+    simplify_track,
+)
+from app_run.heatmap import record as record_heatmap
+from app_run.jobs import enqueue, job_handler
+from app_run.leaderboards import period_start
+from app_run.leaderboards import record as record_leaderboards
+from app_run.models import (
+    CoachRating,
+    CollectibleItem,
+    LeaderboardEntry,
+    Position,
+    Run,
+    RunSplits,
+    RunTail,
+    RunTrack,
+    Subscribe,
+    UserStats,
+)
+from app_run.tracks import from_microseconds, pack_track, unpack_track
 
-# Создаём логгер для этого модуля
-logger = logging.getLogger(__name__)
+# Радиус в метрах, на котором атлет подбирает предмет
+COLLECTIBLE_PICKUP_RADIUS_METERS = 100
 
+# Ключ кэша с предметами атлета на время забега (см. get_owned_items)
+OWNED_ITEMS_CACHE_KEY = "run_owned_items:{run_id}"
 
-def calculate_run_time_seconds(run) -> int:
-    # Получить список позиций из модели Position для текущего забега с агрегацией по полю date_time
-    # с минимальным и максимальным значением
-    aggregates_date_time = Position.objects.filter(run=run).aggregate(
-        min_date_time=Min("date_time"),
-        max_date_time=Max("date_time"),
-    )
+# Ключ кэша с версией каталога предметов
+CATALOG_VERSION_CACHE_KEY = "collectible_catalog_version"
 
-    min_date_time = aggregates_date_time["min_date_time"]
-    max_date_time = aggregates_date_time["max_date_time"]
+# Ключи кэша упрощенных треков завершенных забегов
+TRACK_VERSION_CACHE_KEY = "run_track_version:{run_id}"
+TRACK_CACHE_KEY = "run_track:{run_id}:{version}:{tolerance}:{max_points}"
 
-    if min_date_time is None or max_date_time is None:
-        return 0
+# Показатели аналитики тренера: ключ ответа -> аннотация запроса
+COACH_ANALYTICS_METRICS = {
+    "longest_run": "longest",
+    "total_run": "total",
+    "speed_avg": "speed",
+}
 
-    logger.warning(f"min_date_time: {min_date_time}")
-    logger.warning(f"max_date_time: {max_date_time}")
+# Импорт каталога предметов: количество колонок в файле и размер пачки записи
+IMPORT_COLUMNS_COUNT = 6
+IMPORT_CHUNK_SIZE = 1000
 
-    duration = (max_date_time - min_date_time).total_seconds()
-    logger.warning(f"Затраченное время в секундах: {int(duration)}")
+# Длина отрезка сплитов в километрах: ключ — поле RunSplits
+SPLIT_DISTANCES_KM = {"km": 1.0, "mile": 1.609344}
 
-    return int(duration)
+# Импорт забега из файла GPX/TCX: количество точек в одной пачке вставки
+IMPORT_TRACK_BATCH_SIZE = 5000
+
+# Пространственный индекс каталога в памяти процесса: (версия каталога, индекс)
+_collectible_index: tuple[int, GridIndex] | None = None
+
+# Создаём логгер для этого модуля
+logger = logging.getLogger(__name__)
 
 
 def calculate_route_distance(coordinates: QuerySet[Position, dict[str, Any]]) -> float:
@@ -60,37 +113,1001 @@ def calculate_route_distance(coordinates: QuerySet[Position, dict[str, Any]]) ->
             "Список должен содержать минимум две точки для расчета расстояния."
         )
 
-    total_distance = 0.0
+    latitudes = [coordinate["latitude"] for coordinate in coordinates]
+    longitudes = [coordinate["longitude"] for coordinate in coordinates]
+
+    # Все отрезки маршрута считаются одним векторизованным вызовом
+    segments = segment_distances(
+        latitudes, longitudes, mode=settings.ROUTE_DISTANCE_MODE
+    )
+
+    return float(segments.sum()) / 1000
+
+
+def append_positions(run: Run, points: list[dict[str, Any]]) -> list[Position]:
+    """
+    Добавляет в забег упорядоченный набор GPS-точек одним bulk insert.
+
+    Накопленная дистанция (км) и скорость (м/с) считаются за один проход по
+    точкам, начиная от хвостового состояния забега (RunTail), поэтому стоимость
+    вставки не зависит от длины забега. Хвост блокируется и обновляется в той же
+    транзакции, что и вставка позиций. После вставки каталог предметов
+    проверяется один раз на весь набор точек.
+
+    Args:
+        run (Run): Забег, к которому относятся точки.
+        points (list[dict]): Точки с ключами "latitude", "longitude" и "date_time",
+                             упорядоченные по времени.
+
+    Returns:
+        list[Position]: Созданные позиции в порядке переданных точек.
+
+    Raises:
+        ValidationError: Если забег не в статусе in_progress (например, уже
+                         завершен параллельным запросом).
+    """
+    if not points:
+        return []
+
+    with transaction.atomic():
+        # Блокируем хвост вместе с забегом, чтобы параллельные вставки в один забег
+        # шли по очереди, а вставка не прошла после завершения забега (finish_run
+        # блокирует тот же хвост)
+        tail, created = (
+            RunTail.objects.select_for_update()
+            .select_related("run")
+            .get_or_create(run=run)
+        )
+        run_status = (
+            Run.objects.select_for_update()
+            .values_list("status", flat=True)
+            .get(pk=run.pk)
+            if created
+            else tail.run.status
+        )
+        if run_status != "in_progress":
+            raise ValidationError("Run is not in progress.")
+
+        # Трек пакета вместе с последней сохраненной точкой, если она есть
+        track = list(points)
+        if tail.latitude is not None:
+            track.insert(
+                0,
+                {
+                    "latitude": tail.latitude,
+                    "longitude": tail.longitude,
+                    "date_time": tail.date_time,
+                },
+            )
+
+        # Длины отрезков и интервалы времени считаются массивами за один вызов
+        segments = segment_distances(
+            [point["latitude"] for point in track],
+            [point["longitude"] for point in track],
+            mode=settings.ROUTE_DISTANCE_MODE,
+        )
+        timestamps = np.array([point["date_time"].timestamp() for point in track])
+        time_diffs = np.diff(timestamps)
+        speeds = np.divide(
+            segments, time_diffs, out=np.zeros_like(segments), where=time_diffs > 0
+        )
+        distances = tail.distance + np.cumsum(segments) / 1000
+
+        # Для первой точки забега предыдущей позиции нет: скорость и дистанция нулевые
+        if tail.latitude is None:
+            speeds = np.concatenate(([0.0], speeds))
+            distances = np.concatenate(([tail.distance], distances))
+
+        positions = [
+            Position(
+                run=run,
+                latitude=point["latitude"],
+                longitude=point["longitude"],
+                date_time=point["date_time"],
+                speed=round(float(speed), 2),
+                distance=round(float(distance), 2),
+            )
+            for point, speed, distance in zip(points, speeds, distances)
+        ]
+        positions = Position.objects.bulk_create(positions)
 
-    for i in range(len(coordinates) - 1):
-        point1 = (coordinates[i]["latitude"], coordinates[i]["longitude"])
-        point2 = (coordinates[i + 1]["latitude"], coordinates[i + 1]["longitude"])
-        distance = geodesic(point1, point2).kilometers
-        total_distance += distance
+        last = positions[-1]
+        tail.latitude = last.latitude
+        tail.longitude = last.longitude
+        tail.date_time = last.date_time
+        tail.distance = float(distances[-1])
 
-    return total_distance
+        # Накопленные агрегаты, из которых забег завершается без чтения позиций
+        if tail.first_date_time is None:
+            tail.first_date_time = positions[0].date_time
+        tail.speed_sum += sum(position.speed for position in positions)
+        tail.points_count += len(positions)
+        tail.save()
 
+    # Проверяем предметы рядом сразу для всего набора точек
+    award_collectible_items(run, positions)
 
-def read_excel_file(uploaded_file):
-    # Читаем переданный файл
-    file_content = uploaded_file.read()
-    # Переводим файл в байтовый поток
-    file_bytes = io.BytesIO(file_content)
+    return positions
 
-    # Загружаем файл в экземпляр класса Workbook
-    wb = load_workbook(file_bytes)
-    # Получаем активный лист
-    worksheet = wb.active
-    # Получаем количество строк в листе
-    max_row = worksheet.max_row
+
+def start_run(run: Run) -> bool:
+    """
+    Переводит забег в статус in_progress и готовит его к приему позиций:
+    создает хвостовое состояние и загружает в кэш предметы атлета, поэтому
+    первая позиция забега стоит столько же запросов, сколько следующие.
+
+    Args:
+        run (Run): Забег в статусе init. Поле status экземпляра обновляется.
+
+    Returns:
+        bool: True, если забег был переведен в статус in_progress.
+    """
+    with transaction.atomic():
+        # Условие на статус защищает от повторного старта параллельным запросом
+        updated = Run.objects.filter(pk=run.pk, status="init").update(
+            status="in_progress"
+        )
+        if not updated:
+            return False
+        RunTail.objects.get_or_create(run=run)
+
+    run.status = "in_progress"
+    get_owned_items(run)
+    return True
+
+
+def finish_run(run: Run) -> bool:
+    """
+    Завершает забег одним UPDATE по накопленным агрегатам хвостового состояния
+    и ставит в очередь задачу "run_finished" с остальной обработкой.
+
+    Дистанция, время и средняя скорость берутся из RunTail, поэтому стоимость
+    завершения не зависит от количества позиций забега и истории атлета.
+
+    Args:
+        run (Run): Забег в статусе in_progress. Поля экземпляра обновляются.
+
+    Returns:
+        bool: True, если забег был переведен в статус finished.
+    """
+    with transaction.atomic():
+        # Хвост блокируется до конца транзакции: позиции, которые append_positions
+        # добавляет параллельно, либо уже учтены в агрегатах, либо будут отклонены
+        tail = RunTail.objects.select_for_update().filter(run=run).first()
+        if tail is None:
+            tail = RunTail(run=run)
+        values = {
+            "status": "finished",
+            "distance": tail.distance,
+            "run_time_seconds": tail.run_time_seconds,
+            "speed": tail.average_speed,
+        }
+
+        # Условие на статус защищает от повторного завершения параллельным запросом
+        updated = Run.objects.filter(pk=run.pk, status="in_progress").update(**values)
+        if not updated:
+            return False
+
+        enqueue("run_finished", run_id=run.pk)
+
+        # Набор предметов атлета нужен только пока идет забег. Удаляется после
+        # коммита: award_collectible_items той же транзакции (импорт трека)
+        # записывает набор в кэш тоже после коммита, и удаление должно идти позже
+        key = OWNED_ITEMS_CACHE_KEY.format(run_id=run.pk)
+        transaction.on_commit(lambda: cache.delete(key))
+
+    for field, value in values.items():
+        setattr(run, field, value)
+    return True
+
+
+def import_run(athlete, points: Iterable[dict[str, Any]], comment: str = "") -> Run:
+    """
+    Создает завершенный забег по точкам загруженного трека (см. track_import).
+
+    Точки записываются пачками по IMPORT_TRACK_BATCH_SIZE через append_positions:
+    дистанция и скорость каждой пачки считаются векторно, позиции вставляются
+    одним bulk insert, предметы рядом проверяются один раз на пачку. Затем забег
+    завершается обычным образом (finish_run), поэтому статистика, челленджи
+    и таблицы лидеров обновляются так же, как для забега из приложения.
+    Все выполняется в одной транзакции: при ошибке в файле забег не создается.
+
+    Args:
+        athlete (User): Атлет, которому принадлежит забег.
+        points (Iterable[dict]): Точки с ключами "latitude", "longitude" и "date_time"
+                                 в порядке времени, читаются потоково. Точки
+                                 не сортируются: трек с обратным ходом времени
+                                 отклоняется.
+        comment (str): Комментарий к забегу.
+
+    Returns:
+        Run: Завершенный забег.
+
+    Raises:
+        ValueError: Если в треке меньше двух точек, точки идут не по порядку
+                    времени или файл трека некорректен.
+    """
+    with transaction.atomic():
+        run = Run.objects.create(athlete=athlete, comment=comment, status="in_progress")
+
+        first = None
+        count = 0
+        batch = []
+        previous = None
+        for point in points:
+            # Дистанция и скорость считаются по соседним точкам, поэтому порядок
+            # проверяется сразу при чтении, без накопления всего трека в памяти
+            if previous is not None and point["date_time"] < previous:
+                raise ValueError(
+                    f"Точки трека идут не по порядку времени: {point['date_time']}"
+                    f" после {previous}."
+                )
+            previous = point["date_time"]
+            batch.append(point)
+            if len(batch) >= IMPORT_TRACK_BATCH_SIZE:
+                append_positions(run, batch)
+                first, count, batch = first or batch[0], count + len(batch), []
+        if batch:
+            append_positions(run, batch)
+            first, count = first or batch[0], count + len(batch)
+
+        if count < 2:
+            raise ValueError("В треке должно быть не меньше двух точек со временем.")
+
+        # Дата забега — время начала трека, а не момент загрузки файла
+        run.created_at = first["date_time"]
+        Run.objects.filter(pk=run.pk).update(created_at=run.created_at)
+        finish_run(run)
+
+    return run
+
+
+@job_handler("run_finished")
+def process_finished_run(run_id: int) -> None:
+    """
+    Обработка завершенного забега: обновление статистики атлета, начисление
+    челленджей по правилам из app_run.challenges, обновление таблиц лидеров
+    и расчет сплитов. Выполняется воркером очереди задач. Учет трека в тепловой
+    карте ставится в очередь отдельной задачей "run_heatmap".
+
+    Идемпотентна: задача, зависшая после коммита и возвращенная в очередь
+    (requeue_stale_jobs), не учитывает забег повторно.
+    """
+    # Блокировка забега сериализует повторные выполнения задачи, а флаг
+    # stats_applied фиксируется в той же транзакции, что и статистика
+    run = Run.objects.select_for_update().get(pk=run_id)
+    if run.stats_applied:
+        return
+
+    # Статистика атлета обновляется инкрементально, без агрегации по истории забегов
+    stats, _ = UserStats.objects.select_for_update().get_or_create(
+        user_id=run.athlete_id
+    )
+    stats.runs_finished += 1
+    stats.distance_total += run.distance
+    stats.distance_max = max(stats.distance_max, run.distance)
+    stats.speed_sum += run.speed
+    stats.save()
+
+    award_challenges(
+        run.athlete_id,
+        {
+            "runs_finished": stats.runs_finished,
+            "distance_total": stats.distance_total,
+            "run_distance": run.distance,
+            "run_time_seconds": run.run_time_seconds,
+        },
+    )
+
+    record_leaderboards(
+        run.athlete_id,
+        timezone.localtime(run.created_at).date(),
+        {
+            "distance_total": run.distance,
+            "distance_max": run.distance,
+            "speed_avg": run.speed,
+        },
+    )
+
+    store_run_splits(run, get_run_positions(run))
+
+    Run.objects.filter(pk=run_id).update(stats_applied=True)
+
+    # Тепловая карта — отдельная задача: ее ошибка не откатывает статистику,
+    # челленджи, таблицы лидеров и сплиты, а сама задача повторяется очередью
+    enqueue("run_heatmap", run_id=run_id)
+
+    # Упаковка трека удаляет позиции, поэтому идет после всей обработки забега
+    if settings.TRACK_COMPACTION_ENABLED:
+        enqueue("compact_run_track", run_id=run_id)
+
+
+@job_handler("run_heatmap")
+def record_run_heatmap(run_id: int) -> None:
+    """
+    Учитывает трек завершенного забега в тепловой карте (app_run.heatmap).
+
+    Идемпотентна, как и process_finished_run: повторное выполнение задачи
+    не учитывает трек дважды. Трек читается и из строк Position,
+    и из упакованного RunTrack, поэтому порядок с упаковкой не важен.
+    """
+    run = Run.objects.select_for_update().get(pk=run_id)
+    if run.heatmap_applied:
+        return
+
+    positions = get_run_positions(run)
+    record_heatmap(
+        run.athlete_id,
+        [position.latitude for position in positions],
+        [position.longitude for position in positions],
+    )
+    Run.objects.filter(pk=run_id).update(heatmap_applied=True)
+
+
+@job_handler("compact_run_track")
+def compact_run_track(run_id: int) -> RunTrack | None:
+    """
+    Упаковывает позиции завершенного забега в RunTrack и удаляет строки Position.
+
+    Returns:
+        RunTrack | None: Упакованный трек или None, если упаковывать нечего
+                         (забег не завершен, позиций нет или у позиций нет времени).
+    """
+    run = Run.objects.get(pk=run_id)
+    if run.status != "finished":
+        return None
+
+    with transaction.atomic():
+        positions = list(
+            Position.objects.select_for_update()
+            .filter(run_id=run_id)
+            .order_by("date_time", "id")
+            .values("id", "latitude", "longitude", "date_time", "speed", "distance")
+        )
+        if not positions:
+            return None
+
+        # Трек мог быть упакован раньше: новые позиции дописываются к нему
+        packed = load_packed_positions(run_id)
+        if packed:
+            positions = [
+                {
+                    "id": position.id,
+                    "latitude": position.latitude,
+                    "longitude": position.longitude,
+                    "date_time": position.date_time,
+                    "speed": position.speed,
+                    "distance": position.distance,
+                }
+                for position in packed
+            ] + positions
+            positions.sort(key=lambda position: (position["date_time"], position["id"]))
+
+        try:
+            data = pack_track(positions)
+        except ValueError as error:
+            logger.warning(f"Трек забега {run_id} не упакован: {error}")
+            return None
+
+        track, _ = RunTrack.objects.update_or_create(
+            run_id=run_id, defaults={"data": data, "points_count": len(positions)}
+        )
+        Position.objects.filter(run_id=run_id).delete()
+
+    bump_track_version(run_id)
+    return track
+
+
+def load_packed_positions(run_id: int) -> list[Position] | None:
+    """
+    Распаковывает трек забега в несохраненные экземпляры Position
+    с исходными id, в порядке времени.
+
+    Returns:
+        list[Position] | None: Позиции или None, если трек забега не упакован.
+    """
+    data = RunTrack.objects.filter(run_id=run_id).values_list("data", flat=True).first()
+    if data is None:
+        return None
+
+    track = unpack_track(data)
+    return [
+        Position(
+            id=int(position_id),
+            run_id=run_id,
+            latitude=float(latitude),
+            longitude=float(longitude),
+            date_time=from_microseconds(timestamp),
+            speed=float(speed),
+            distance=float(distance),
+        )
+        for position_id, latitude, longitude, timestamp, speed, distance in zip(
+            track["id"],
+            track["latitude"],
+            track["longitude"],
+            track["timestamp"],
+            track["speed"],
+            track["distance"],
+        )
+    ]
+
+
+def get_run_positions(run: Run) -> list[Position]:
+    """
+    Возвращает все позиции забега в порядке времени, независимо от того,
+    хранятся они строками Position или упакованным треком.
+    """
+    positions = load_packed_positions(run.id)
+    if positions is None:
+        return list(Position.objects.filter(run=run).order_by("date_time", "id"))
+    return positions
+
+
+def calculate_splits(
+    distances: list[float], timestamps: list[float], split_km: float
+) -> list[float]:
+    """
+    Время с начала забега на каждой границе отрезка длиной split_km.
+
+    Момент пересечения границы находится линейной интерполяцией между соседними
+    позициями по накопленной дистанции.
+
+    Args:
+        distances (list[float]): Накопленная дистанция позиций в км, в порядке времени.
+        timestamps (list[float]): Время позиций в секундах (timestamp).
+        split_km (float): Длина отрезка в км.
+
+    Returns:
+        list[float]: Время в секундах на отметках split_km, 2 * split_km, ...
+    """
+    distances = np.maximum.accumulate(np.asarray(distances, dtype=float))
+    timestamps = np.asarray(timestamps, dtype=float)
+    start = timestamps[0]
+
+    # Пока атлет стоит, дистанция не растет. Граница отрезка пройдена в момент
+    # первого достижения дистанции, поэтому повторы отбрасываются: на повторах
+    # np.interp вернул бы время последней из позиций с той же дистанцией
+    first = np.diff(distances, prepend=-np.inf) > 0
+    distances, timestamps = distances[first], timestamps[first]
+
+    boundaries = np.arange(1, int(distances[-1] / split_km + 1e-9) + 1) * split_km
+    times = np.interp(boundaries, distances, timestamps) - start
+    return [round(float(value), 1) for value in times]
+
+
+def store_run_splits(
+    run: Run, positions: list[Position] | None = None
+) -> RunSplits | None:
+    """
+    Рассчитывает и сохраняет сплиты забега по километрам и милям.
+    Позиции забега можно передать, если они уже загружены.
+
+    Returns:
+        RunSplits | None: Сплиты или None, если у забега меньше двух позиций
+                          или у позиций нет времени.
+    """
+    if positions is None:
+        positions = get_run_positions(run)
+    if len(positions) < 2 or any(position.date_time is None for position in positions):
+        return None
+
+    distances = [position.distance for position in positions]
+    timestamps = [position.date_time.timestamp() for position in positions]
+
+    splits, _ = RunSplits.objects.update_or_create(
+        run=run,
+        defaults={
+            field: calculate_splits(distances, timestamps, split_km)
+            for field, split_km in SPLIT_DISTANCES_KM.items()
+        },
+    )
+    return splits
+
+
+def rate_coach(coach, athlete, rating: int) -> None:
+    """
+    Сохраняет оценку тренера от атлета и в той же транзакции обновляет
+    сумму, количество, распределение и среднее оценок в статистике тренера.
+
+    При повторной оценке тем же атлетом количество не меняется, сумма
+    корректируется на разницу между новой и прежней оценкой, а в распределении
+    оценка переносится из прежней звезды в новую.
+    """
+    with transaction.atomic():
+        # Блокировка статистики тренера сериализует параллельные оценки
+        stats, _ = UserStats.objects.select_for_update().get_or_create(user=coach)
+
+        previous = (
+            CoachRating.objects.filter(coach=coach, athlete=athlete)
+            .values_list("rating", flat=True)
+            .first()
+        )
+
+        CoachRating.objects.update_or_create(
+            coach=coach, athlete=athlete, defaults={"rating": rating}
+        )
+
+        if previous is None:
+            stats.rating_count += 1
+            stats.rating_sum += rating
+        else:
+            stats.rating_sum += rating - previous
+            # Прежняя оценка уходит из распределения
+            field = f"rating_{previous}"
+            setattr(stats, field, getattr(stats, field) - 1)
+
+        field = f"rating_{rating}"
+        setattr(stats, field, getattr(stats, field) + 1)
+        stats.rating_avg = stats.rating
+        stats.save()
+
+
+def coach_analytics(
+    coach, date_from=None, date_to=None, top: int = 1
+) -> dict[str, list[dict]]:
+    """
+    Лучшие атлеты тренера по самому длинному забегу, суммарной дистанции
+    и средней скорости одним запросом.
+
+    Места атлетов по каждому показателю считаются оконными функциями, а в выборку
+    попадают только атлеты, вошедшие в top хотя бы по одному показателю.
+    Без периода используются накопленные показатели (UserStats), с периодом —
+    завершенные забеги, созданные в этот период.
+
+    Args:
+        coach (User): Тренер.
+        date_from (datetime | None): Начало периода включительно.
+        date_to (datetime | None): Конец периода не включительно.
+        top (int): Количество мест в каждом списке.
+
+    Returns:
+        dict: Для каждого ключа COACH_ANALYTICS_METRICS — список
+              [{"user": id атлета, "value": значение}, ...] по убыванию значения.
+    """
+    if date_from is None and date_to is None:
+        athletes = UserStats.objects.filter(
+            user__athlete_subscriptions__coach=coach, runs_finished__gt=0
+        ).values(
+            athlete_id=F("user_id"),
+            longest=F("distance_max"),
+            total=F("distance_total"),
+            speed=Cast("speed_sum", FloatField()) / F("runs_finished"),
+        )
+    else:
+        runs = Run.objects.filter(status="finished", athlete_id=OuterRef("athlete_id"))
+        if date_from is not None:
+            runs = runs.filter(created_at__gte=date_from)
+        if date_to is not None:
+            runs = runs.filter(created_at__lt=date_to)
+
+        def aggregate(expression):
+            # Показатель атлета за период — коррелированный подзапрос по его забегам
+            return Subquery(
+                runs.values("athlete_id").annotate(value=expression).values("value")
+            )
+
+        # Группировка вынесена в подзапросы: оконные функции поверх GROUP BY
+        # не позволяют отобрать строки по лучшему из нескольких мест
+        athletes = (
+            Subscribe.objects.filter(coach=coach)
+            .values("athlete_id")
+            .annotate(
+                longest=aggregate(Max("distance")),
+                total=aggregate(Sum("distance")),
+                speed=aggregate(Avg("speed")),
+            )
+            .filter(longest__isnull=False)
+        )
+
+    # Место атлета по каждому показателю, при равенстве выше атлет с меньшим id
+    ranks = {
+        f"{field}_rank": Window(
+            RowNumber(), order_by=[F(field).desc(), F("athlete_id").asc()]
+        )
+        for field in COACH_ANALYTICS_METRICS.values()
+    }
+    rows = (
+        athletes.annotate(**ranks)
+        .annotate(best_rank=Least(*ranks))
+        .filter(best_rank__lte=top)
+    )
+
+    result = {key: [] for key in COACH_ANALYTICS_METRICS}
+    for row in rows:
+        for key, field in COACH_ANALYTICS_METRICS.items():
+            if row[f"{field}_rank"] <= top:
+                result[key].append(
+                    (
+                        row[f"{field}_rank"],
+                        {"user": row["athlete_id"], "value": row[field]},
+                    )
+                )
+
+    return {
+        key: [entry for _, entry in sorted(entries, key=lambda e: e[0])]
+        for key, entries in result.items()
+    }
+
+
+def rebuild_run_tail(run: Run) -> RunTail:
+    """
+    Собирает хвостовое состояние забега заново по сохраненным позициям.
+
+    Возвращает несохраненный экземпляр RunTail, чтобы его можно было сравнить
+    с текущим состоянием.
+    """
+    positions = get_run_positions(run)
+
+    tail = RunTail(run=run)
+    if not positions:
+        return tail
+
+    if len(positions) > 1:
+        tail.distance = calculate_route_distance(
+            [
+                {"latitude": position.latitude, "longitude": position.longitude}
+                for position in positions
+            ]
+        )
+
+    last = positions[-1]
+    tail.latitude = last.latitude
+    tail.longitude = last.longitude
+    tail.date_time = last.date_time
+    tail.first_date_time = positions[0].date_time
+    tail.speed_sum = sum(position.speed for position in positions)
+    tail.points_count = len(positions)
+    return tail
+
+
+def refresh_run_tail(run_id: int) -> RunTail:
+    """
+    Пересобирает и сохраняет хвостовое состояние забега после изменения
+    или удаления его позиций в обход append_positions.
+    """
+    with transaction.atomic():
+        # Блокировка хвоста ставит пересчет в очередь с параллельными вставками
+        RunTail.objects.select_for_update().get_or_create(run_id=run_id)
+        tail = rebuild_run_tail(Run.objects.get(pk=run_id))
+        tail.save()
+    return tail
+
+
+def get_catalog_version() -> int:
+    """
+    Возвращает текущую версию каталога предметов.
+
+    Версия хранится в кэше Django, чтобы ее видели все процессы приложения
+    (при нескольких процессах кэш должен быть общим). Если ключа нет, версия
+    инициализируется текущим временем, чтобы не совпасть с уже выданными.
+    """
+    cache.add(CATALOG_VERSION_CACHE_KEY, time.time_ns())
+    return cache.get(CATALOG_VERSION_CACHE_KEY)
+
+
+def bump_catalog_version() -> None:
+    """
+    Увеличивает версию каталога предметов, инвалидируя пространственные индексы
+    """
+    try:
+        cache.incr(CATALOG_VERSION_CACHE_KEY)
+    except ValueError:
+        # Ключ вытеснен из кэша — любая новая версия отличается от старых
+        cache.set(CATALOG_VERSION_CACHE_KEY, time.time_ns())
+
+
+def get_collectible_index() -> GridIndex:
+    """
+    Возвращает пространственный индекс каталога предметов для текущего процесса.
+
+    Индекс перестраивается, только если с момента построения изменилась версия каталога.
+    """
+    global _collectible_index
+
+    version = get_catalog_version()
+    if _collectible_index is None or _collectible_index[0] != version:
+        items = CollectibleItem.objects.values_list("id", "latitude", "longitude")
+        _collectible_index = (version, GridIndex(items.iterator()))
+
+    return _collectible_index[1]
+
+
+def get_owned_items(run: Run) -> set[int]:
+    """
+    Id предметов, которые уже есть у атлета забега.
+
+    Набор читается из БД один раз за забег и хранится в кэше до его завершения:
+    предметы атлету начисляет только award_collectible_items, которая дополняет
+    набор сама. Кэш только отсекает уже полученные предметы до расчета расстояний:
+    если он отстал (например, при кэше в памяти процесса предмет начислен
+    в другом процессе), находки сверяются с БД, а ценность предметов
+    в таблице лидеров пересчитывается по БД (см. record_items_value).
+    """
+    key = OWNED_ITEMS_CACHE_KEY.format(run_id=run.pk)
+    owned = cache.get(key)
+    if owned is None:
+        owned = set(
+            CollectibleItem.athlete.through.objects.filter(
+                user_id=run.athlete_id
+            ).values_list("collectibleitem_id", flat=True)
+        )
+        cache.set(key, owned, settings.OWNED_ITEMS_CACHE_TIMEOUT)
+    return owned
+
+
+def award_collectible_items(run: Run, positions: list[Position]) -> None:
+    """
+    Начисляет атлету предметы, к которым он приблизился хотя бы в одной из точек.
+
+    Кандидаты для каждой точки берутся из соседних ячеек пространственного
+    индекса, уже полученные атлетом предметы (get_owned_items) отбрасываются
+    до расчета расстояний. Расстояния до всех оставшихся кандидатов считаются
+    одним векторизованным вызовом, а новые предметы записываются в связующую
+    таблицу одним bulk insert с пропуском конфликтов. Таблица лидеров по ценности
+    предметов обновляется задачей очереди "collectible_items_awarded".
+    """
+    index = get_collectible_index()
+    owned = get_owned_items(run)
+
+    # Пары (точка, предмет-кандидат) для еще не полученных предметов
+    pairs = [
+        (position.latitude, position.longitude, item_id, latitude, longitude)
+        for position in positions
+        for item_id, latitude, longitude in index.candidates(
+            position.latitude, position.longitude, COLLECTIBLE_PICKUP_RADIUS_METERS
+        )
+        if item_id not in owned
+    ]
+    if not pairs:
+        return
+
+    point_latitudes, point_longitudes, item_ids, latitudes, longitudes = zip(*pairs)
+    distances = pair_distances(
+        point_latitudes,
+        point_longitudes,
+        latitudes,
+        longitudes,
+        mode=settings.ROUTE_DISTANCE_MODE,
+    )
+    new = {
+        item_id
+        for item_id, distance in zip(item_ids, distances)
+        if distance < COLLECTIBLE_PICKUP_RADIUS_METERS
+    }
+    if not new:
+        return
+
+    # Кэш мог отстать (предмет начислен в другом процессе или в админке), поэтому
+    # находки сверяются с БД: это запрос только в редком случае нового предмета
+    through = CollectibleItem.athlete.through
+    new -= set(
+        through.objects.filter(
+            user_id=run.athlete_id, collectibleitem_id__in=new
+        ).values_list("collectibleitem_id", flat=True)
+    )
+    if not new:
+        return
+
+    through.objects.bulk_create(
+        [
+            through(user_id=run.athlete_id, collectibleitem_id=item_id)
+            for item_id in new
+        ],
+        ignore_conflicts=True,
+    )
+    # Кэш дополняется после фиксации, чтобы откат не оставил в нем лишних предметов
+    key = OWNED_ITEMS_CACHE_KEY.format(run_id=run.pk)
+    transaction.on_commit(
+        lambda: cache.set(key, owned | new, settings.OWNED_ITEMS_CACHE_TIMEOUT)
+    )
+
+    enqueue(
+        "collectible_items_awarded",
+        user_id=run.athlete_id,
+        item_ids=sorted(new),
+        day=timezone.localdate().isoformat(),
+    )
+
+
+@job_handler("collectible_items_awarded")
+def record_items_value(user_id: int, item_ids: list[int], day: str) -> None:
+    """
+    Учитывает суммарную ценность полученных предметов в таблице лидеров.
+    Выполняется воркером очереди задач, а не в запросе с позициями.
+
+    Ценность считается по всем предметам атлета в БД, а в таблицу добавляется
+    разница с текущим результатом (под блокировкой результата). Поэтому задача
+    идемпотентна: предмет, о котором сообщили две задачи (повтор задачи или
+    одновременное начисление в двух процессах с устаревшим кэшем), учитывается
+    один раз. item_ids — новые предметы, о которых сообщает задача.
+    """
+    day = date.fromisoformat(day)
+    entry = (
+        LeaderboardEntry.objects.select_for_update()
+        .filter(
+            user_id=user_id,
+            board="items_value",
+            period="all",
+            period_start=period_start("all", day),
+        )
+        .first()
+    )
+    total = CollectibleItem.objects.filter(athlete=user_id).aggregate(
+        total=Sum("value")
+    )["total"]
+
+    difference = (total or 0) - (entry.score if entry else 0)
+    if difference:
+        record_leaderboards(user_id, day, {"items_value": difference})
+
+
+def collectibles_in_box(
+    queryset: QuerySet[CollectibleItem], box: BoundingBox
+) -> QuerySet[CollectibleItem]:
+    """
+    Предметы внутри прямоугольника: условия по диапазонам широты и долготы
+    читают индексы latitude/longitude. Прямоугольник через антимеридиан
+    дает два диапазона долгот.
+    """
+    longitude = Q()
+    for low, high in box.longitude_ranges():
+        longitude |= Q(longitude__range=(low, high))
+    return queryset.filter(
+        longitude, latitude__range=(box.min_latitude, box.max_latitude)
+    )
+
+
+def collectibles_near(
+    queryset: QuerySet[CollectibleItem],
+    latitude: float,
+    longitude: float,
+    radius_meters: float,
+) -> list[CollectibleItem]:
+    """
+    Предметы не дальше radius_meters от точки, от ближних к дальним.
+
+    Кандидаты выбираются по описанному прямоугольнику (collectibles_in_box),
+    точное расстояние до них считается одним векторизованным вызовом.
+    У каждого предмета заполняется атрибут distance (метры).
+    """
+    box = bounding_box(latitude, longitude, radius_meters * BOUNDING_BOX_MARGIN)
+    items = list(collectibles_in_box(queryset, box))
+
+    distances = point_distances(
+        latitude,
+        longitude,
+        [item.latitude for item in items],
+        [item.longitude for item in items],
+        mode=settings.ROUTE_DISTANCE_MODE,
+    )
+
+    nearby = []
+    for index in np.argsort(distances, kind="stable"):
+        if distances[index] > radius_meters:
+            break
+        item = items[index]
+        item.distance = round(float(distances[index]), 1)
+        nearby.append(item)
+    return nearby
+
+
+def simplify_run_track(
+    run: Run, tolerance_meters: float | None = None, max_points: int | None = None
+) -> list[Position]:
+    """
+    Возвращает упрощенный трек забега: позиции в порядке времени, оставшиеся после
+    упрощения по допустимому отклонению и/или максимальному количеству точек
+    (см. geo.simplify_track).
+    """
+    positions = get_run_positions(run)
+    if not positions:
+        return []
+
+    indices = simplify_track(
+        [position.latitude for position in positions],
+        [position.longitude for position in positions],
+        tolerance_meters=tolerance_meters,
+        max_points=max_points,
+    )
+    return [positions[index] for index in indices]
+
+
+def get_track_cache_key(
+    run_id: int, tolerance_meters: float | None, max_points: int | None
+) -> str:
+    """
+    Ключ кэша упрощенного трека. В ключ входит версия трека забега, поэтому
+    после bump_track_version старые записи перестают использоваться.
+    """
+    version_key = TRACK_VERSION_CACHE_KEY.format(run_id=run_id)
+    cache.add(version_key, time.time_ns())
+    return TRACK_CACHE_KEY.format(
+        run_id=run_id,
+        version=cache.get(version_key),
+        tolerance=tolerance_meters,
+        max_points=max_points,
+    )
+
+
+def bump_track_version(run_id: int) -> None:
+    """
+    Инвалидирует закэшированные упрощенные треки забега
+    """
+    version_key = TRACK_VERSION_CACHE_KEY.format(run_id=run_id)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        cache.set(version_key, time.time_ns())
+
+
+def read_excel_file(uploaded_file, detailed: bool = False) -> list:
+    """
+    Потоково импортирует каталог предметов из xlsx-файла.
+
+    Файл читается в режиме read-only openpyxl построчно, строки валидируются
+    и записываются пачками по IMPORT_CHUNK_SIZE: каждая пачка — один upsert по uid
+    (новые предметы создаются, существующие обновляются). Память не зависит
+    от размера файла.
+
+    Args:
+        uploaded_file: Загруженный файл (любой file-like объект с seek).
+        detailed (bool): Формат ошибок. False — список значений невалидных строк,
+                         True — словари с номером строки, значениями и ошибками полей.
+
+    Returns:
+        list: Невалидные строки в выбранном формате.
+    """
+    # Загружаем файл в режиме только для чтения, строки читаются по мере обхода
+    wb = load_workbook(uploaded_file, read_only=True, data_only=True)
 
     # Создаем пустой список для хранения не валидных данных
     data_error = []
 
-    # Получаем данные из листа
-    for row in worksheet.iter_rows(values_only=True, min_row=2, max_row=max_row):
-        # Присваиваем значения переменным
-        name, uid, value, latitude, longitude, picture = row
+    try:
+        # Получаем активный лист
+        worksheet = wb.active
+
+        chunk = []
+        for row_number, row in enumerate(
+            worksheet.iter_rows(values_only=True, min_row=2), start=2
+        ):
+            # Пропускаем полностью пустые строки
+            if all(value is None for value in row):
+                continue
+
+            chunk.append((row_number, row))
+            if len(chunk) >= IMPORT_CHUNK_SIZE:
+                data_error += _import_collectible_chunk(chunk, detailed)
+                chunk = []
+
+        if chunk:
+            data_error += _import_collectible_chunk(chunk, detailed)
+    finally:
+        wb.close()
+
+    # bulk-операции не вызывают сигналы моделей, поэтому инвалидируем индекс явно
+    bump_catalog_version()
+
+    return data_error
+
+
+def _import_collectible_chunk(chunk: list[tuple[int, tuple]], detailed: bool) -> list:
+    """
+    Валидирует пачку строк каталога и записывает валидные одним upsert по uid.
+    """
+    # Импорт внутри функции, чтобы избежать circular import с пакетом сериализаторов
+    from app_run.serializers.collectible import CollectibleItemImportSerializer
+
+    # Один экземпляр сериализатора валидирует все строки пачки
+    validator = CollectibleItemImportSerializer()
+
+    data_error = []
+    items_by_uid = {}
+
+    for row_number, row in chunk:
+        # Лишние колонки отбрасываем, недостающие считаем пустыми
+        values = (tuple(row) + (None,) * IMPORT_COLUMNS_COUNT)[:IMPORT_COLUMNS_COUNT]
+        name, uid, value, latitude, longitude, picture = values
 
         # Формируем словарь для сериализации
         data = {
@@ -102,15 +1119,27 @@ def read_excel_file(uploaded_file):
             "picture": picture,
         }
 
-        # Отправляем данные на сериализацию
-        serializer = CollectibleItemSerializer(data=data)
-
-        # Проверяем валидность данных, если данные валидны, сохраняем их в базе данных
-        if serializer.is_valid():
-            # Сохраняем данные в базе данных
-            serializer.save()
-        else:
+        try:
+            validated_data = validator.run_validation(data)
+        except ValidationError as error:
             # Если данные не валидны, добавляем их в список ошибок
-            data_error.append(list(row))
+            if detailed:
+                data_error.append(
+                    {"row": row_number, "values": list(values), "errors": error.detail}
+                )
+            else:
+                data_error.append(list(row))
+            continue
+
+        # При повторе uid в файле побеждает последняя строка
+        items_by_uid[validated_data["uid"]] = CollectibleItem(**validated_data)
+
+    # Upsert по uid: новые предметы создаются, существующие обновляются одним запросом
+    CollectibleItem.objects.bulk_create(
+        items_by_uid.values(),
+        update_conflicts=True,
+        unique_fields=["uid"],
+        update_fields=["name", "value", "latitude", "longitude", "picture"],
+    )
 
     return data_error
@@ -0,0 +1,40 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from app_run.challenges import invalidate_challenge_summary
+from app_run.models import Challenge, CollectibleItem
+from app_run.services import bump_catalog_version
+
+# Поля пользователя, которые выводятся в сводке челленджей
+SUMMARY_USER_FIELDS = {"first_name", "last_name", "username"}
+
+
+@receiver(post_save, sender=CollectibleItem)
+@receiver(post_delete, sender=CollectibleItem)
+def collectible_catalog_changed(sender, **kwargs):
+    """
+    Любое изменение предмета каталога инвалидирует пространственные индексы
+    """
+    bump_catalog_version()
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def challenge_changed(sender, **kwargs):
+    """
+    Изменение челленджа вне award_challenges (например, в админке) сбрасывает
+    кэш сводки челленджей
+    """
+    invalidate_challenge_summary()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, update_fields=None, **kwargs):
+    """
+    Сводка челленджей содержит имена атлетов, поэтому их изменение сбрасывает кэш.
+    Сохранение других полей (например, last_login при входе) кэш не трогает.
+    """
+    if update_fields is None or SUMMARY_USER_FIELDS & set(update_fields):
+        invalidate_challenge_summary()
@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+
+from app_run.jobs import claim_jobs, run_job
+from app_run.middleware import fingerprint, route_key
+
+
+class QueryBudgetMixin:
+    """
+    Примесь для тестов (TestCase/APITestCase) с проверкой бюджета SQL-запросов.
+
+    Пример:
+        class UsersApiTests(QueryBudgetMixin, APITestCase):
+            def test_users_list(self):
+                self.assertWithinQueryBudget("get", "/api/users/")
+    """
+
+    def assertWithinQueryBudget(self, method: str, path: str, budget=None, **kwargs):
+        """
+        Выполняет запрос тестовым клиентом и проверяет, что количество запросов
+        к БД не превышает бюджет маршрута из QUERY_BUDGETS (или явно переданный).
+        Возвращает ответ.
+        """
+        route = route_key(method.upper(), resolve(path.split("?")[0]).route)
+        if budget is None:
+            budget = settings.QUERY_BUDGETS.get(route)
+        if budget is None:
+            self.fail(f"Для маршрута {route} не задан бюджет в QUERY_BUDGETS")
+
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, method.lower())(path, **kwargs)
+
+        if len(context.captured_queries) > budget:
+            fingerprints = [
+                fingerprint(query["sql"]) for query in context.captured_queries
+            ]
+            duplicates = sorted(
+                {sql for sql in fingerprints if fingerprints.count(sql) > 1}
+            )
+            queries = "\n".join(
+                f"{i}. {query['sql']}"
+                for i, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(
+                f"{route}: {len(context.captured_queries)} запросов к БД при бюджете {budget}\n"
+                f"{queries}\n"
+                f"Повторяющиеся запросы:\n" + "\n".join(duplicates)
+            )
+
+        return response
+
+
+def run_pending_jobs() -> int:
+    """
+    Выполняет задачи очереди, пока она не опустеет, включая задачи, поставленные
+    другими задачами (например, "run_heatmap" из "run_finished").
+
+    Returns:
+        int: Количество выполненных задач.
+    """
+    count = 0
+    while job_ids := claim_jobs(100):
+        for job_id in job_ids:
+            run_job(job_id)
+        count += len(job_ids)
+    return count
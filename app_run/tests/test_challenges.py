@@ -0,0 +1,97 @@
+import json
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from app_run.challenges import (
+    CHALLENGE_SUMMARY_CACHE_KEY,
+    CHALLENGE_SUMMARY_VERSION_KEY,
+    award_challenges,
+    get_summary_cache,
+)
+from app_run.jobs import claim_jobs, run_job
+from app_run.models import CacheVersion, Challenge, Run, UserStats
+from app_run.services import finish_run
+
+
+class AwardChallengesTests(TestCase):
+    def setUp(self):
+        self.athlete = User.objects.create(username="runner")
+
+    def test_awards_reached_rules_once(self):
+        counters = {
+            "runs_finished": 10,
+            "distance_total": 12.0,
+            "run_distance": 2.5,
+            "run_time_seconds": 540,
+        }
+
+        reached = award_challenges(self.athlete.id, counters)
+        award_challenges(self.athlete.id, counters)
+
+        self.assertEqual(
+            sorted(reached), ["2 километра за 10 минут!", "Сделай 10 Забегов!"]
+        )
+        self.assertEqual(
+            sorted(
+                Challenge.objects.filter(athlete=self.athlete).values_list(
+                    "full_name", flat=True
+                )
+            ),
+            sorted(reached),
+        )
+
+    def test_nothing_reached(self):
+        counters = {
+            "runs_finished": 1,
+            "distance_total": 1.0,
+            "run_distance": 1.0,
+            "run_time_seconds": 600,
+        }
+
+        with self.assertNumQueries(0):
+            self.assertEqual(award_challenges(self.athlete.id, counters), [])
+
+
+class ChallengeSummaryTests(TestCase):
+    def setUp(self):
+        get_summary_cache().clear()
+        self.athlete = User.objects.create(username="runner")
+
+    def summary(self) -> dict:
+        response = self.client.get("/api/challenges_summary/")
+        self.assertEqual(response.status_code, 200)
+        return {
+            item["name_to_display"]: [athlete["id"] for athlete in item["athletes"]]
+            for item in response.json()
+        }
+
+    def test_summary_changes_after_award_by_worker(self):
+        UserStats.objects.create(user=self.athlete, runs_finished=9)
+        run = Run.objects.create(athlete=self.athlete, comment="", status="in_progress")
+        self.assertEqual(self.summary(), {})
+        old_key = CHALLENGE_SUMMARY_CACHE_KEY.format(
+            version=CacheVersion.objects.get(key=CHALLENGE_SUMMARY_VERSION_KEY).version
+        )
+        cached = get_summary_cache().get(old_key)
+
+        # Челлендж начисляет воркер очереди задач
+        finish_run(run)
+        for job_id in claim_jobs(10):
+            run_job(job_id)
+
+        self.assertEqual(self.summary(), {"Сделай 10 Забегов!": [self.athlete.id]})
+        # Старая сводка не удалялась из кэша процесса: новая выбрана по версии из БД,
+        # поэтому сброс в воркере виден и другим процессам
+        self.assertEqual(json.loads(cached), [])
+        self.assertEqual(get_summary_cache().get(old_key), cached)
+
+    def test_summary_changes_after_rename(self):
+        Challenge.objects.create(athlete=self.athlete, full_name="Сделай 10 Забегов!")
+        self.summary()
+
+        self.athlete.first_name = "Иван"
+        self.athlete.save(update_fields=["first_name"])
+
+        response = self.client.get("/api/challenges_summary/").json()
+        self.assertEqual(response[0]["athletes"][0]["full_name"], "Иван")
@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.test import TestCase
+from geopy.distance import geodesic
+
+from app_run.models import CollectibleItem
+
+URL = "/api/collectible_item/"
+
+# Предметы: по обе стороны антимеридиана, на нулевом меридиане и на полюсе
+ITEMS = {
+    "east": (10.0, 179.9),
+    "west": (10.0, -179.95),
+    "far_west": (10.0, -170.0),
+    "origin": (0.0, 0.0),
+    "pole": (90.0, 0.0),
+}
+
+
+class CollectibleSearchTests(TestCase):
+    def setUp(self):
+        for name, (latitude, longitude) in ITEMS.items():
+            CollectibleItem.objects.create(
+                name=name,
+                uid=name,
+                latitude=latitude,
+                longitude=longitude,
+                picture="https://example.com/item.png",
+                value=1,
+            )
+
+    def names(self, query: str) -> list[str]:
+        response = self.client.get(f"{URL}?{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+        return [item["name"] for item in response.json()]
+
+    def test_near_sorted_by_distance(self):
+        response = self.client.get(f"{URL}?near=10,179.99&radius=20000")
+
+        items = response.json()
+        self.assertEqual([item["name"] for item in items], ["west", "east"])
+        for item in items:
+            expected = geodesic((10.0, 179.99), ITEMS[item["name"]]).meters
+            self.assertAlmostEqual(item["distance"], expected, delta=0.1)
+
+    def test_near_radius_cap(self):
+        limit = settings.COLLECTIBLE_NEAR_MAX_RADIUS
+
+        allowed = self.client.get(f"{URL}?near=10,179.99&radius={limit}")
+        too_large = self.client.get(f"{URL}?near=10,179.99&radius={limit + 1}")
+        negative = self.client.get(f"{URL}?near=10,179.99&radius=-1")
+
+        self.assertEqual(allowed.status_code, 200)
+        self.assertEqual([item["name"] for item in allowed.json()], ["west", "east"])
+        for response in (too_large, negative):
+            self.assertEqual(response.status_code, 400)
+            self.assertIn("radius", response.json())
+
+    def test_invalid_parameters(self):
+        cases = {
+            "near=55.75": "near",
+            "near=55.75,37.61,1": "near",
+            "near=north,east": "near",
+            "near=91,0": "near",
+            "near=0,180.5": "near",
+            "near=nan,0": "near",
+            "near=0,inf": "near",
+            "near=0,0&radius=far": "radius",
+            "bbox=1,2,3": "bbox",
+            "bbox=a,b,c,d": "bbox",
+            "bbox=0,10,1,5": "bbox",
+            "bbox=0,-91,1,0": "bbox",
+            "bbox=-181,0,0,1": "bbox",
+            "bbox=0,nan,1,1": "bbox",
+        }
+        for query, field in cases.items():
+            with self.subTest(query=query):
+                response = self.client.get(f"{URL}?{query}")
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(field, response.json())
+
+    def test_bbox_across_antimeridian(self):
+        self.assertEqual(sorted(self.names("bbox=179.5,5,-179.5,15")), ["east", "west"])
+        self.assertEqual(
+            sorted(self.names("bbox=179,5,-169,15")), ["east", "far_west", "west"]
+        )
+        # Тот же прямоугольник без пересечения антимеридиана — почти весь мир
+        self.assertEqual(sorted(self.names("bbox=-179.5,5,179.5,15")), ["far_west"])
+
+    def test_degenerate_bbox(self):
+        # Прямоугольник нулевой площади совпадает с точкой предмета
+        self.assertEqual(self.names("bbox=0,0,0,0"), ["origin"])
+        self.assertEqual(self.names("bbox=0,0,0.001,0"), ["origin"])
+        self.assertEqual(self.names("bbox=1,1,1,1"), [])
+        # Прямоугольник по всем долготам у полюса
+        self.assertEqual(self.names("bbox=-180,89,180,90"), ["pole"])
+
+    def test_bbox_and_near_together(self):
+        self.assertEqual(
+            self.names("bbox=179.5,5,180,15&near=10,179.99&radius=20000"), ["east"]
+        )
@@ -0,0 +1,31 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase
+
+from app_run.models import Position, Run, RunTail
+
+
+class CompareDistanceModesTests(TestCase):
+    def test_checks_runs_without_tail(self):
+        athlete = User.objects.create(username="runner")
+        run = Run.objects.create(athlete=athlete, comment="", status="finished")
+        start = datetime(2025, 5, 1, 8, 0, tzinfo=timezone.utc)
+        Position.objects.bulk_create(
+            Position(
+                run=run,
+                latitude=55.75 + i * 0.001,
+                longitude=37.61,
+                date_time=start + timedelta(seconds=30 * i),
+            )
+            for i in range(5)
+        )
+        RunTail.objects.filter(run=run).delete()
+        out = StringIO()
+
+        call_command("compare_distance_modes", stdout=out)
+
+        self.assertIn(f"Забег {run.id} (5 точек)", out.getvalue())
+        self.assertIn("Проверено забегов: 1", out.getvalue())
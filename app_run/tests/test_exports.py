@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta, timezone
+from xml.etree import ElementTree
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from app_run.models import Position, Run, RunTrack
+from app_run.services import append_positions, compact_run_track, finish_run
+from app_run.track_import import parse_track_file
+
+START = datetime(2025, 5, 1, 8, 0, 0, 250000, tzinfo=timezone.utc)
+GPX_NAMESPACE = "{http://www.topografix.com/GPX/1/1}"
+POINTS_COUNT = 25
+
+
+@override_settings(EXPORT_CHUNK_SIZE=7)
+class ExportRunTests(TestCase):
+    def setUp(self):
+        athlete = User.objects.create(username="runner")
+        self.run = Run.objects.create(
+            athlete=athlete, comment='<утро> & "дождь"', status="in_progress"
+        )
+        append_positions(
+            self.run,
+            [
+                {
+                    "latitude": 55.75 + i * 0.0001,
+                    "longitude": 37.61 - i * 0.00005,
+                    "date_time": START + timedelta(seconds=5 * i),
+                }
+                for i in range(POINTS_COUNT)
+            ],
+        )
+        finish_run(self.run)
+        self.positions = list(
+            Position.objects.filter(run=self.run)
+            .order_by("date_time", "id")
+            .values_list("latitude", "longitude", "date_time", "speed", "distance")
+        )
+
+    def download(self, export_format: str) -> list[bytes]:
+        response = self.client.get(
+            f"/api/runs/{self.run.id}/export/?format={export_format}"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return list(response.streaming_content)
+
+    def csv_rows(self) -> list[dict]:
+        content = b"".join(self.download("csv")).decode()
+        return list(csv.DictReader(io.StringIO(content)))
+
+    def test_large_track_streamed_in_chunks(self):
+        chunks = self.download("csv")
+
+        # Заголовок и 25 строк порциями по EXPORT_CHUNK_SIZE строк
+        self.assertEqual(len(chunks), 4)
+        self.assertEqual([chunk.decode().count("\n") for chunk in chunks], [7, 7, 7, 5])
+
+    def test_gpx_is_valid_and_roundtrips(self):
+        content = b"".join(self.download("gpx"))
+
+        root = ElementTree.fromstring(content)
+        self.assertEqual(root.tag, f"{GPX_NAMESPACE}gpx")
+        self.assertEqual(
+            root.find(f"{GPX_NAMESPACE}trk/{GPX_NAMESPACE}desc").text, self.run.comment
+        )
+        self.assertEqual(len(root.findall(f".//{GPX_NAMESPACE}trkpt")), POINTS_COUNT)
+        # Выгруженный файл читается импортом трека без потерь
+        points = list(parse_track_file(io.BytesIO(content)))
+        self.assertEqual(
+            [
+                (point["latitude"], point["longitude"], point["date_time"])
+                for point in points
+            ],
+            [position[:3] for position in self.positions],
+        )
+
+    def test_csv_is_valid(self):
+        rows = self.csv_rows()
+
+        self.assertEqual(len(rows), POINTS_COUNT)
+        for row, position in zip(rows, self.positions):
+            latitude, longitude, date_time, speed, distance = position
+            self.assertEqual(float(row["latitude"]), latitude)
+            self.assertEqual(float(row["longitude"]), longitude)
+            self.assertEqual(datetime.fromisoformat(row["date_time"]), date_time)
+            self.assertEqual(float(row["speed"]), speed)
+            self.assertEqual(float(row["distance"]), distance)
+
+    def test_geojson_is_valid(self):
+        feature = json.loads(b"".join(self.download("geojson")))
+
+        self.assertEqual(feature["properties"]["run"], self.run.id)
+        self.assertEqual(
+            feature["geometry"]["coordinates"],
+            [[longitude, latitude] for latitude, longitude, *_ in self.positions],
+        )
+
+    def test_compacted_run(self):
+        before = self.csv_rows()
+
+        compact_run_track(self.run.id)
+
+        self.assertTrue(RunTrack.objects.filter(run=self.run).exists())
+        self.assertFalse(Position.objects.filter(run=self.run).exists())
+        after = self.csv_rows()
+        self.assertEqual(len(after), POINTS_COUNT)
+        for row, expected in zip(after, before):
+            # Упакованный трек хранит время точно, а координаты, скорость
+            # и дистанцию — с фиксированной точностью
+            self.assertEqual(row["date_time"], expected["date_time"])
+            for field, places in (
+                ("latitude", 7),
+                ("longitude", 7),
+                ("speed", 2),
+                ("distance", 2),
+            ):
+                self.assertAlmostEqual(
+                    float(row[field]), float(expected[field]), places=places
+                )
+        points = list(parse_track_file(io.BytesIO(b"".join(self.download("gpx")))))
+        self.assertEqual(len(points), POINTS_COUNT)
+
+    def test_unknown_format_and_run(self):
+        response = self.client.get(f"/api/runs/{self.run.id}/export/?format=kml")
+        missing = self.client.get(f"/api/runs/{self.run.id + 1}/export/")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(missing.status_code, 404)
@@ -0,0 +1,211 @@
+import random
+
+import numpy as np
+from django.test import SimpleTestCase
+from geopy.distance import geodesic, great_circle
+
+from app_run.geo import (
+    EARTH_RADIUS_METERS,
+    GridIndex,
+    pair_distances,
+    segment_distances,
+    simplify_track,
+)
+
+# Пары точек: соседние позиции трека, длинные отрезки, полюс, антимеридиан, экватор
+DISTANCE_CASES = [
+    ((55.7558, 37.6173), (55.75581, 37.61735)),
+    ((55.7558, 37.6173), (59.9343, 30.3351)),
+    ((0.0, 0.0), (0.0, 1.0)),
+    ((-33.8688, 151.2093), (51.5074, -0.1278)),
+    ((89.9, 0.0), (89.9, 180.0)),
+    ((10.0, 179.999), (10.0, -179.999)),
+    ((-45.0, -70.0), (-45.0, -70.0)),
+]
+
+
+class GridIndexTests(SimpleTestCase):
+    def test_item_inside_radius_across_cell_boundary(self):
+        # Предмет в соседней ячейке (граница 0.01°) ближе 100 м по эллипсоиду,
+        # но дальше 100 м по сфере, на которой строится прямоугольник
+        index = GridIndex([(1, 0.010002, 30.0)])
+        self.assertLess(geodesic((0.0091, 30.0), (0.010002, 30.0)).meters, 100)
+
+        candidates = list(index.candidates(0.0091, 30.0, 100))
+
+        self.assertEqual([item_id for item_id, *_ in candidates], [1])
+
+    def test_candidates_contain_all_points_within_radius(self):
+        rng = random.Random(7)
+        points = [
+            (i, rng.uniform(-0.05, 0.05), 179.95 + rng.uniform(-0.1, 0.1))
+            for i in range(500)
+        ]
+        points = [
+            (i, latitude, (longitude + 180.0) % 360.0 - 180.0)
+            for i, latitude, longitude in points
+        ]
+        index = GridIndex(points)
+
+        for _ in range(20):
+            latitude = rng.uniform(-0.04, 0.04)
+            longitude = (179.95 + rng.uniform(-0.08, 0.08) + 180.0) % 360.0 - 180.0
+            expected = {
+                i
+                for i, lat, lon in points
+                if geodesic((latitude, longitude), (lat, lon)).meters < 300
+            }
+            found = {i for i, *_ in index.candidates(latitude, longitude, 300)}
+            self.assertLessEqual(expected, found)
+
+
+class DistanceModeTests(SimpleTestCase):
+    def setUp(self):
+        self.points1, self.points2 = zip(*DISTANCE_CASES)
+        self.lat1, self.lon1 = np.array(self.points1).T
+        self.lat2, self.lon2 = np.array(self.points2).T
+
+    def test_vincenty_matches_geopy_geodesic(self):
+        expected = [geodesic(a, b).meters for a, b in DISTANCE_CASES]
+
+        distances = pair_distances(self.lat1, self.lon1, self.lat2, self.lon2)
+
+        np.testing.assert_allclose(distances, expected, atol=1e-3)
+
+    def test_geodesic_matches_geopy_geodesic(self):
+        expected = [geodesic(a, b).meters for a, b in DISTANCE_CASES]
+
+        distances = pair_distances(
+            self.lat1, self.lon1, self.lat2, self.lon2, mode="geodesic"
+        )
+
+        np.testing.assert_allclose(distances, expected, atol=1e-6)
+
+    def test_haversine_matches_geopy_great_circle(self):
+        # geopy считает по радиусу 6371.009 км, geo — по 6371.0088 км
+        expected = [great_circle(a, b).meters for a, b in DISTANCE_CASES]
+
+        distances = pair_distances(
+            self.lat1, self.lon1, self.lat2, self.lon2, mode="haversine"
+        )
+
+        np.testing.assert_allclose(distances, expected, rtol=1e-7, atol=1e-6)
+
+    def test_segment_distances_of_track(self):
+        latitudes = [55.75, 55.751, 55.752, 55.7525]
+        longitudes = [37.61, 37.612, 37.611, 37.613]
+        expected = [
+            geodesic(a, b).meters
+            for a, b in zip(
+                zip(latitudes, longitudes), zip(latitudes[1:], longitudes[1:])
+            )
+        ]
+
+        np.testing.assert_allclose(
+            segment_distances(latitudes, longitudes), expected, atol=1e-3
+        )
+        self.assertEqual(segment_distances([55.75], [37.61]).size, 0)
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            segment_distances([0.0, 1.0], [0.0, 1.0], mode="flat")
+
+
+def random_track(count: int, seed: int = 1) -> tuple[np.ndarray, np.ndarray]:
+    # Случайное блуждание шагами до ~15 м вокруг Москвы
+    rng = np.random.default_rng(seed)
+    latitudes = 55.75 + np.cumsum(rng.normal(0, 0.0001, count))
+    longitudes = 37.61 + np.cumsum(rng.normal(0, 0.0002, count))
+    return latitudes, longitudes
+
+
+def to_meters(latitudes, longitudes) -> np.ndarray:
+    scale = np.radians(EARTH_RADIUS_METERS)
+    x = (
+        (np.asarray(longitudes) - longitudes[0])
+        * scale
+        * np.cos(np.radians(latitudes[0]))
+    )
+    y = (np.asarray(latitudes) - latitudes[0]) * scale
+    return np.column_stack((x, y))
+
+
+def segment_distance(point, a, b) -> float:
+    segment = b - a
+    length_squared = float(segment @ segment)
+    t = 0.0 if length_squared == 0 else float((point - a) @ segment) / length_squared
+    return float(np.hypot(*(point - (a + min(max(t, 0.0), 1.0) * segment))))
+
+
+def reference_simplify(points: np.ndarray, tolerance: float) -> list[int]:
+    # Классический рекурсивный алгоритм Дугласа — Пекера
+    def simplify(start: int, end: int) -> list[int]:
+        if end - start < 2:
+            return [start]
+        deviations = [
+            segment_distance(points[i], points[start], points[end])
+            for i in range(start + 1, end)
+        ]
+        farthest = int(np.argmax(deviations))
+        if deviations[farthest] <= tolerance:
+            return [start]
+        index = start + 1 + farthest
+        return simplify(start, index) + simplify(index, end)
+
+    return simplify(0, len(points) - 1) + [len(points) - 1]
+
+
+class SimplifyTrackTests(SimpleTestCase):
+    def test_matches_recursive_douglas_peucker(self):
+        latitudes, longitudes = random_track(400)
+        points = to_meters(latitudes, longitudes)
+
+        for tolerance in (0.5, 5.0, 20.0, 100.0):
+            with self.subTest(tolerance=tolerance):
+                indices = simplify_track(
+                    latitudes, longitudes, tolerance_meters=tolerance
+                )
+                self.assertEqual(
+                    indices.tolist(), reference_simplify(points, tolerance)
+                )
+
+    def test_dropped_points_within_tolerance(self):
+        latitudes, longitudes = random_track(300, seed=2)
+        points = to_meters(latitudes, longitudes)
+
+        indices = simplify_track(latitudes, longitudes, tolerance_meters=10.0)
+
+        for start, end in zip(indices, indices[1:]):
+            for i in range(start + 1, end):
+                self.assertLessEqual(
+                    segment_distance(points[i], points[start], points[end]), 10.0
+                )
+
+    def test_max_points_is_prefix_of_refinement(self):
+        latitudes, longitudes = random_track(300, seed=3)
+
+        full = simplify_track(latitudes, longitudes, max_points=300)
+        small = simplify_track(latitudes, longitudes, max_points=20)
+        larger = simplify_track(latitudes, longitudes, max_points=40)
+
+        self.assertEqual(len(full), 300)
+        self.assertEqual(len(small), 20)
+        self.assertEqual(len(larger), 40)
+        self.assertTrue(set(small) <= set(larger))
+        self.assertEqual((small[0], small[-1]), (0, 299))
+
+    def test_straight_line_keeps_endpoints(self):
+        latitudes = np.linspace(55.75, 55.76, 50)
+        longitudes = np.full(50, 37.61)
+
+        indices = simplify_track(latitudes, longitudes, tolerance_meters=0.1)
+
+        self.assertEqual(indices.tolist(), [0, 49])
+
+    def test_without_limits_returns_all_points(self):
+        latitudes, longitudes = random_track(10)
+
+        self.assertEqual(
+            simplify_track(latitudes, longitudes).tolist(), list(range(10))
+        )
+        self.assertEqual(simplify_track([55.75], [37.61], max_points=1).tolist(), [0])
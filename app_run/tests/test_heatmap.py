@@ -0,0 +1,206 @@
+import math
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from app_run import heatmap
+from app_run.geo import mercator_grid
+from app_run.heatmap import CELL_BITS, CELLS, MAX_ZOOM, MIN_ZOOM, get_tile, tile_counts
+from app_run.jobs import requeue_stale_jobs
+from app_run.models import HeatmapTile, Job, Run, RunSplits, Subscribe, UserStats
+from app_run.services import append_positions, finish_run, start_run
+from app_run.testing import run_pending_jobs
+
+
+def osm_tile(latitude: float, longitude: float, zoom: int) -> tuple[int, int]:
+    # Формула нумерации тайлов OpenStreetMap
+    size = 2**zoom
+    phi = math.radians(latitude)
+    x = int((longitude + 180.0) / 360.0 * size)
+    y = int((1.0 - math.log(math.tan(phi) + 1 / math.cos(phi)) / math.pi) / 2.0 * size)
+    return x, y
+
+
+class MercatorGridTests(SimpleTestCase):
+    def test_matches_osm_tile_numbers(self):
+        rng = np.random.default_rng(3)
+        latitudes = rng.uniform(-85, 85, 200)
+        longitudes = rng.uniform(-180, 179.999, 200)
+
+        for zoom in (0, 1, 7, 12, 20):
+            with self.subTest(zoom=zoom):
+                xs, ys = mercator_grid(latitudes, longitudes, zoom)
+                self.assertEqual(
+                    list(zip(xs.tolist(), ys.tolist())),
+                    [osm_tile(*point, zoom) for point in zip(latitudes, longitudes)],
+                )
+
+    def test_known_tile(self):
+        # Красная площадь на масштабе 10
+        self.assertEqual(
+            [v.tolist() for v in mercator_grid([55.7539], [37.6208], 10)],
+            [[619], [320]],
+        )
+
+    def test_edges_are_clipped_into_grid(self):
+        xs, ys = mercator_grid([90.0, -90.0, 0.0, 0.0], [-180.0, 180.0, 0.0, 180.0], 4)
+
+        self.assertEqual(xs.tolist(), [0, 15, 8, 15])
+        self.assertEqual(ys.tolist(), [0, 15, 8, 8])
+
+
+class TileCountsTests(SimpleTestCase):
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        self.latitudes = 55.75 + rng.normal(0, 0.05, 500)
+        self.longitudes = 37.61 + rng.normal(0, 0.05, 500)
+        self.tiles = tile_counts(self.latitudes, self.longitudes)
+
+    def test_every_point_counted_once_per_zoom(self):
+        for zoom in range(MIN_ZOOM, MAX_ZOOM + 1):
+            total = sum(
+                int(counts.sum())
+                for (tile_zoom, _, _), counts in self.tiles.items()
+                if tile_zoom == zoom
+            )
+            self.assertEqual(total, 500, zoom)
+
+    def test_cells_match_fine_grid(self):
+        for zoom in (3, 11, MAX_ZOOM):
+            xs, ys = mercator_grid(self.latitudes, self.longitudes, zoom + CELL_BITS)
+            expected = {}
+            for x, y in zip(xs.tolist(), ys.tolist()):
+                key = (zoom, x // CELLS, y // CELLS)
+                cells = expected.setdefault(key, np.zeros(CELLS * CELLS, dtype=int))
+                cells[(y % CELLS) * CELLS + x % CELLS] += 1
+
+            actual = {
+                key: counts for key, counts in self.tiles.items() if key[0] == zoom
+            }
+            self.assertEqual(actual.keys(), expected.keys())
+            for key in expected:
+                np.testing.assert_array_equal(actual[key], expected[key])
+
+    def test_parent_tile_sums_children(self):
+        for (zoom, x, y), counts in self.tiles.items():
+            if zoom == MIN_ZOOM:
+                continue
+            parent = self.tiles[(zoom - 1, x >> 1, y >> 1)].reshape(CELLS, CELLS)
+            # Квадраты 2x2 ячеек дочернего тайла — ячейки его четверти в родителе
+            half = CELLS // 2
+            quarter = parent[
+                (y & 1) * half : (y & 1) * half + half,
+                (x & 1) * half : (x & 1) * half + half,
+            ]
+            merged = counts.reshape(half, 2, half, 2).sum(axis=(1, 3))
+            np.testing.assert_array_equal(merged, quarter)
+
+    def test_empty_track(self):
+        self.assertEqual(tile_counts([], []), {})
+
+
+class HeatmapRecordTests(TestCase):
+    def setUp(self):
+        self.coach = User.objects.create(username="coach", is_staff=True)
+        self.athletes = [User.objects.create(username=f"a{i}") for i in range(2)]
+        Subscribe.objects.create(athlete=self.athletes[0], coach=self.coach)
+
+    def finish(self, athlete: User, count: int) -> Run:
+        run = Run.objects.create(athlete=athlete, comment="")
+        start_run(run)
+        start = datetime(2025, 9, 1, 7, tzinfo=timezone.utc)
+        append_positions(
+            run,
+            [
+                {
+                    "latitude": 55.75 + i * 0.001,
+                    "longitude": 37.61,
+                    "date_time": start + timedelta(seconds=30 * i),
+                }
+                for i in range(count)
+            ],
+        )
+        finish_run(run)
+        run_pending_jobs()
+        return run
+
+    def snapshot(self) -> dict:
+        return {
+            (tile.athlete_id, tile.zoom, tile.x, tile.y): (
+                bytes(tile.counts),
+                tile.total,
+            )
+            for tile in HeatmapTile.objects.all()
+        }
+
+    def test_tiles_by_scope_and_rebuild(self):
+        self.finish(self.athletes[0], 10)
+        self.finish(self.athletes[1], 4)
+        self.finish(self.athletes[0], 3)
+        zoom, x, y = 0, 0, 0
+
+        self.assertEqual(int(get_tile(zoom, x, y).sum()), 17)
+        self.assertEqual(int(get_tile(zoom, x, y, [self.athletes[0].id]).sum()), 13)
+        response = self.client.get(f"/api/heatmap/0/0/0/?coach={self.coach.id}").json()
+        self.assertEqual(response["total"], 13)
+        self.assertEqual(sum(cell["count"] for cell in response["cells"]), 13)
+
+        recorded = self.snapshot()
+        self.assertEqual(heatmap.rebuild(), 3)
+        self.assertEqual(self.snapshot(), recorded)
+
+    def test_long_track(self):
+        # Около 200 км на северо-восток: тысячи тайлов по всем уровням масштаба
+        latitudes = np.linspace(55.0, 56.3, 2000)
+        longitudes = np.linspace(37.0, 39.2, 2000)
+        tiles = tile_counts(latitudes, longitudes)
+        self.assertGreater(len(tiles), 1000)
+
+        heatmap.record(self.athletes[0].id, latitudes, longitudes)
+        heatmap.record(self.athletes[0].id, latitudes, longitudes)
+
+        self.assertEqual(int(get_tile(0, 0, 0).sum()), 4000)
+        self.assertEqual(
+            HeatmapTile.objects.filter(athlete=self.athletes[0]).count(), len(tiles)
+        )
+        for tile in HeatmapTile.objects.filter(athlete__isnull=True):
+            counts = np.frombuffer(tile.counts, dtype=heatmap.COUNTS_DTYPE)
+            np.testing.assert_array_equal(counts, 2 * tiles[tile.zoom, tile.x, tile.y])
+
+    @override_settings(JOBS_RETRY_DELAY_SECONDS=0)
+    def test_heatmap_failure_keeps_run_processing(self):
+        with mock.patch.object(
+            heatmap, "_add", side_effect=DatabaseError("heatmap is down")
+        ):
+            run = self.finish(self.athletes[0], 10)
+
+        # Статистика и сплиты сохранены, задача тепловой карты исчерпала попытки
+        self.assertEqual(UserStats.objects.get(user=self.athletes[0]).runs_finished, 1)
+        self.assertTrue(RunSplits.objects.filter(run=run).exists())
+        job = Job.objects.get(kind="run_heatmap")
+        self.assertEqual(job.status, "failed")
+        self.assertFalse(HeatmapTile.objects.exists())
+
+        # Повтор задачи после устранения ошибки и ее повторное выполнение
+        # после возврата в очередь учитывают трек один раз
+        Job.objects.filter(pk=job.pk).update(status="pending", attempts=0)
+        run_pending_jobs()
+        Job.objects.filter(pk=job.pk).update(
+            status="running", updated_at=run.created_at
+        )
+        requeue_stale_jobs(0)
+        run_pending_jobs()
+
+        self.assertEqual(int(get_tile(0, 0, 0).sum()), 10)
+        self.assertTrue(Run.objects.get(pk=run.pk).heatmap_applied)
+
+    def test_tile_outside_grid(self):
+        self.assertEqual(self.client.get("/api/heatmap/2/4/0/").status_code, 404)
+        self.assertEqual(
+            self.client.get(f"/api/heatmap/{MAX_ZOOM + 1}/0/0/").status_code, 404
+        )
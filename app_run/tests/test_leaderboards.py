@@ -0,0 +1,219 @@
+import random
+from datetime import date, datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase
+
+from app_run import leaderboards
+from app_run.leaderboards import BOARDS, get_rank, period_start, record
+from app_run.models import CollectibleItem, Job, LeaderboardEntry, Run
+from app_run.jobs import enqueue
+from app_run.services import OWNED_ITEMS_CACHE_KEY, append_positions
+from app_run.testing import run_pending_jobs
+
+DAY = date(2025, 9, 17)
+
+
+def entries_snapshot() -> dict:
+    return {
+        (entry.board, entry.period, entry.period_start, entry.user_id): round(
+            entry.score, 6
+        )
+        for entry in LeaderboardEntry.objects.all()
+    }
+
+
+class LeaderboardRankTests(TestCase):
+    def test_rank_matches_brute_force(self):
+        rng = random.Random(5)
+        users = User.objects.bulk_create(User(username=f"user{i}") for i in range(60))
+        for user in users:
+            for _ in range(rng.randint(1, 3)):
+                # Значения, кратные четверти, дают много равных результатов
+                # и результатов на границах корзин
+                distance = rng.randint(0, 40) / 4
+                record(
+                    user.id,
+                    DAY - timedelta(days=rng.randint(0, 20)),
+                    {
+                        "distance_total": distance,
+                        "distance_max": distance,
+                        "speed_avg": rng.randint(0, 24) / 4,
+                    },
+                )
+
+        entries = list(LeaderboardEntry.objects.all())
+        self.assertTrue(entries)
+        for entry in entries:
+            scores = [
+                other.score
+                for other in entries
+                if (other.board, other.period, other.period_start)
+                == (entry.board, entry.period, entry.period_start)
+            ]
+            expected = 1 + sum(score > entry.score for score in scores)
+            self.assertEqual(get_rank(entry), expected, entry)
+
+    def test_record_matches_rebuild(self):
+        athletes = User.objects.bulk_create(User(username=f"a{i}") for i in range(3))
+        items = [
+            CollectibleItem.objects.create(
+                name=f"item{i}",
+                uid=f"uid{i}",
+                latitude=0,
+                longitude=0,
+                picture="https://example.com/item.png",
+                value=10 * (i + 1),
+            )
+            for i in range(3)
+        ]
+        for i, athlete in enumerate(athletes):
+            for days in range(i + 2):
+                created_at = datetime(2025, 9, 1, 12, tzinfo=timezone.utc) + timedelta(
+                    days=7 * days
+                )
+                run = Run.objects.create(
+                    athlete=athlete,
+                    comment="",
+                    status="finished",
+                    distance=1.5 + days,
+                    speed=2.0 + i,
+                )
+                Run.objects.filter(pk=run.pk).update(created_at=created_at)
+                record(
+                    athlete.id,
+                    created_at.date(),
+                    {
+                        "distance_total": run.distance,
+                        "distance_max": run.distance,
+                        "speed_avg": run.speed,
+                    },
+                )
+            items[i].athlete.add(athlete)
+            record(athlete.id, DAY, {"items_value": items[i].value})
+        recorded = entries_snapshot()
+
+        leaderboards.rebuild()
+
+        self.assertEqual(entries_snapshot(), recorded)
+        self.assertEqual(
+            set(
+                LeaderboardEntry.objects.filter(board="items_value").values_list(
+                    "period", flat=True
+                )
+            ),
+            {"all"},
+        )
+
+
+class ItemsValueTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.athlete = User.objects.create(username="runner")
+        self.run = Run.objects.create(
+            athlete=self.athlete, comment="", status="in_progress"
+        )
+        CollectibleItem.objects.create(
+            name="flag",
+            uid="flag",
+            latitude=55.7501,
+            longitude=37.61,
+            picture="https://example.com/flag.png",
+            value=7,
+        )
+
+    def test_items_value_recorded_by_job(self):
+        append_positions(
+            self.run,
+            [
+                {
+                    "latitude": 55.75,
+                    "longitude": 37.61,
+                    "date_time": datetime(2025, 9, 17, 8, tzinfo=timezone.utc),
+                }
+            ],
+        )
+
+        self.assertEqual(self.athlete.items.count(), 1)
+        self.assertFalse(LeaderboardEntry.objects.exists())
+        self.assertTrue(Job.objects.filter(kind="collectible_items_awarded").exists())
+
+        run_pending_jobs()
+
+        entry = LeaderboardEntry.objects.get(user=self.athlete)
+        self.assertEqual(
+            (entry.board, entry.period, entry.score), ("items_value", "all", 7)
+        )
+        self.assertEqual(entry.period_start, period_start("all", DAY))
+
+    def append_near_flag(self, minute: int) -> None:
+        # Позиция в 11 м от предмета; кэш набора предметов пишется после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            append_positions(
+                self.run,
+                [
+                    {
+                        "latitude": 55.75,
+                        "longitude": 37.61,
+                        "date_time": datetime(
+                            2025, 9, 17, 8, minute, tzinfo=timezone.utc
+                        ),
+                    }
+                ],
+            )
+
+    def items_value(self) -> float:
+        return LeaderboardEntry.objects.get(
+            user=self.athlete, board="items_value"
+        ).score
+
+    def test_item_awarded_once_across_batches(self):
+        self.append_near_flag(0)
+        self.append_near_flag(1)
+        # Устаревший кэш (например, в другом процессе) не знает о предмете
+        cache.set(OWNED_ITEMS_CACHE_KEY.format(run_id=self.run.id), set())
+        self.append_near_flag(2)
+
+        self.assertEqual(self.athlete.items.count(), 1)
+        self.assertEqual(
+            Job.objects.filter(kind="collectible_items_awarded").count(), 1
+        )
+        run_pending_jobs()
+        self.assertEqual(self.items_value(), 7)
+
+    def test_stale_cache_does_not_double_count_items_value(self):
+        self.append_near_flag(0)
+        flag = CollectibleItem.objects.get(uid="flag")
+        # Два процесса с устаревшим кэшем одновременно начислили один предмет:
+        # вставка второго пропущена как конфликт, но задача поставлена обоими
+        enqueue(
+            "collectible_items_awarded",
+            user_id=self.athlete.id,
+            item_ids=[flag.id],
+            day=DAY.isoformat(),
+        )
+
+        run_pending_jobs()
+
+        self.assertEqual(self.items_value(), 7)
+        # Повторное выполнение задачи тоже не меняет результат
+        Job.objects.update(status="pending")
+        run_pending_jobs()
+        self.assertEqual(self.items_value(), 7)
+        # Результат совпадает с пересборкой по предметам атлета
+        leaderboards.rebuild()
+        self.assertEqual(self.items_value(), 7)
+
+    def test_items_value_board_only_for_all_time(self):
+        week = self.client.get("/api/leaderboards/?period=week").json()
+        items_week = self.client.get("/api/leaderboards/?board=items_value&period=week")
+        items_all = self.client.get("/api/leaderboards/?board=items_value")
+
+        self.assertEqual(
+            set(week["boards"]),
+            {name for name, board in BOARDS.items() if "week" in board.periods},
+        )
+        self.assertNotIn("items_value", week["boards"])
+        self.assertEqual(items_week.status_code, 400)
+        self.assertEqual(items_all.status_code, 200)
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from app_run.models import Position, Run
+from app_run.services import append_positions, compact_run_track, finish_run
+
+START = datetime(2025, 5, 1, 8, 0, tzinfo=timezone.utc)
+
+
+@override_settings(KEYSET_PAGE_SIZE=3, KEYSET_MAX_PAGE_SIZE=4)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.athlete = User.objects.create(username="runner")
+
+    def walk(self, url: str) -> list[int]:
+        ids = []
+        pages = 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            page = response.json()
+            self.assertLessEqual(len(page["results"]), 4)
+            ids += [item["id"] for item in page["results"]]
+            url = page["next"]
+            pages += 1
+            self.assertLess(pages, 50)
+        return ids
+
+    def test_runs_with_equal_and_close_timestamps(self):
+        # Одинаковое время у нескольких забегов и соседние значения с разницей в 1 мкс
+        times = [START] * 4 + [START + timedelta(microseconds=1)] * 2
+        times += [START + timedelta(seconds=i) for i in range(1, 6)]
+        for created_at in times:
+            run = Run.objects.create(athlete=self.athlete, comment="")
+            Run.objects.filter(pk=run.pk).update(created_at=created_at)
+        expected = list(
+            Run.objects.order_by("created_at", "id").values_list("id", flat=True)
+        )
+
+        self.assertEqual(self.walk("/api/runs/?cursor="), expected)
+        self.assertEqual(self.walk("/api/runs/?cursor=&size=100"), expected)
+        self.assertEqual(self.walk("/api/runs/?cursor=&size=1"), expected)
+
+    def test_positions_of_run_rows_and_packed_track(self):
+        run = Run.objects.create(athlete=self.athlete, comment="", status="in_progress")
+        append_positions(
+            run,
+            [
+                {
+                    "latitude": 55.75 + i * 0.0001,
+                    "longitude": 37.61,
+                    # Пары позиций с одинаковым временем
+                    "date_time": START + timedelta(seconds=i // 2),
+                }
+                for i in range(10)
+            ],
+        )
+        expected = list(
+            Position.objects.filter(run=run)
+            .order_by("date_time", "id")
+            .values_list("id", flat=True)
+        )
+        url = f"/api/positions/?run={run.id}&cursor="
+
+        self.assertEqual(self.walk(url), expected)
+
+        finish_run(run)
+        compact_run_track(run.id)
+        self.assertEqual(self.walk(url), expected)
+
+    def test_invalid_cursor(self):
+        for cursor in ("abc", "W10=", "WyJ4IiwgMV0="):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(f"/api/runs/?cursor={cursor}")
+                self.assertEqual(response.status_code, 404)
+
+    def test_ordering_must_match_cursor_ordering(self):
+        for i in range(4):
+            Run.objects.create(athlete=self.athlete, comment="")
+        expected = list(
+            Run.objects.order_by("created_at", "id").values_list("id", flat=True)
+        )
+
+        for ordering in ("created_at", "created_at,id"):
+            with self.subTest(ordering=ordering):
+                self.assertEqual(
+                    self.walk(f"/api/runs/?cursor=&ordering={ordering}"), expected
+                )
+        for ordering in ("-created_at", "id"):
+            with self.subTest(ordering=ordering):
+                response = self.client.get(f"/api/runs/?cursor=&ordering={ordering}")
+                self.assertEqual(response.status_code, 400)
+        # Без курсора сортировка OrderingFilter работает как раньше
+        response = self.client.get("/api/runs/?ordering=-created_at")
+        self.assertEqual([run["id"] for run in response.json()], expected[::-1])
+
+    def test_without_cursor_keeps_default_pagination(self):
+        Run.objects.create(athlete=self.athlete, comment="")
+
+        response = self.client.get("/api/runs/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("next", response.json())
@@ -0,0 +1,267 @@
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from app_run.heatmap import tile_counts
+from app_run.jobs import claim_jobs, run_job
+from app_run.middleware import (
+    QueryBudgetMiddleware,
+    get_query_stats,
+    reset_query_stats,
+)
+from app_run.models import Challenge, CollectibleItem, Run, Subscribe
+from app_run.services import (
+    append_positions,
+    finish_run,
+    get_collectible_index,
+    rate_coach,
+    start_run,
+)
+from app_run.testing import QueryBudgetMixin
+
+START = datetime(2025, 9, 17, 8, 0, tzinfo=timezone.utc)
+
+
+def point(i: int, latitude: float = 55.75) -> dict:
+    return {
+        "latitude": latitude + i * 0.0001,
+        "longitude": 37.61,
+        "date_time": START + timedelta(seconds=10 * i),
+    }
+
+
+def point_json(run: Run, i: int, latitude: float = 55.75) -> dict:
+    data = point(i, latitude)
+    data["date_time"] = data["date_time"].strftime("%Y-%m-%dT%H:%M:%S.%f")
+    return {"run": run.id, **data}
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """
+    Бюджет каждого маршрута из QUERY_BUDGETS на данных с несколькими
+    пользователями, забегами и связями, чтобы N+1 превышал бюджет
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.coach = User.objects.create(username="coach", is_staff=True)
+        cls.athletes = [
+            User.objects.create(username=f"athlete{i}", first_name=f"Имя{i}")
+            for i in range(4)
+        ]
+        for i, athlete in enumerate(cls.athletes):
+            Subscribe.objects.create(athlete=athlete, coach=cls.coach)
+            rate_coach(cls.coach, athlete, i + 2)
+            Challenge.objects.create(athlete=athlete, full_name="Сделай 10 Забегов!")
+
+        cls.items = [
+            CollectibleItem.objects.create(
+                name=f"item{i}",
+                uid=f"uid{i}",
+                latitude=0.0,
+                longitude=0.0 + i,
+                picture="https://example.com/item.png",
+                value=i + 1,
+            )
+            for i in range(3)
+        ]
+        for athlete in cls.athletes:
+            athlete.items.add(*cls.items)
+
+        cls.finished = []
+        for athlete in cls.athletes:
+            for _ in range(2):
+                run = Run.objects.create(
+                    athlete=athlete, comment="", status="in_progress"
+                )
+                append_positions(run, [point(i) for i in range(12)])
+                finish_run(run)
+                cls.finished.append(run)
+        for job_id in claim_jobs(100):
+            run_job(job_id)
+
+    def setUp(self):
+        cache.clear()
+        # Индекс каталога строится один раз на процесс и версию каталога
+        get_collectible_index()
+
+    def started_run(self) -> Run:
+        run = Run.objects.create(athlete=self.athletes[0], comment="")
+        start_run(run)
+        return run
+
+    def test_every_budget_is_tested(self):
+        tested = {
+            name[len("test_") :] for name in dir(self) if name.startswith("test_")
+        }
+        for route in settings.QUERY_BUDGETS:
+            with self.subTest(route=route):
+                self.assertIn(self.route_test_names[route], tested)
+
+    route_test_names = {
+        "GET api/users/": "users_list",
+        "GET api/users/(?P<pk>[^/.]+)/": "user_detail",
+        "GET api/runs/": "runs_list",
+        "GET api/runs/(?P<pk>[^/.]+)/splits/": "run_splits",
+        "GET api/positions/": "positions_list",
+        "POST api/positions/": "position_create",
+        "POST api/positions/batch/": "positions_batch",
+        "POST api/runs/<int:run_id>/stop/": "run_stop",
+        "GET api/analytics_for_coach/<int:coach_id>/": "coach_analytics",
+        "GET api/challenges/": "challenges",
+        "GET api/challenges_summary/": "challenges_summary",
+        "GET api/heatmap/<int:z>/<int:x>/<int:y>/": "heatmap_tile",
+    }
+
+    def assertOk(self, response, status_code: int = 200):
+        self.assertEqual(response.status_code, status_code, response.content)
+
+    def test_users_list(self):
+        for query in (
+            "",
+            "?include=athletes,coach,items",
+            "?type=coach&ordering=-rating",
+        ):
+            with self.subTest(query=query):
+                self.assertOk(
+                    self.assertWithinQueryBudget("get", f"/api/users/{query}")
+                )
+
+    def test_user_detail(self):
+        for user in (self.coach, self.athletes[0]):
+            with self.subTest(user=user.username):
+                self.assertOk(
+                    self.assertWithinQueryBudget(
+                        "get", f"/api/users/{user.id}/?include=items"
+                    )
+                )
+
+    def test_runs_list(self):
+        for query in ("", "?cursor=&size=3"):
+            with self.subTest(query=query):
+                self.assertOk(self.assertWithinQueryBudget("get", f"/api/runs/{query}"))
+
+    def test_run_splits(self):
+        run = self.finished[0]
+
+        self.assertOk(
+            self.assertWithinQueryBudget("get", f"/api/runs/{run.id}/splits/")
+        )
+
+    def test_positions_list(self):
+        run = self.finished[0]
+        for query in (
+            "",
+            f"?run={run.id}",
+            f"?run={run.id}&cursor=&size=5",
+            f"?run={run.id}&max_points=5",
+        ):
+            with self.subTest(query=query):
+                self.assertOk(
+                    self.assertWithinQueryBudget("get", f"/api/positions/{query}")
+                )
+
+    def test_position_create(self):
+        run = self.started_run()
+
+        # Первая позиция забега стоит столько же, сколько следующие (см. start_run)
+        for i in range(3):
+            with self.subTest(position=i):
+                self.assertOk(
+                    self.assertWithinQueryBudget(
+                        "post",
+                        "/api/positions/",
+                        data=point_json(run, i),
+                        content_type="application/json",
+                    ),
+                    201,
+                )
+
+    def test_positions_batch(self):
+        run = self.started_run()
+        new_item = CollectibleItem.objects.create(
+            name="new",
+            uid="new",
+            latitude=56.0,
+            longitude=37.61,
+            picture="https://example.com/item.png",
+            value=10,
+        )
+
+        for latitude in (55.75, 56.0):
+            with self.subTest(latitude=latitude):
+                response = self.assertWithinQueryBudget(
+                    "post",
+                    "/api/positions/batch/",
+                    data={
+                        "run": run.id,
+                        "positions": [point_json(run, i, latitude) for i in range(20)],
+                    },
+                    content_type="application/json",
+                )
+                self.assertOk(response, 201)
+        # Второй пакет проходит рядом с предметом
+        self.assertTrue(self.athletes[0].items.filter(id=new_item.id).exists())
+
+    def test_run_stop(self):
+        run = self.started_run()
+        append_positions(run, [point(i) for i in range(5)])
+
+        self.assertOk(self.assertWithinQueryBudget("post", f"/api/runs/{run.id}/stop/"))
+
+    def test_coach_analytics(self):
+        for query in ("", "?from=2025-09-01&to=2025-09-30&top=3"):
+            with self.subTest(query=query):
+                self.assertOk(
+                    self.assertWithinQueryBudget(
+                        "get", f"/api/analytics_for_coach/{self.coach.id}/{query}"
+                    )
+                )
+
+    def test_challenges(self):
+        for query in ("", f"?athlete={self.athletes[0].id}"):
+            with self.subTest(query=query):
+                self.assertOk(
+                    self.assertWithinQueryBudget("get", f"/api/challenges/{query}")
+                )
+
+    def test_challenges_summary(self):
+        for attempt in ("cold", "cached"):
+            with self.subTest(cache=attempt):
+                self.assertOk(
+                    self.assertWithinQueryBudget("get", "/api/challenges_summary/")
+                )
+
+    def test_heatmap_tile(self):
+        ((zoom, x, y),) = [key for key in tile_counts([55.75], [37.61]) if key[0] == 12]
+        for query in ("", f"?athlete={self.athletes[0].id}", f"?coach={self.coach.id}"):
+            with self.subTest(query=query):
+                self.assertOk(
+                    self.assertWithinQueryBudget(
+                        "get", f"/api/heatmap/{zoom}/{x}/{y}/{query}"
+                    )
+                )
+
+
+class QueryBudgetMiddlewareTests(SimpleTestCase):
+    def tearDown(self):
+        reset_query_stats()
+
+    @override_settings(DEBUG=False, QUERY_STATS_ENABLED=False)
+    def test_disabled_without_debug(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            QueryBudgetMiddleware(lambda request: HttpResponse())
+
+    @override_settings(DEBUG=False, QUERY_STATS_ENABLED=True)
+    def test_enabled_by_setting(self):
+        middleware = QueryBudgetMiddleware(lambda request: HttpResponse())
+
+        response = middleware(RequestFactory().get("/unknown/"))
+
+        self.assertNotIn("X-DB-Query-Count", response)
+        self.assertEqual(get_query_stats()["GET <unresolved>"]["requests"], 1)
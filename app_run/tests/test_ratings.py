@@ -0,0 +1,136 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from app_run.models import CoachRating, Run, Subscribe, UserStats
+from app_run.services import rate_coach
+
+
+def rating_totals(coach) -> dict:
+    # Сумма, количество и распределение, посчитанные заново по оценкам
+    ratings = list(
+        CoachRating.objects.filter(coach=coach).values_list("rating", flat=True)
+    )
+    return {
+        "rating_sum": sum(ratings),
+        "rating_count": len(ratings),
+        "distribution": {stars: ratings.count(stars) for stars in range(1, 6)},
+    }
+
+
+def stats_totals(coach) -> dict:
+    stats = UserStats.objects.get(user=coach)
+    return {
+        "rating_sum": stats.rating_sum,
+        "rating_count": stats.rating_count,
+        "distribution": stats.rating_distribution,
+    }
+
+
+class RateCoachTests(TestCase):
+    def setUp(self):
+        self.coach = User.objects.create(username="coach", is_staff=True)
+        self.athletes = [User.objects.create(username=f"athlete{i}") for i in range(3)]
+        for athlete in self.athletes:
+            Subscribe.objects.create(athlete=athlete, coach=self.coach)
+
+    def test_rerate_adjusts_sum_and_distribution(self):
+        rate_coach(self.coach, self.athletes[0], 4)
+        rate_coach(self.coach, self.athletes[1], 2)
+        rate_coach(self.coach, self.athletes[0], 5)
+        # Повтор той же оценки ничего не меняет
+        rate_coach(self.coach, self.athletes[0], 5)
+
+        stats = UserStats.objects.get(user=self.coach)
+        self.assertEqual(stats_totals(self.coach), rating_totals(self.coach))
+        self.assertEqual(
+            (stats.rating_sum, stats.rating_count, stats.rating_avg), (7, 2, 3.5)
+        )
+        self.assertEqual(stats.rating_distribution, {1: 0, 2: 1, 3: 0, 4: 0, 5: 1})
+
+    def test_rate_api(self):
+        url = f"/api/rate_coach/{self.coach.id}/"
+        for athlete, rating in (
+            (self.athletes[0], 1),
+            (self.athletes[1], 3),
+            (self.athletes[0], 4),
+            (self.athletes[2], 4),
+        ):
+            response = self.client.post(
+                url,
+                {"athlete": athlete.id, "rating": rating},
+                content_type="application/json",
+            )
+            self.assertEqual(response.status_code, 200)
+
+        summary = self.client.get(url).json()
+        self.assertEqual(stats_totals(self.coach), rating_totals(self.coach))
+        self.assertEqual(summary["count"], 3)
+        self.assertAlmostEqual(summary["rating"], 11 / 3)
+        self.assertEqual(
+            summary["distribution"], {"1": 0, "2": 0, "3": 1, "4": 2, "5": 0}
+        )
+
+    def test_ratings_do_not_change_coach_analytics(self):
+        for athlete, distance in zip(self.athletes, (5.0, 12.0, 3.0)):
+            Run.objects.create(
+                athlete=athlete, comment="", status="finished", distance=distance
+            )
+            UserStats.objects.create(
+                user=athlete,
+                runs_finished=1,
+                distance_total=distance,
+                distance_max=distance,
+            )
+        url = f"/api/analytics_for_coach/{self.coach.id}/"
+        before = self.client.get(url).json()
+
+        rate_coach(self.coach, self.athletes[0], 5)
+        rate_coach(self.coach, self.athletes[0], 3)
+
+        after = self.client.get(url).json()
+        self.assertEqual(after, before)
+        self.assertEqual(after["longest_run_user"], self.athletes[1].id)
+        # Оценки пишутся только в статистику тренера, счетчики забегов атлетов не меняются
+        athlete_stats = UserStats.objects.get(user=self.athletes[0])
+        self.assertEqual(
+            (athlete_stats.runs_finished, athlete_stats.rating_count), (1, 0)
+        )
+        coach_stats = UserStats.objects.get(user=self.coach)
+        self.assertEqual((coach_stats.runs_finished, coach_stats.rating_sum), (0, 3))
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentRateCoachTests(TransactionTestCase):
+    def test_concurrent_first_ratings(self):
+        # У тренера еще нет строки статистики: все потоки создают ее одновременно
+        coach = User.objects.create(username="coach", is_staff=True)
+        athletes = [User.objects.create(username=f"athlete{i}") for i in range(8)]
+        # Первый атлет отправляет первую оценку дважды
+        raters = athletes + athletes[:1]
+        barrier = threading.Barrier(len(raters))
+        errors = []
+
+        def rate(athlete, rating):
+            try:
+                barrier.wait()
+                rate_coach(coach, athlete, rating)
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=rate, args=(athlete, i % 5 + 1))
+            for i, athlete in enumerate(raters)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(stats_totals(coach), rating_totals(coach))
+        self.assertEqual(UserStats.objects.get(user=coach).rating_count, 8)
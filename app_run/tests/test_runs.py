@@ -0,0 +1,160 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from app_run.jobs import claim_jobs, requeue_stale_jobs, run_job
+from app_run.models import (
+    Job,
+    LeaderboardEntry,
+    Position,
+    Run,
+    RunTail,
+    RunTrack,
+    UserStats,
+)
+from app_run.services import append_positions, compact_run_track, finish_run
+
+START = datetime(2025, 5, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def track(count: int, step_seconds: int = 10) -> list[dict]:
+    # Движение на север примерно по 11 м за шаг
+    return [
+        {
+            "latitude": 55.75 + i * 0.0001,
+            "longitude": 37.61,
+            "date_time": START + timedelta(seconds=step_seconds * i),
+        }
+        for i in range(count)
+    ]
+
+
+class FinishRunTests(TestCase):
+    def setUp(self):
+        self.athlete = User.objects.create(username="runner")
+        self.run = Run.objects.create(
+            athlete=self.athlete, comment="", status="in_progress"
+        )
+
+    def test_finish_uses_tail_aggregates(self):
+        append_positions(self.run, track(11))
+
+        self.assertTrue(finish_run(self.run))
+
+        self.run.refresh_from_db()
+        self.assertEqual(self.run.status, "finished")
+        self.assertEqual(self.run.run_time_seconds, 100)
+        self.assertAlmostEqual(self.run.distance, 0.1113, places=3)
+
+    def test_finish_twice(self):
+        self.assertTrue(finish_run(self.run))
+        self.assertFalse(finish_run(Run.objects.get(pk=self.run.pk)))
+
+    def test_replayed_finish_job_counts_run_once(self):
+        append_positions(self.run, track(11))
+        finish_run(self.run)
+        for job_id in claim_jobs(10):
+            run_job(job_id)
+
+        # Воркер, считавшийся зависшим, успел закоммитить результат,
+        # а задачу вернули в очередь и выполнили повторно
+        Job.objects.filter(kind="run_finished").update(
+            status="running", updated_at=START
+        )
+        self.assertEqual(requeue_stale_jobs(60), 1)
+        for job_id in claim_jobs(10):
+            self.assertTrue(run_job(job_id))
+
+        stats = UserStats.objects.get(user=self.athlete)
+        self.assertEqual(stats.runs_finished, 1)
+        self.assertAlmostEqual(stats.distance_total, 0.1113, places=3)
+        entry = LeaderboardEntry.objects.get(
+            user=self.athlete, board="distance_total", period="all"
+        )
+        self.assertAlmostEqual(entry.score, 0.1113, places=3)
+        self.assertTrue(Run.objects.get(pk=self.run.pk).stats_applied)
+
+    def test_append_after_finish(self):
+        append_positions(self.run, track(3))
+        finish_run(self.run)
+
+        # Экземпляр забега в памяти все еще in_progress, как у гонящегося запроса
+        with self.assertRaises(ValidationError):
+            append_positions(self.run, track(5)[3:])
+
+        self.assertEqual(Position.objects.filter(run=self.run).count(), 3)
+        self.assertEqual(RunTail.objects.get(run=self.run).points_count, 3)
+
+    def test_append_nothing(self):
+        self.assertEqual(append_positions(self.run, []), [])
+        self.assertFalse(Position.objects.filter(run=self.run).exists())
+
+    def test_stop_run_api(self):
+        append_positions(self.run, track(3))
+
+        response = self.client.post(f"/api/runs/{self.run.id}/stop/")
+        repeated = self.client.post(f"/api/runs/{self.run.id}/stop/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], "finished")
+        self.assertEqual(response.json()["athlete_data"]["id"], self.athlete.id)
+        self.assertEqual(repeated.status_code, 400)
+
+
+class PositionChangeTests(TestCase):
+    def setUp(self):
+        self.athlete = User.objects.create(username="runner")
+        self.run = Run.objects.create(
+            athlete=self.athlete, comment="", status="in_progress"
+        )
+        self.positions = append_positions(self.run, track(5))
+
+    def test_destroy_recomputes_tail(self):
+        last = self.positions[-1]
+
+        response = self.client.delete(f"/api/positions/{last.id}/")
+
+        self.assertEqual(response.status_code, 204)
+        tail = RunTail.objects.get(run=self.run)
+        self.assertEqual(tail.points_count, 4)
+        self.assertEqual(tail.date_time, self.positions[-2].date_time)
+        self.assertEqual(tail.latitude, self.positions[-2].latitude)
+
+    def test_update_recomputes_tail(self):
+        last = self.positions[-1]
+
+        response = self.client.put(
+            f"/api/positions/{last.id}/",
+            {
+                "run": self.run.id,
+                "latitude": 55.76,
+                "longitude": 37.61,
+                "date_time": "2025-05-01T08:01:00.000000",
+            },
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        tail = RunTail.objects.get(run=self.run)
+        self.assertEqual(tail.points_count, 5)
+        self.assertEqual(tail.latitude, 55.76)
+        self.assertAlmostEqual(tail.distance, 1.1132, places=3)
+
+
+class CompactRunTrackTests(TestCase):
+    def test_packed_positions_are_served_by_run_filter(self):
+        athlete = User.objects.create(username="runner")
+        run = Run.objects.create(athlete=athlete, comment="", status="in_progress")
+        append_positions(run, track(20))
+        finish_run(run)
+        expected = self.client.get(f"/api/positions/?run={run.id}").json()
+
+        self.assertIsNotNone(compact_run_track(run.id))
+
+        self.assertFalse(Position.objects.filter(run=run).exists())
+        self.assertEqual(RunTrack.objects.get(run=run).points_count, 20)
+        self.assertEqual(
+            self.client.get(f"/api/positions/?run={run.id}").json(), expected
+        )
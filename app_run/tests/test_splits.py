@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase
+
+from app_run.jobs import claim_jobs, run_job
+from app_run.models import Run, RunSplits
+from app_run.services import (
+    SPLIT_DISTANCES_KM,
+    append_positions,
+    calculate_splits,
+    finish_run,
+    start_run,
+)
+
+START = datetime(2025, 9, 1, 7, 0, tzinfo=timezone.utc)
+
+
+class CalculateSplitsTests(SimpleTestCase):
+    def test_positions_on_boundaries(self):
+        self.assertEqual(
+            calculate_splits([0.0, 1.0, 2.0], [0.0, 300.0, 610.0], 1.0),
+            [300.0, 610.0],
+        )
+
+    def test_boundary_between_positions_is_interpolated(self):
+        self.assertEqual(
+            calculate_splits([0.0, 0.5, 1.5], [100.0, 200.0, 400.0], 1.0), [200.0]
+        )
+
+    def test_incomplete_last_split_is_dropped(self):
+        self.assertEqual(calculate_splits([0.0, 0.999], [0.0, 300.0], 1.0), [])
+        self.assertEqual(
+            calculate_splits([0.0, 1.5, 1.99], [0.0, 450.0, 900.0], 1.0), [300.0]
+        )
+
+    def test_floating_point_total_reaches_boundary(self):
+        total = sum([0.1] * 20)  # 1.9999999999999996
+
+        self.assertEqual(
+            calculate_splits([0.0, total], [0.0, 600.0], 1.0), [300.0, 600.0]
+        )
+
+    def test_stop_on_boundary_uses_first_arrival(self):
+        # Атлет дошел до отметки 1 км и стоял на ней 5 минут
+        self.assertEqual(
+            calculate_splits(
+                [0.0, 0.5, 1.0, 1.0, 1.0, 2.0], [0, 150, 300, 450, 600, 900], 1.0
+            ),
+            [300.0, 900.0],
+        )
+
+    def test_distance_going_back_is_ignored(self):
+        self.assertEqual(
+            calculate_splits([0.0, 0.6, 0.55, 1.2], [0, 60, 70, 120], 1.0), [100.0]
+        )
+
+    def test_mile_splits(self):
+        mile = SPLIT_DISTANCES_KM["mile"]
+
+        self.assertEqual(
+            calculate_splits([0.0, 2 * mile, 3.3], [0.0, 600.0, 700.0], mile),
+            [300.0, 600.0],
+        )
+
+
+class RunSplitsTests(TestCase):
+    def test_splits_stored_when_run_finishes(self):
+        athlete = User.objects.create(username="runner")
+        run = Run.objects.create(athlete=athlete, comment="")
+        start_run(run)
+        # 2.2 км на север шагами около 11 м каждые 3 секунды
+        append_positions(
+            run,
+            [
+                {
+                    "latitude": 55.75 + i * 0.0001,
+                    "longitude": 37.61,
+                    "date_time": START + timedelta(seconds=3 * i),
+                }
+                for i in range(200)
+            ],
+        )
+        finish_run(run)
+        for job_id in claim_jobs(10):
+            run_job(job_id)
+
+        splits = RunSplits.objects.get(run=run)
+        response = self.client.get(f"/api/runs/{run.id}/splits/").json()
+
+        self.assertEqual(len(splits.km), 2)
+        self.assertEqual(len(splits.mile), 1)
+        # 1 км — примерно 90 шагов по 11.13 м, то есть около 270 секунд
+        self.assertAlmostEqual(splits.km[0], 270, delta=3)
+        self.assertEqual([split["split"] for split in response["km"]], [1, 2])
+        self.assertAlmostEqual(
+            response["km"][1]["duration"], splits.km[1] - splits.km[0], places=1
+        )
@@ -0,0 +1,209 @@
+import io
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase
+from geopy.distance import geodesic
+
+from app_run.jobs import claim_jobs, run_job
+from app_run.models import CollectibleItem, Position, Run, UserStats
+from app_run.services import OWNED_ITEMS_CACHE_KEY
+from app_run.track_import import parse_track_file
+
+GPX_EXAMPLE = settings.BASE_DIR / "data_test" / "run_example.gpx"
+
+TCX = b"""<?xml version="1.0" encoding="UTF-8"?>
+<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">
+  <Activities><Activity Sport="Running"><Lap><Track>
+    <Trackpoint>
+      <Time>2025-09-01T07:00:00.000Z</Time>
+      <Position><LatitudeDegrees>55.7558</LatitudeDegrees><LongitudeDegrees>37.6176</LongitudeDegrees></Position>
+    </Trackpoint>
+    <Trackpoint><Time>2025-09-01T07:00:05.000Z</Time></Trackpoint>
+    <Trackpoint>
+      <Time>2025-09-01T10:00:10+03:00</Time>
+      <Position><LatitudeDegrees>55.7560</LatitudeDegrees><LongitudeDegrees>37.6177</LongitudeDegrees></Position>
+    </Trackpoint>
+  </Track></Lap></Activity></Activities>
+</TrainingCenterDatabase>
+"""
+
+
+def trkpt(latitude: float, longitude: float, time: str | None) -> str:
+    time = f"<time>{time}</time>" if time else ""
+    return f'<trkpt lat="{latitude}" lon="{longitude}">{time}</trkpt>'
+
+
+def gpx(*points: str) -> io.BytesIO:
+    return io.BytesIO(
+        (
+            '<gpx version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+            "<trk><trkseg>" + "".join(points) + "</trkseg></trk></gpx>"
+        ).encode()
+    )
+
+
+class ParseTrackFileTests(SimpleTestCase):
+    def test_gpx_example(self):
+        with open(GPX_EXAMPLE, "rb") as file:
+            points = list(parse_track_file(file))
+
+        self.assertEqual(len(points), 20)
+        self.assertEqual(
+            points[0],
+            {
+                "latitude": 55.7558,
+                "longitude": 37.6176,
+                "date_time": datetime(2025, 9, 1, 7, 0, tzinfo=timezone.utc),
+            },
+        )
+        self.assertEqual(
+            points[-1]["date_time"], datetime(2025, 9, 1, 7, 3, 10, tzinfo=timezone.utc)
+        )
+
+    def test_tcx_skips_points_without_position(self):
+        points = list(parse_track_file(io.BytesIO(TCX)))
+
+        self.assertEqual([point["latitude"] for point in points], [55.7558, 55.756])
+        # Время со смещением приводится к тому же моменту в UTC
+        self.assertEqual(
+            points[1]["date_time"], datetime(2025, 9, 1, 7, 0, 10, tzinfo=timezone.utc)
+        )
+
+    def test_gpx_without_namespace_and_time_zone(self):
+        file = io.BytesIO(
+            b'<gpx><trk><trkseg><trkpt lat="1.5" lon="-2.5">'
+            b"<time>2025-09-01T07:00:00</time></trkpt>"
+            b'<trkpt lat="1.6" lon="-2.5"/></trkseg></trk></gpx>'
+        )
+
+        points = list(parse_track_file(file))
+
+        self.assertEqual(len(points), 1)
+        self.assertEqual(points[0]["date_time"].tzinfo, timezone.utc)
+
+    def test_invalid_files(self):
+        cases = {
+            "not xml": io.BytesIO(b"not xml"),
+            "empty": io.BytesIO(b""),
+            "other root": io.BytesIO(b"<kml></kml>"),
+            "broken": gpx('<trkpt lat="1" lon="2"><time>2025-09-01T07:00:00Z</time>'),
+            "bad number": gpx(
+                '<trkpt lat="north" lon="2"><time>2025-09-01T07:00:00Z</time></trkpt>'
+            ),
+            "bad time": gpx('<trkpt lat="1" lon="2"><time>yesterday</time></trkpt>'),
+            "out of range": gpx(
+                '<trkpt lat="91" lon="2"><time>2025-09-01T07:00:00Z</time></trkpt>'
+            ),
+        }
+        for name, file in cases.items():
+            with self.subTest(name), self.assertRaises(ValueError):
+                list(parse_track_file(file))
+
+
+class ImportRunTests(TestCase):
+    def setUp(self):
+        self.athlete = User.objects.create(username="runner")
+
+    def upload(self, name: str, content: bytes):
+        return self.client.post(
+            "/api/runs/import/",
+            {"file": SimpleUploadedFile(name, content), "athlete": self.athlete.id},
+        )
+
+    def test_import_gpx(self):
+        response = self.upload("morning.gpx", GPX_EXAMPLE.read_bytes())
+
+        self.assertEqual(response.status_code, 201, response.content)
+        run = Run.objects.get(pk=response.json()["id"])
+        self.assertEqual(run.status, "finished")
+        self.assertEqual(run.comment, "morning.gpx")
+        self.assertEqual(
+            run.created_at, datetime(2025, 9, 1, 7, 0, tzinfo=timezone.utc)
+        )
+        self.assertEqual(run.run_time_seconds, 190)
+        self.assertAlmostEqual(run.distance, 0.425, places=2)
+        self.assertEqual(Position.objects.filter(run=run).count(), 20)
+
+    def test_invalid_track_creates_nothing(self):
+        one_point = gpx(
+            '<trkpt lat="1" lon="2"><time>2025-09-01T07:00:00Z</time></trkpt>'
+        ).getvalue()
+
+        no_time = gpx(trkpt(1, 2, None), trkpt(1.001, 2, None)).getvalue()
+        out_of_order = gpx(
+            trkpt(1, 2, "2025-09-01T07:00:10Z"),
+            trkpt(1.001, 2, "2025-09-01T07:00:20Z"),
+            trkpt(1.002, 2, "2025-09-01T07:00:15Z"),
+        ).getvalue()
+
+        for name, content in (
+            ("one_point.gpx", one_point),
+            ("no_time.gpx", no_time),
+            ("empty.gpx", gpx().getvalue()),
+            ("out_of_order.gpx", out_of_order),
+            ("broken.gpx", b"<gpx><trk>"),
+            ("malformed.gpx", b"<gpx><trk><trkseg></trk></gpx>"),
+            ("track.kml", GPX_EXAMPLE.read_bytes()),
+        ):
+            with self.subTest(name):
+                response = self.upload(name, content)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("file", response.json())
+
+        self.assertFalse(Run.objects.exists())
+        self.assertFalse(Position.objects.exists())
+
+    def test_distance_end_to_end(self):
+        coordinates = [
+            (55.75, 37.61),
+            (55.752, 37.613),
+            (55.7545, 37.611),
+            (55.757, 37.6),
+        ]
+        content = gpx(
+            *(
+                trkpt(latitude, longitude, f"2025-09-01T07:0{i}:00Z")
+                for i, (latitude, longitude) in enumerate(coordinates)
+            )
+        ).getvalue()
+        expected = sum(
+            geodesic(a, b).kilometers for a, b in zip(coordinates, coordinates[1:])
+        )
+
+        response = self.upload("track.gpx", content)
+        for job_id in claim_jobs(10):
+            run_job(job_id)
+
+        self.assertEqual(response.status_code, 201, response.content)
+        run = Run.objects.get(pk=response.json()["id"])
+        self.assertAlmostEqual(run.distance, expected, places=5)
+        self.assertEqual(run.run_time_seconds, 180)
+        self.assertAlmostEqual(
+            UserStats.objects.get(user=self.athlete).distance_total, expected, places=5
+        )
+        detail = self.client.get(f"/api/runs/{run.id}/").json()
+        self.assertAlmostEqual(detail["distance"], expected, places=2)
+
+    def test_owned_items_cache_removed_after_commit(self):
+        CollectibleItem.objects.create(
+            name="flag",
+            uid="flag",
+            latitude=55.7558,
+            longitude=37.6176,
+            picture="https://example.com/flag.png",
+            value=1,
+        )
+        cache.clear()
+
+        # Предмет начисляется при импорте, и его набор в кэше пишется после коммита
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload("morning.gpx", GPX_EXAMPLE.read_bytes())
+
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(self.athlete.items.count(), 1)
+        run_id = response.json()["id"]
+        self.assertIsNone(cache.get(OWNED_ITEMS_CACHE_KEY.format(run_id=run_id)))
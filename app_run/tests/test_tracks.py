@@ -0,0 +1,82 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from app_run.tracks import from_microseconds, pack_track, unpack_track
+
+START = datetime(2025, 5, 1, 8, 0, tzinfo=timezone.utc)
+
+
+def points(count: int, seed: int = 1) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    latitudes = 55.75 + np.cumsum(rng.normal(0, 0.0001, count))
+    longitudes = 37.61 + np.cumsum(rng.normal(0, 0.0002, count))
+    seconds = np.cumsum(rng.integers(1, 30, count))
+    ids = 100 + np.cumsum(rng.integers(1, 5, count))
+    return [
+        {
+            "id": int(ids[i]),
+            "latitude": round(float(latitudes[i]), 7),
+            "longitude": round(float(longitudes[i]), 7),
+            "date_time": START + timedelta(seconds=int(seconds[i]), microseconds=i),
+            "speed": round(float(rng.uniform(0, 6)), 2),
+            "distance": round(i * 0.01, 2),
+        }
+        for i in range(count)
+    ]
+
+
+class PackTrackTests(SimpleTestCase):
+    def assertRoundTrip(self, track: list[dict]):
+        unpacked = unpack_track(pack_track(track))
+
+        self.assertEqual(unpacked["id"].tolist(), [p["id"] for p in track])
+        np.testing.assert_allclose(
+            unpacked["latitude"], [p["latitude"] for p in track], atol=1e-9
+        )
+        np.testing.assert_allclose(
+            unpacked["longitude"], [p["longitude"] for p in track], atol=1e-9
+        )
+        self.assertEqual(
+            [from_microseconds(t) for t in unpacked["timestamp"]],
+            [p["date_time"] for p in track],
+        )
+        np.testing.assert_allclose(
+            unpacked["speed"], [p["speed"] for p in track], atol=1e-9
+        )
+        np.testing.assert_allclose(
+            unpacked["distance"], [p["distance"] for p in track], atol=1e-9
+        )
+
+    def test_round_trip(self):
+        self.assertRoundTrip(points(1000))
+
+    def test_round_trip_single_point(self):
+        self.assertRoundTrip(points(1))
+
+    def test_round_trip_without_speed_and_distance(self):
+        track = points(50)
+        for point in track:
+            point["speed"] = point["distance"] = 0
+
+        self.assertRoundTrip(track)
+
+    def test_round_trip_across_antimeridian_and_negative_values(self):
+        track = points(3)
+        track[0].update(latitude=-33.8688, longitude=179.9999999)
+        track[1].update(latitude=-33.8689, longitude=-179.9999999)
+        track[2].update(latitude=-90.0, longitude=-179.0)
+
+        self.assertRoundTrip(track)
+
+    def test_invalid_input(self):
+        track = points(2)
+        track[1]["date_time"] = None
+
+        with self.assertRaises(ValueError):
+            pack_track([])
+        with self.assertRaises(ValueError):
+            pack_track(track)
+        with self.assertRaises(ValueError):
+            unpack_track(b"XX" + pack_track(points(2))[2:])
@@ -0,0 +1,107 @@
+from collections.abc import Iterator
+from datetime import datetime, timezone
+from xml.etree.ElementTree import ParseError, iterparse
+
+# Корневой элемент файла -> формат
+TRACK_FORMATS = {"gpx": "gpx", "TrainingCenterDatabase": "tcx"}
+
+
+def _local_name(tag: str) -> str:
+    # Теги приходят с пространством имен: {http://www.topografix.com/GPX/1/1}trkpt
+    return tag.rpartition("}")[2]
+
+
+def _child_text(element, name: str) -> str | None:
+    for child in element:
+        if _local_name(child.tag) == name:
+            return child.text
+    return None
+
+
+def _parse_time(value: str) -> datetime:
+    date_time = datetime.fromisoformat(value.strip())
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=timezone.utc)
+    return date_time
+
+
+def _gpx_point(element) -> tuple[str | None, str | None, str | None]:
+    return element.get("lat"), element.get("lon"), _child_text(element, "time")
+
+
+def _tcx_point(element) -> tuple[str | None, str | None, str | None]:
+    latitude = longitude = None
+    for child in element:
+        if _local_name(child.tag) == "Position":
+            latitude = _child_text(child, "LatitudeDegrees")
+            longitude = _child_text(child, "LongitudeDegrees")
+    return latitude, longitude, _child_text(element, "Time")
+
+
+# Формат -> (тег точки трека, чтение координат и времени точки)
+_POINT_READERS = {
+    "gpx": ("trkpt", _gpx_point),
+    "tcx": ("Trackpoint", _tcx_point),
+}
+
+
+def parse_track_file(file) -> Iterator[dict]:
+    """
+    Потоково читает точки трека из файла GPX или TCX.
+
+    Файл разбирается iterparse, обработанные элементы сразу удаляются
+    из дерева, поэтому память не зависит от размера файла. Точки без координат
+    или времени (например, паузы в TCX) пропускаются.
+
+    Args:
+        file: Файл (file-like объект, открытый в двоичном режиме).
+
+    Yields:
+        dict: Точка с ключами "latitude", "longitude" и "date_time".
+
+    Raises:
+        ValueError: Если файл не является GPX/TCX или содержит некорректную точку.
+    """
+    events = iterparse(file, events=("start", "end"))
+    try:
+        _, root = next(events)
+        track_format = TRACK_FORMATS.get(_local_name(root.tag))
+        if track_format is None:
+            raise ValueError("Ожидается файл GPX или TCX.")
+        point_tag, read_point = _POINT_READERS[track_format]
+
+        # Открытые элементы от корня до текущего: нужны, чтобы удалить точку из родителя
+        parents = [root]
+        for event, element in events:
+            if event == "start":
+                parents.append(element)
+                continue
+            parents.pop()
+            if _local_name(element.tag) != point_tag:
+                continue
+
+            latitude, longitude, date_time = read_point(element)
+            # Точка разобрана — удаляем ее из дерева
+            parents[-1].remove(element)
+            if latitude is None or longitude is None or not date_time:
+                continue
+
+            try:
+                point = {
+                    "latitude": float(latitude),
+                    "longitude": float(longitude),
+                    "date_time": _parse_time(date_time),
+                }
+            except ValueError:
+                raise ValueError(
+                    f"Некорректная точка трека: {latitude}, {longitude}, {date_time}"
+                )
+            if not (-90.0 <= point["latitude"] <= 90.0) or not (
+                -180.0 <= point["longitude"] <= 180.0
+            ):
+                raise ValueError(
+                    f"Координаты вне допустимого диапазона: {latitude}, {longitude}"
+                )
+            yield point
+    except (ParseError, StopIteration) as error:
+        raise ValueError(f"Некорректный XML: {error}")
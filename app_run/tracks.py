@@ -0,0 +1,172 @@
+import struct
+import zlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+# Формат упакованного трека:
+#   заголовок — сигнатура, версия формата, флаги, количество точек и значения
+#   первой точки (id, время в микросекундах, координаты в 1e-7 градуса);
+#   тело (zlib) — массивы приращений id, широты, долготы и времени,
+#   затем скорости и приращения дистанции, если они есть (см. флаги).
+# Приращения соседних точек малы, поэтому после сжатия точка занимает единицы байт.
+MAGIC = b"RT"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<2sBBIqqii")
+
+FLAG_SPEED = 1
+FLAG_DISTANCE = 2
+
+# Масштабы целочисленного представления: координаты с точностью 1e-7 градуса
+# (около 1 см), скорость и дистанция — с точностью до сотых, как они хранятся в Position
+COORDINATE_SCALE = 10**7
+SPEED_SCALE = 100
+DISTANCE_SCALE = 100
+
+# Полный оборот по долготе в единицах COORDINATE_SCALE и границы приращения <i4:
+# при переходе через антимеридиан приращение долготы может не поместиться в <i4
+FULL_TURN = 360 * COORDINATE_SCALE
+INT32_MIN, INT32_MAX = np.iinfo(np.int32).min, np.iinfo(np.int32).max
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def _to_microseconds(date_time: datetime) -> int:
+    delta = date_time - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 10**6 + delta.microseconds
+
+
+def from_microseconds(value: int) -> datetime:
+    """
+    Время в UTC по количеству микросекунд от начала эпохи
+    """
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def _deltas(values: np.ndarray, dtype) -> np.ndarray:
+    return np.diff(values).astype(dtype)
+
+
+def _longitude_deltas(longitudes: np.ndarray) -> np.ndarray:
+    # Приращения, не помещающиеся в <i4, заменяются равными по модулю полного оборота,
+    # unpack_track возвращает восстановленную долготу в диапазон [-180, 180]
+    deltas = np.diff(longitudes)
+    deltas[deltas > INT32_MAX] -= FULL_TURN
+    deltas[deltas < INT32_MIN] += FULL_TURN
+    return deltas.astype("<i4")
+
+
+def pack_track(points: list[dict]) -> bytes:
+    """
+    Упаковывает трек в бинарный блок с дельта-кодированием.
+
+    Args:
+        points (list[dict]): Позиции в порядке времени с ключами "id", "latitude",
+                             "longitude", "date_time", "speed" и "distance".
+
+    Returns:
+        bytes: Упакованный трек.
+
+    Raises:
+        ValueError: Если трек пуст или у позиции нет времени фиксации.
+    """
+    if not points:
+        raise ValueError("Нельзя упаковать пустой трек.")
+    if any(point["date_time"] is None for point in points):
+        raise ValueError("У всех позиций трека должно быть время фиксации.")
+
+    ids = np.array([point["id"] for point in points], dtype=np.int64)
+    latitudes = np.rint(
+        np.array([point["latitude"] for point in points]) * COORDINATE_SCALE
+    ).astype(np.int64)
+    longitudes = np.rint(
+        np.array([point["longitude"] for point in points]) * COORDINATE_SCALE
+    ).astype(np.int64)
+    timestamps = np.array(
+        [_to_microseconds(point["date_time"]) for point in points], dtype=np.int64
+    )
+    speeds = np.rint(
+        np.array([point["speed"] for point in points]) * SPEED_SCALE
+    ).astype(np.int32)
+    distances = np.rint(
+        np.array([point["distance"] for point in points]) * DISTANCE_SCALE
+    ).astype(np.int64)
+
+    flags = 0
+    body = [
+        _deltas(ids, "<i4"),
+        _deltas(latitudes, "<i4"),
+        _longitude_deltas(longitudes),
+        _deltas(timestamps, "<i8"),
+    ]
+    if speeds.any():
+        flags |= FLAG_SPEED
+        body.append(speeds.astype("<i4"))
+    if distances.any():
+        flags |= FLAG_DISTANCE
+        body.append(np.diff(distances, prepend=0).astype("<i4"))
+
+    header = HEADER.pack(
+        MAGIC,
+        FORMAT_VERSION,
+        flags,
+        len(points),
+        int(ids[0]),
+        int(timestamps[0]),
+        int(latitudes[0]),
+        int(longitudes[0]),
+    )
+    return header + zlib.compress(b"".join(array.tobytes() for array in body))
+
+
+def unpack_track(data: bytes) -> dict[str, np.ndarray]:
+    """
+    Распаковывает трек, упакованный pack_track.
+
+    Returns:
+        dict: Массивы одинаковой длины: "id", "latitude", "longitude" (градусы),
+              "timestamp" (микросекунды от начала эпохи, UTC), "speed" (м/с)
+              и "distance" (км).
+
+    Raises:
+        ValueError: Если данные не являются упакованным треком известной версии.
+    """
+    data = bytes(data)
+    magic, version, flags, count, first_id, first_time, first_lat, first_lon = (
+        HEADER.unpack_from(data)
+    )
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("Неизвестный формат упакованного трека.")
+
+    body = zlib.decompress(data[HEADER.size :])
+    offset = 0
+
+    def read(dtype, size: int) -> np.ndarray:
+        nonlocal offset
+        array = np.frombuffer(body, dtype=dtype, count=size, offset=offset)
+        offset += array.nbytes
+        return array
+
+    def restore(first: int, dtype) -> np.ndarray:
+        return np.concatenate(([first], first + np.cumsum(read(dtype, count - 1))))
+
+    ids = restore(first_id, "<i4")
+    latitudes = restore(first_lat, "<i4")
+    longitudes = restore(first_lon, "<i4")
+    timestamps = restore(first_time, "<i8")
+    longitudes[longitudes > FULL_TURN // 2] -= FULL_TURN
+    longitudes[longitudes < -FULL_TURN // 2] += FULL_TURN
+
+    speeds = read("<i4", count) if flags & FLAG_SPEED else np.zeros(count)
+    distances = (
+        np.cumsum(read("<i4", count)) if flags & FLAG_DISTANCE else np.zeros(count)
+    )
+
+    return {
+        "id": ids.astype(np.int64),
+        "latitude": latitudes / COORDINATE_SCALE,
+        "longitude": longitudes / COORDINATE_SCALE,
+        "timestamp": timestamps.astype(np.int64),
+        "speed": speeds / SPEED_SCALE,
+        "distance": distances / DISTANCE_SCALE,
+    }
@@ -1,10 +1,12 @@
 from .challenge_views import ChallengeViewSet, ChallengeSummaryViewSet
 from .collectible_views import CollectibleItemViewSet
 from .file_views import UploadFileAPIView
-from .misc_views import company_details
+from .heatmap_views import HeatmapTileAPIView
+from .leaderboard_views import LeaderboardAPIView
+from .misc_views import company_details, query_stats, cache_stats
 from .position_views import PositionViewSet
 from .rating_views import RateCoachApiView
-from .run_views import RunViewSet, StopRunAPIView, StartRunAPIView
+from .run_views import RunViewSet, StopRunAPIView, StartRunAPIView, export_run_track
 from .subscription_views import SubscribeAPIView
 from .user_views import (
     CouchAthleteViewSet,
@@ -16,6 +18,7 @@ __all__ = [
     "RunViewSet",
     "StopRunAPIView",
     "StartRunAPIView",
+    "export_run_track",
     "CouchAthleteViewSet",
     "AthleteInfoAPIView",
     "ChallengeViewSet",
@@ -24,7 +27,11 @@ __all__ = [
     "SubscribeAPIView",
     "UploadFileAPIView",
     "company_details",
+    "query_stats",
+    "cache_stats",
     "ChallengeSummaryViewSet",
     "RateCoachApiView",
     "AnalyticsForCoachAPIView",
+    "LeaderboardAPIView",
+    "HeatmapTileAPIView",
 ]
@@ -1,12 +1,11 @@
-from collections import defaultdict
-
+from django.http import HttpResponse
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from app_run.challenges import get_challenge_summary
 from app_run.models import Challenge
 from app_run.serializers import ChallengeSerializer
-from app_run.serializers.user import AthleteSummarySerializer
 
 
 class ChallengeViewSet(APIView):
@@ -35,21 +34,8 @@ class ChallengeViewSet(APIView):
 
 class ChallengeSummaryViewSet(APIView):
     def get(self, request):
-        # Получаем все челленджи с жадной загрузкой athlete (User)
-        challenges = Challenge.objects.select_related("athlete").all()
-
-        # Группируем по full_name
-        grouped = defaultdict(list)
-        for ch in challenges:
-            grouped[ch.full_name].append(ch.athlete)
-
-        # Формируем результат
-        result = []
-        for full_name, athletes in grouped.items():
-            # Убираем дубликаты пользователей (на всякий случай)
-            unique_athletes = list({a.id: a for a in athletes}.values())
-            # Сериализуем бегунов
-            athletes_data = AthleteSummarySerializer(unique_athletes, many=True).data
-            result.append({"name_to_display": full_name, "athletes": athletes_data})
-
-        return Response(result)
+        """
+        Сводка челленджей: для каждого челленджа — получившие его атлеты.
+        Отдается готовым JSON из кэша (см. app_run.challenges.get_challenge_summary).
+        """
+        return HttpResponse(get_challenge_summary(), content_type="application/json")
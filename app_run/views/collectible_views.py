@@ -1,9 +1,38 @@
 from rest_framework import viewsets
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from app_run.models import CollectibleItem
-from app_run.serializers import CollectibleItemSerializer
+from app_run.serializers import (
+    CollectibleItemNearSerializer,
+    CollectibleItemSearchSerializer,
+    CollectibleItemSerializer,
+)
+from app_run.services import collectibles_in_box, collectibles_near
 
 
 class CollectibleItemViewSet(viewsets.ModelViewSet):
+    """
+    Каталог предметов. Список фильтруется по положению
+    (см. CollectibleItemSearchSerializer):
+    ?near=lat,lon&radius=m   # Предметы в радиусе с расстоянием, от ближних к дальним
+    ?bbox=...                # Предметы в прямоугольнике
+    """
+
     queryset = CollectibleItem.objects.all()
     serializer_class = CollectibleItemSerializer
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        params = CollectibleItemSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        params = params.validated_data
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if "bbox" in params:
+            queryset = collectibles_in_box(queryset, params["bbox"])
+
+        if "near" in params:
+            items = collectibles_near(queryset, *params["near"], params["radius"])
+            return Response(CollectibleItemNearSerializer(items, many=True).data)
+
+        return Response(self.get_serializer(queryset, many=True).data)
@@ -17,8 +17,11 @@ class UploadFileAPIView(APIView):
 
         # Проверяем, что файл не пустой и имеет расширение .xlsx
         if uploaded_file.name.endswith(".xlsx"):
-            # Отправляем полученный файл на чтение
-            data_error = read_excel_file(uploaded_file)
+            # С параметром ?details=true ошибки возвращаются с номерами строк
+            detailed = request.query_params.get("details") in ("1", "true")
+
+            # Отправляем полученный файл на потоковый импорт
+            data_error = read_excel_file(uploaded_file, detailed=detailed)
 
             return Response(data_error, status=status.HTTP_200_OK)
 
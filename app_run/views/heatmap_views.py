@@ -0,0 +1,71 @@
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from app_run.heatmap import CELLS, MAX_ZOOM, MIN_ZOOM, get_tile
+from app_run.models import Subscribe
+
+
+class HeatmapTileAPIView(APIView):
+    """
+    Тайл тепловой карты активности: api/heatmap/{z}/{x}/{y}/
+    Нумерация тайлов — как у карт Web Mercator (z от MIN_ZOOM до MAX_ZOOM).
+    Параметры:
+    ?athlete=12   # Только забеги атлета
+    ?coach=2      # Только забеги атлетов тренера
+    Ответ:
+    {
+    'zoom': ..., 'x': ..., 'y': ...,
+    'size': 16,                           # Ячеек по стороне тайла
+    'total': ...,                         # Позиций в тайле
+    'cells': [{'x', 'y', 'count'}, ...]   # Непустые ячейки, y — с севера на юг
+    }
+    """
+
+    def get(self, request: Request, z: int, x: int, y: int) -> Response:
+        if not MIN_ZOOM <= z <= MAX_ZOOM or not (0 <= x < 2**z and 0 <= y < 2**z):
+            return Response(
+                {
+                    "error": f"Тайл {z}/{x}/{y} вне сетки, масштаб от {MIN_ZOOM} до {MAX_ZOOM}"
+                },
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        try:
+            athlete_id = request.query_params.get("athlete")
+            coach_id = request.query_params.get("coach")
+            athlete_id = int(athlete_id) if athlete_id is not None else None
+            coach_id = int(coach_id) if coach_id is not None else None
+        except ValueError:
+            return Response(
+                {"error": "Параметры 'athlete' и 'coach' должны быть целыми числами"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        athlete_ids = None
+        if athlete_id is not None:
+            athlete_ids = [athlete_id]
+        elif coach_id is not None:
+            # Атлеты тренера подставляются в запрос тайлов подзапросом
+            athlete_ids = Subscribe.objects.filter(coach_id=coach_id).values(
+                "athlete_id"
+            )
+
+        counts = get_tile(z, x, y, athlete_ids)
+        cells = [
+            {"x": int(cell_x), "y": int(cell_y), "count": int(counts[cell_y, cell_x])}
+            for cell_y, cell_x in zip(*counts.nonzero())
+        ]
+
+        return Response(
+            {
+                "zoom": z,
+                "x": x,
+                "y": y,
+                "size": CELLS,
+                "total": int(counts.sum()),
+                "cells": cells,
+            },
+            status=status.HTTP_200_OK,
+        )
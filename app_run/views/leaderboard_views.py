@@ -0,0 +1,83 @@
+from datetime import date
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from app_run.leaderboards import BOARDS, PERIODS, get_leaderboard
+
+
+class LeaderboardAPIView(APIView):
+    """
+    Таблицы лидеров: api/leaderboards/
+    Параметры:
+    ?board=distance_total,speed_avg # Таблицы через запятую, по умолчанию все таблицы периода:
+                                    # distance_total, distance_max, speed_avg, items_value
+    &period=week                    # all (по умолчанию), month или week;
+                                    # items_value ведется только за all
+    &date=2025-09-28                # День периода, по умолчанию сегодня
+    &top=10                         # Количество первых мест, по умолчанию LEADERBOARD_TOP
+    &user=12                        # Чье место вернуть в me, по умолчанию текущий пользователь
+    Ответ:
+    {
+    'period': ..., 'period_start': ...,
+    'boards': {'distance_total': {'results': [{'rank', 'user', 'score'}, ...], 'me': {...}}, ...}
+    }
+    """
+
+    def get(self, request: Request) -> Response:
+        period = request.query_params.get("period", "all")
+        if period not in PERIODS:
+            return Response(
+                {
+                    "error": f"Параметр 'period' должен быть одним из: {', '.join(PERIODS)}"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        available = [name for name, board in BOARDS.items() if period in board.periods]
+        names = [
+            name.strip()
+            for name in request.query_params.get("board", "").split(",")
+            if name.strip()
+        ] or available
+        unknown = [name for name in names if name not in available]
+        if unknown:
+            return Response(
+                {
+                    "error": f"Неизвестные таблицы периода {period}: {', '.join(unknown)}. "
+                    f"Доступны: {', '.join(available)}"
+                },
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        try:
+            day = date.fromisoformat(
+                request.query_params.get("date", timezone.localdate().isoformat())
+            )
+            top = int(request.query_params.get("top", settings.LEADERBOARD_TOP))
+            user_id = request.query_params.get("user")
+            if user_id is not None:
+                user_id = int(user_id)
+            elif request.user.is_authenticated:
+                user_id = request.user.id
+        except ValueError:
+            return Response(
+                {"error": "Параметры 'date', 'top' и 'user' заданы неверно"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        top = min(max(top, 1), settings.LEADERBOARD_MAX_TOP)
+
+        boards = {}
+        for name in names:
+            leaderboard = get_leaderboard(name, period, day, top, user_id)
+            period_start = leaderboard.pop("period_start")
+            boards[name] = leaderboard
+
+        return Response(
+            {"period": period, "period_start": period_start, "boards": boards},
+            status=status.HTTP_200_OK,
+        )
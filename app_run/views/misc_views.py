@@ -1,7 +1,11 @@
 from django.conf import settings
+from django.http import Http404
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 
+from app_run.challenges import get_challenge_summary_stats
+from app_run.middleware import get_query_stats
+
 
 @api_view(["GET"])
 def company_details(request) -> Response:
@@ -14,3 +18,25 @@ def company_details(request) -> Response:
         "contacts": settings.CONTACTS,
     }
     return Response(details)
+
+
+@api_view(["GET"])
+def query_stats(request) -> Response:
+    """
+    Возвращает статистику SQL-запросов по маршрутам API.
+    Доступно только в режиме DEBUG.
+    """
+    if not settings.DEBUG:
+        raise Http404
+    return Response(get_query_stats())
+
+
+@api_view(["GET"])
+def cache_stats(request) -> Response:
+    """
+    Возвращает счетчики попаданий и промахов кэшей API.
+    Доступно только в режиме DEBUG.
+    """
+    if not settings.DEBUG:
+        raise Http404
+    return Response({"challenge_summary": get_challenge_summary_stats()})
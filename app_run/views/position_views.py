@@ -1,11 +1,28 @@
+from django.conf import settings
+from django.core.cache import cache
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import viewsets
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
 
 from app_run.models import Position
-from app_run.serializers import PositionSerializer
+from app_run.pagination import KeysetPaginationMixin
+from app_run.serializers import (
+    PositionSerializer,
+    PositionBatchSerializer,
+    TrackSimplificationSerializer,
+)
+from app_run.services import (
+    bump_track_version,
+    get_track_cache_key,
+    load_packed_positions,
+    refresh_run_tail,
+    simplify_run_track,
+)
 
 
-class PositionViewSet(viewsets.ModelViewSet):
+class PositionViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
     """
     ViewSet для просмотра и редактирования объектов Position.
 
@@ -13,6 +30,16 @@ class PositionViewSet(viewsets.ModelViewSet):
     обновление и удаление позиций. Также доступна фильтрация по полю 'run'
     с использованием DjangoFilterBackend.
 
+    Если в запросе списка передан tolerance или max_points, возвращается
+    упрощенный трек забега (см. TrackSimplificationSerializer). Упрощенные
+    треки завершенных забегов кэшируются.
+
+    Позиции завершенных забегов хранятся упакованными (RunTrack) и при запросе
+    с фильтром run распаковываются в прежний формат ответа.
+
+    С параметром cursor список отдается курсорной пагинацией по (date_time, id),
+    см. KeysetPaginationMixin.
+
     Атрибуты:
         queryset (QuerySet): Базовый набор запросов для всех объектов Position.
         serializer_class (Serializer): Класс сериализатора для данных Position.
@@ -25,3 +52,65 @@ class PositionViewSet(viewsets.ModelViewSet):
 
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["run"]
+    keyset_ordering = ("date_time", "id")
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        if not {"tolerance", "max_points"} & request.query_params.keys():
+            run_id = request.query_params.get("run", "")
+            positions = load_packed_positions(int(run_id)) if run_id.isdigit() else None
+            if positions is None:
+                return super().list(request, *args, **kwargs)
+
+            page = self.paginate_queryset(positions)
+            if page is not None:
+                return self.get_paginated_response(
+                    PositionSerializer(page, many=True).data
+                )
+            return Response(PositionSerializer(positions, many=True).data)
+
+        params = TrackSimplificationSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        run = params.validated_data["run"]
+        tolerance = params.validated_data.get("tolerance")
+        max_points = params.validated_data.get("max_points")
+
+        # Трек незавершенного забега еще растет, его не кэшируем
+        if run.status != "finished":
+            positions = simplify_run_track(run, tolerance, max_points)
+            return Response(PositionSerializer(positions, many=True).data)
+
+        cache_key = get_track_cache_key(run.id, tolerance, max_points)
+        data = cache.get(cache_key)
+        if data is None:
+            positions = simplify_run_track(run, tolerance, max_points)
+            data = PositionSerializer(positions, many=True).data
+            cache.set(cache_key, data, settings.TRACK_CACHE_TIMEOUT)
+        return Response(data)
+
+    def perform_update(self, serializer):
+        run_id = serializer.instance.run_id
+        super().perform_update(serializer)
+        # Позиция могла перейти в другой забег: пересчитываются оба хвоста
+        for changed_run_id in {run_id, serializer.instance.run_id}:
+            refresh_run_tail(changed_run_id)
+            bump_track_version(changed_run_id)
+
+    def perform_destroy(self, instance):
+        super().perform_destroy(instance)
+        refresh_run_tail(instance.run_id)
+        bump_track_version(instance.run_id)
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch(self, request: Request) -> Response:
+        """
+        Пакетная загрузка позиций: api/positions/batch/
+        В теле запроса передается {'run': 123, 'positions': [{...}, ...]}
+        """
+        serializer = PositionBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        positions = serializer.save()
+
+        return Response(
+            PositionSerializer(positions, many=True).data,
+            status=status.HTTP_201_CREATED,
+        )
@@ -3,14 +3,37 @@ from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from app_run.models import Subscribe, CoachRating
+from app_run.models import Subscribe, UserStats
+from app_run.services import rate_coach
 
 
 class RateCoachApiView(APIView):
     """
     Представление для передачи рейтинга Тренера от Атлета
+    и получения сводки его оценок
     """
 
+    def get(self, request, coach_id):
+        """
+        Средняя оценка, количество и распределение оценок тренера по звездам
+        из его статистики, без чтения отдельных оценок
+        """
+        if not User.objects.filter(id=coach_id, is_staff=True).exists():
+            return Response(status=status.HTTP_404_NOT_FOUND)
+
+        stats = UserStats.objects.filter(user_id=coach_id).first() or UserStats()
+        return Response(
+            {
+                "coach": coach_id,
+                "rating": stats.rating_avg,
+                "count": stats.rating_count,
+                "distribution": {
+                    str(stars): count
+                    for stars, count in stats.rating_distribution.items()
+                },
+            }
+        )
+
     def post(self, request, coach_id):
         # Получаем тренера из базы
         try:
@@ -42,8 +65,7 @@ class RateCoachApiView(APIView):
         if not Subscribe.objects.filter(coach=coach, athlete=athlete).exists():
             return Response(status=status.HTTP_400_BAD_REQUEST)
 
-        CoachRating.objects.update_or_create(
-            coach=coach, athlete=athlete, defaults={"rating": rating}
-        )
+        # Сохраняем оценку вместе с обновлением статистики тренера
+        rate_coach(coach, athlete, rating)
 
         return Response({"message": "Rating saved"}, status=status.HTTP_200_OK)
@@ -1,18 +1,27 @@
 import logging
 
-from django.db.models import Avg, Count, Sum
-from django.shortcuts import get_object_or_404
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
+from rest_framework.decorators import action
 from rest_framework.filters import OrderingFilter
+from rest_framework.generics import get_object_or_404
 
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from app_run.models import Run, Position, Challenge
-from app_run.serializers import RunSerializer
-from app_run.services import calculate_route_distance, calculate_run_time_seconds
+from app_run.exports import EXPORT_FORMATS, export_run
+from app_run.models import Run, RunSplits
+from app_run.pagination import KeysetPaginationMixin
+from app_run.serializers import (
+    RunImportSerializer,
+    RunSerializer,
+    RunSplitsSerializer,
+)
+from app_run.services import finish_run, start_run
 
 logger = logging.getLogger(__name__)
 
@@ -22,7 +31,12 @@ class ViewPagination(PageNumberPagination):
     max_page_size = 5
 
 
-class RunViewSet(viewsets.ModelViewSet):
+class RunViewSet(KeysetPaginationMixin, viewsets.ModelViewSet):
+    """
+    ViewSet забегов. Список постраничный (?page=&size=), с параметром cursor —
+    курсорная пагинация по (created_at, id), см. KeysetPaginationMixin.
+    """
+
     queryset = Run.objects.select_related("athlete").all()
     serializer_class = RunSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
@@ -30,28 +44,47 @@ class RunViewSet(viewsets.ModelViewSet):
     ordering_fields = ["created_at"]
     pagination_class = ViewPagination
 
+    @action(detail=False, methods=["post"], url_path="import")
+    def import_track(self, request: Request) -> Response:
+        """
+        Импорт записанного забега из файла GPX/TCX: api/runs/import/
+        Создает завершенный забег со всеми позициями (см. RunImportSerializer).
+        """
+        serializer = RunImportSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        run = serializer.save()
+
+        return Response(RunSerializer(run).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=["get"], url_path="splits")
+    def splits(self, request: Request, pk=None) -> Response:
+        """
+        Сплиты завершенного забега по километрам и милям: api/runs/{id}/splits/
+        Сплиты рассчитываются при завершении забега, здесь читается одна строка.
+        """
+        splits = get_object_or_404(RunSplits, run_id=pk)
+        return Response(RunSplitsSerializer(splits).data)
+
 
 class StartRunAPIView(APIView):
     def post(self, request, *args, **kwargs) -> Response:
         run_id = kwargs.get("run_id")
-        run = get_object_or_404(Run, pk=run_id)
+        run = get_object_or_404(Run.objects.select_related("athlete"), pk=run_id)
 
-        if run.status != "init":
+        # Старт одним условным UPDATE, хвост и предметы атлета готовятся сразу
+        if run.status != "init" or not start_run(run):
             return Response(
                 {"Ошибка": "Забег уже запущен или закончен"},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        run.status = "in_progress"
-        run.save()
-
         serializer = RunSerializer(run)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
 class StopRunAPIView(APIView):
     def post(self, request, run_id) -> Response:
-        run = get_object_or_404(Run, pk=run_id)
+        run = get_object_or_404(Run.objects.select_related("athlete"), pk=run_id)
 
         # Проверяем, что статус бега не "завершен"
         if run.status != "in_progress":
@@ -59,80 +92,36 @@ class StopRunAPIView(APIView):
                 {"Ошибка": "Забег еще не запущен"}, status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Если забег завершен — обновляем статус на "finished"
-        run.status = "finished"
-        run.save()
+        # Завершаем забег одним UPDATE, остальная обработка идет в очереди задач
+        if not finish_run(run):
+            return Response(
+                {"Ошибка": "Забег еще не запущен"}, status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # Получаем спортсмена, который завершил забег
-        athlete = run.athlete
+        serializer = RunSerializer(run)
+        return Response(serializer.data, status=status.HTTP_200_OK)
 
-        # Получаем список позиций из модели Position для текущего забега по полю run в виде словаря
-        positions_list = Position.objects.filter(run=run).values()
 
-        # Рассчитываем расстояние по полученным координатам
-        try:
-            distance = calculate_route_distance(positions_list)
-        except ValueError as e:
-            # Если точек меньше 2 — считаем расстояние = 0
-            distance = 0.0
-            logger.warning(f"Расчёт расстояния невозможен для забега {run.id}: {e}")
+@require_GET
+def export_run_track(request, run_id: int) -> StreamingHttpResponse:
+    """
+    Выгрузка трека забега файлом: ?format=gpx (по умолчанию), csv или geojson.
 
-        # Рассчитываем время по пройденным координатам
-        run_time_seconds = calculate_run_time_seconds(run)
-        logger.warning(f"run_time_seconds: {run_time_seconds}")
+    Обычное представление Django, а не DRF: в DRF параметр format занят
+    выбором рендерера ответа.
+    """
+    run = get_object_or_404(Run, id=run_id)
 
-        # Получаем среднюю скорость всех позиций
-        if positions_list:
-            speed = sum([position["speed"] for position in positions_list]) / len(
-                positions_list
-            )
-            run.speed = speed
-            run.save()
-        logger.warning(f"positions_list: {positions_list}")
-
-        if run_time_seconds:
-            run.run_time_seconds = run_time_seconds
-            run.save()
-
-        # Обновляем поле distance в модели Run
-        if distance:
-            run.distance = distance
-            run.save()
-
-        average_speed = Position.objects.filter(run=run).aggregate(Avg("speed"))[
-            "speed__avg"
-        ]
-        print(f"average_speed: {average_speed}")
-
-        count = Run.objects.filter(athlete=athlete, status="finished").aggregate(
-            Count("athlete")
+    export_format = request.GET.get("format", "gpx")
+    if export_format not in EXPORT_FORMATS:
+        return HttpResponseBadRequest(
+            f"Неизвестный формат {export_format}. "
+            f"Доступны: {', '.join(EXPORT_FORMATS)}"
         )
 
-        distance_sum = Run.objects.filter(athlete=athlete, status="finished").aggregate(
-            Sum("distance")
-        )
-
-        # Если это 10-й завершённый забег — создаём челлендж (если ещё не создан)
-        if count["athlete__count"] == 10:
-            Challenge.objects.get_or_create(
-                athlete=athlete,
-                full_name="Сделай 10 Забегов!",
-            )
-
-        # Если сумма завершенных забегов больше или равна 50 км — создаём челлендж (если ещё не создан)
-        if distance_sum["distance__sum"] >= 50:
-            Challenge.objects.get_or_create(
-                athlete=athlete,
-                full_name="Пробеги 50 километров!",
-            )
-
-        # Если атлет пробежал за 10 минут или быстрее и дистанция была 2 км или больше -
-        # создаем челлендж "Челлендж 2 км за 10 минут"
-        if run_time_seconds <= 600 and distance >= 2 and run.status == "finished":
-            Challenge.objects.get_or_create(
-                athlete=athlete,
-                full_name="2 километра за 10 минут!",
-            )
-
-        serializer = RunSerializer(run)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+    _, content_type, extension = EXPORT_FORMATS[export_format]
+    response = StreamingHttpResponse(
+        export_run(run, export_format), content_type=content_type
+    )
+    response["Content-Disposition"] = f'attachment; filename="run_{run.id}.{extension}"'
+    return response
@@ -1,54 +1,104 @@
+from datetime import date, datetime, time, timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.db import models
-from django.db.models.aggregates import Avg, Count, Max, Sum
+from django.db.models import F, Prefetch, prefetch_related_objects
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import viewsets, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.filters import OrderingFilter
 from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from app_run.models import AthleteInfo, Subscribe, Run
-from app_run.serializers import (
-    CoachAthleteSerializer,
-    CoachAthleteItemsSerializer,
-    AthleteInfoSerializer,
-    AthleteWithCoachSerializer,
-    CoachWithAthletesSerializer,
-)
+from app_run.models import AthleteInfo, Subscribe
+from app_run.serializers import AthleteInfoSerializer, UserIncludeSerializer
+from app_run.services import coach_analytics
 from app_run.views.run_views import ViewPagination
 
 
+def get_user_prefetches(include: set[str]) -> list:
+    """
+    Предзагрузка связей пользователя для UserIncludeSerializer: по одному
+    запросу на связь, независимо от количества пользователей
+    """
+    prefetches = {
+        "athletes": lambda: Prefetch(
+            "coach_subscriptions",
+            queryset=Subscribe.objects.order_by("id"),
+            to_attr="prefetched_athlete_subscriptions",
+        ),
+        "coach": lambda: Prefetch(
+            "athlete_subscriptions",
+            queryset=Subscribe.objects.order_by("id"),
+            to_attr="prefetched_coach_subscriptions",
+        ),
+        "items": lambda: "items",
+    }
+    return [
+        prefetches[name]() for name in UserIncludeSerializer.INCLUDES if name in include
+    ]
+
+
 class CouchAthleteViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Пользователи (тренеры и атлеты).
+
+    Параметр ?include=athletes,coach,items добавляет в ответ связи пользователя
+    (см. UserIncludeSerializer), каждая связь загружается одним запросом на всю
+    страницу. Для одного пользователя (/api/users/{id}/) тренеру всегда
+    добавляется athletes, атлету — coach.
+
+    Параметры ?rating_min= и ?rating_max= фильтруют по средней оценке тренера,
+    ?ordering=-rating сортирует по ней.
+    """
+
     queryset = User.objects.filter(is_superuser=False)
-    serializer_class = CoachAthleteSerializer
+    serializer_class = UserIncludeSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
     filterset_fields = ["date_joined"]
     search_fields = ["first_name", "last_name"]
-    ordering_fields = ["date_joined"]
+    ordering_fields = ["date_joined", "runs_finished", "rating"]
     pagination_class = ViewPagination
 
-    def get_serializer_class(self):
-        if self.action == "retrieve":  # для /api/users/{id}/
-            # Для retrieve — сначала получаем объект
-            user_being_viewed = self.get_object()
-
-            if user_being_viewed.is_staff:
-                # Это тренер → возвращаем сериализатор с athletes
-                return CoachWithAthletesSerializer
-            else:
-                # Это атлет → возвращаем сериализатор с coach
-                return AthleteWithCoachSerializer
-
-            return CoachAthleteItemsSerializer
-        else:
-            return CoachAthleteSerializer  # для /api/users/
+    def get_includes(self) -> set[str]:
+        value = self.request.query_params.get("include", "")
+        include = {name.strip() for name in value.split(",") if name.strip()}
+
+        unknown = include - set(UserIncludeSerializer.INCLUDES)
+        if unknown:
+            raise ValidationError(
+                {
+                    "include": f"Неизвестные связи: {', '.join(sorted(unknown))}. "
+                    f"Доступны: {', '.join(UserIncludeSerializer.INCLUDES)}"
+                }
+            )
+        return include
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["include"] = self.get_includes()
+        return context
+
+    def retrieve(self, request, *args, **kwargs):
+        # Пользователь читается один раз, связи догружаются к уже полученному объекту
+        user = self.get_object()
+        include = self.get_includes() | {"athletes" if user.is_staff else "coach"}
+        prefetch_related_objects([user], *get_user_prefetches(include))
+
+        serializer = self.get_serializer(
+            user, context={**self.get_serializer_context(), "include": include}
+        )
+        return Response(serializer.data)
 
     def get_queryset(self):
+        # Количество забегов и рейтинг читаются из материализованной статистики
         qs = User.objects.filter(is_superuser=False).annotate(
-            runs_finished=Count("run", filter=models.Q(run__status="finished")),
-            rating=Avg("received_ratings__rating"),
+            runs_finished=Coalesce("stats__runs_finished", 0),
+            rating=F("stats__rating_avg"),
         )
 
         type_param = self.request.query_params.get("type", None)
@@ -58,6 +108,20 @@ class CouchAthleteViewSet(viewsets.ReadOnlyModelViewSet):
         elif type_param == "athlete":
             qs = qs.filter(is_staff=False)
 
+        # Фильтры по средней оценке читают индекс UserStats.rating_avg
+        for param, lookup in (("rating_min", "gte"), ("rating_max", "lte")):
+            value = self.request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                value = float(value)
+            except ValueError:
+                raise ValidationError({param: "Ожидается число."})
+            qs = qs.filter(**{f"stats__rating_avg__{lookup}": value})
+
+        if self.action == "list":
+            qs = qs.prefetch_related(*get_user_prefetches(self.get_includes()))
+
         return qs
 
 
@@ -128,7 +192,15 @@ class AnalyticsForCoachAPIView(APIView):
     'total_run_value': ...   # Дистанция которую в сумме пробежал этот Бегун
     'speed_avg_user': ...    # Id Бегуна который в среднем бежал быстрее всех
     'speed_avg_value': ...   # Средняя скорость этого Бегуна
+    'top': {                 # Первые top атлетов по каждому показателю
+        'longest_run': [{'user': ..., 'value': ...}, ...],
+        'total_run': [...],
+        'speed_avg': [...],
+        }
     }
+    Параметры:
+    ?from=2025-01-01&to=2025-01-31 # Период по дате создания забега (включительно)
+    &top=5                         # Длина списков top, по умолчанию COACH_ANALYTICS_TOP
     """
 
     def get(self, request: Request, coach_id: int):
@@ -139,49 +211,44 @@ class AnalyticsForCoachAPIView(APIView):
         except User.DoesNotExist:
             return Response(status=status.HTTP_404_NOT_FOUND)
 
-        # Получаем подписчиков тренера
-        subscribed_athletes = Subscribe.objects.filter(coach=coach).values_list(
-            "athlete_id", flat=True
-        )
-
-        # Создаем QuerySet для забегов атлетов, подписанных на тренера
-        runs = Run.objects.filter(athlete_id__in=subscribed_athletes, status="finished")
-
-        # Самый длинный забег (по одному забегу)
-        longest_run = (
-            runs.values("athlete_id")
-            .annotate(max_distance=Max("distance"))
-            .order_by("-max_distance")
-        ).first()
-
-        # Суммарная дистанция по атлетам
-        total_run = (
-            runs.values("athlete_id")
-            .annotate(total_distance=Sum("distance"))
-            .order_by("-total_distance")
-            .first()
-        )
+        # Период: from — начало первого дня, to — начало дня, следующего за последним
+        period = {}
+        for param in ("from", "to"):
+            value = request.query_params.get(param)
+            if not value:
+                continue
+            try:
+                day = date.fromisoformat(value)
+            except ValueError:
+                return Response(
+                    {
+                        "error": f"Параметр '{param}' должен быть датой в формате YYYY-MM-DD"
+                    },
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if param == "to":
+                day += timedelta(days=1)
+            period[param] = timezone.make_aware(datetime.combine(day, time.min))
 
-        # Средняя скорость по атлетам
-        speed_avg = (
-            runs.values("athlete_id")
-            .annotate(avg_speed=Avg("speed"))
-            .order_by("-avg_speed")
-            .first()
+        try:
+            top = int(request.query_params.get("top", settings.COACH_ANALYTICS_TOP))
+        except ValueError:
+            return Response(
+                {"error": "Параметр 'top' должен быть числом"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        top = min(max(top, 1), settings.COACH_ANALYTICS_MAX_TOP)
+
+        leaders = coach_analytics(
+            coach, date_from=period.get("from"), date_to=period.get("to"), top=top
         )
 
-        # Формируем ответ
-        result = {
-            "longest_run_user": longest_run["athlete_id"] if longest_run else None,
-            "longest_run_value": (
-                float(longest_run["max_distance"]) if longest_run else None
-            ),
-            "total_run_user": total_run["athlete_id"] if total_run else None,
-            "total_run_value": (
-                float(total_run["total_distance"]) if total_run else None
-            ),
-            "speed_avg_user": speed_avg["athlete_id"] if speed_avg else None,
-            "speed_avg_value": float(speed_avg["avg_speed"]) if speed_avg else None,
-        }
+        # Формируем ответ: победители по каждому показателю и списки лучших
+        result = {}
+        for key, entries in leaders.items():
+            winner = entries[0] if entries else None
+            result[f"{key}_user"] = winner["user"] if winner else None
+            result[f"{key}_value"] = winner["value"] if winner else None
+        result["top"] = leaders
 
         return Response(result, status=status.HTTP_200_OK)
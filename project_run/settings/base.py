@@ -43,6 +43,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "app_run.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -116,3 +117,96 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 COMPANY_NAME = "Беги, пока не заметили!"
 SLOGAN = "Потому что стоячий бег — это уже не бег, а философия"
 CONTACTS = "ул. Легкоатлетическая, 5к, офис 1 (второй этаж, но лестница работает только после 10 км)"
+
+# Режим расчета длины маршрута: "haversine", "vincenty" или "geodesic" (эталон).
+# Отклонение быстрых режимов от эталона на реальных треках показывает команда
+# python manage.py compare_distance_modes
+ROUTE_DISTANCE_MODE = "vincenty"
+
+# Упаковывать треки завершенных забегов в RunTrack (app_run.tracks) с удалением строк Position.
+# Забеги, завершенные до включения, упаковывает команда python manage.py compact_run_tracks.
+# Выключено по умолчанию: позиции упакованных забегов читаются только списком ?run=<id>,
+# маршруты /api/positions/{id}/ и список без фильтра их не видят
+TRACK_COMPACTION_ENABLED = False
+
+# Время хранения в кэше набора предметов атлета на время забега (секунды).
+# При завершении забега набор удаляется, время жизни страхует брошенные забеги
+OWNED_ITEMS_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Время хранения в кэше упрощенных треков завершенных забегов (секунды)
+TRACK_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Выгрузка трека забега (/api/runs/{id}/export/): сколько позиций читается
+# из БД за раз и сколько строк файла отправляется клиенту одной порцией
+EXPORT_CHUNK_SIZE = 2000
+
+# Очередь фоновых задач (app_run.jobs), воркер: python manage.py run_jobs
+# Если JOBS_EAGER = True, задачи выполняются сразу после фиксации транзакции в том же процессе
+JOBS_EAGER = False
+# Количество задач, выполняемых воркером параллельно
+JOBS_CONCURRENCY = 4
+# Количество попыток выполнения задачи и задержка перед первым повтором (далее удваивается)
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY_SECONDS = 10
+# Через сколько секунд задача в статусе running считается зависшей и возвращается в очередь
+JOBS_STALE_TIMEOUT_SECONDS = 600
+
+# Кэши. Сводка челленджей хранится готовым JSON в кэше с алиасом CHALLENGE_SUMMARY_CACHE
+# под ключом с версией из БД (CacheVersion), поэтому этот кэш может быть в памяти процесса:
+# сброс в воркере очереди задач или в админке меняет версию для всех процессов.
+# Кэш default при нескольких процессах приложения должен быть общим, например файловый:
+#     {"BACKEND": "django.core.cache.backends.filebased.FileBasedCache", "LOCATION": BASE_DIR / "cache"}
+# или в БД (таблицу создает python manage.py createcachetable):
+#     {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "app_cache"}
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "summaries": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "summaries",
+    },
+}
+CHALLENGE_SUMMARY_CACHE = "summaries"
+# Страховочное время жизни сводки (секунды): обычно она сбрасывается при начислении челленджей
+CHALLENGE_SUMMARY_TIMEOUT = 60 * 60
+
+# Аналитика тренера: длина списков лучших атлетов по умолчанию и максимальная
+COACH_ANALYTICS_TOP = 5
+COACH_ANALYTICS_MAX_TOP = 50
+
+# Таблицы лидеров: количество первых мест по умолчанию и максимальное
+LEADERBOARD_TOP = 10
+LEADERBOARD_MAX_TOP = 100
+
+# Поиск предметов рядом (api/collectible_item/?near=): радиус по умолчанию
+# и максимальный радиус в метрах
+COLLECTIBLE_NEAR_RADIUS = 1000
+COLLECTIBLE_NEAR_MAX_RADIUS = 50000
+
+# Курсорная пагинация (app_run.pagination.KeysetPagination): размер страницы
+# по умолчанию и максимальный размер, который можно запросить параметром size
+KEYSET_PAGE_SIZE = 100
+KEYSET_MAX_PAGE_SIZE = 1000
+
+# Учет SQL-запросов по маршрутам (app_run.middleware.QueryBudgetMiddleware) вне режима DEBUG.
+# В режиме DEBUG учет включен всегда
+QUERY_STATS_ENABLED = False
+# Бюджет — максимальное количество запросов к БД на один запрос к маршруту,
+# его проверяют тесты app_run/tests/test_query_budgets.py (app_run.testing.QueryBudgetMixin)
+QUERY_BUDGETS = {
+    "GET api/users/": 5,
+    "GET api/users/(?P<pk>[^/.]+)/": 4,
+    "GET api/runs/": 3,
+    "GET api/runs/(?P<pk>[^/.]+)/splits/": 1,
+    "GET api/positions/": 3,
+    "POST api/positions/": 6,
+    "POST api/positions/batch/": 10,
+    "POST api/runs/<int:run_id>/stop/": 7,
+    "GET api/analytics_for_coach/<int:coach_id>/": 3,
+    "GET api/challenges/": 2,
+    "GET api/challenges_summary/": 2,
+    "GET api/heatmap/<int:z>/<int:x>/<int:y>/": 1,
+}
+# Сколько раз должен повториться один отпечаток запроса, чтобы считаться N+1
+QUERY_DUPLICATE_THRESHOLD = 3
+# Количество последних запросов по маршруту в скользящей статистике
+QUERY_STATS_WINDOW = 200
@@ -26,3 +26,6 @@ LOGGING = {
         },
     },
 }
+
+# SQLite не поддерживает параллельную запись, поэтому воркер очереди выполняет задачи по одной
+JOBS_CONCURRENCY = 1
@@ -21,10 +21,13 @@ from rest_framework import routers
 
 from app_run.views import (
     company_details,
+    query_stats,
+    cache_stats,
     RunViewSet,
     CouchAthleteViewSet,
     StartRunAPIView,
     StopRunAPIView,
+    export_run_track,
     AthleteInfoAPIView,
     ChallengeViewSet,
     PositionViewSet,
@@ -34,6 +37,8 @@ from app_run.views import (
     ChallengeSummaryViewSet,
     RateCoachApiView,
     AnalyticsForCoachAPIView,
+    LeaderboardAPIView,
+    HeatmapTileAPIView,
 )
 
 router = routers.DefaultRouter()
@@ -45,8 +50,11 @@ router.register("api/collectible_item", CollectibleItemViewSet)
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/company_details/", company_details),
+    path("api/debug/query_stats/", query_stats, name="query_stats"),
+    path("api/debug/cache_stats/", cache_stats, name="cache_stats"),
     path("api/runs/<int:run_id>/start/", StartRunAPIView.as_view()),
     path("api/runs/<int:run_id>/stop/", StopRunAPIView.as_view()),
+    path("api/runs/<int:run_id>/export/", export_run_track, name="export_run_track"),
     path("api/athlete_info/<int:user_id>/", AthleteInfoAPIView.as_view()),
     path("api/challenges/", ChallengeViewSet.as_view(), name="challenges"),
     path(
@@ -62,6 +70,12 @@ urlpatterns = [
     path(
         "api/rate_coach/<int:coach_id>/", RateCoachApiView.as_view(), name="rate_coach"
     ),
+    path("api/leaderboards/", LeaderboardAPIView.as_view(), name="leaderboards"),
+    path(
+        "api/heatmap/<int:z>/<int:x>/<int:y>/",
+        HeatmapTileAPIView.as_view(),
+        name="heatmap_tile",
+    ),
     path("api/upload_file/", UploadFileAPIView.as_view(), name="upload_file"),
     path(
         "api/subscribe_to_coach/<int:id>/",